@@ -1,7 +1,12 @@
+import threading
 from flask import Flask, jsonify, render_template
 from app.config import Config
-from app.models.database import init_db
+from app.models.database import init_db, pool_stats
+from app.services.history_writer import history_writer
+from app.services.response_cache import response_cache
 from app.utils.errors import register_error_handlers
+from app.utils.metrics import register_metrics
+from app.utils.timing import register_timing
 from app.utils.logger import logger
 
 
@@ -18,6 +23,12 @@ def create_app() -> Flask:
     # Register error handlers
     register_error_handlers(app)
 
+    # Request metrics and GET /metrics
+    register_metrics(app)
+
+    # Server-Timing header and slow-request log
+    register_timing(app)
+
     # Register blueprints
     from app.routes.languages import languages_bp
     from app.routes.translations import translations_bp
@@ -41,7 +52,37 @@ def create_app() -> Flask:
             "status": "healthy",
             "service": "SpeakSmart",
             "version": "1.0.0",
+            "database_pools": pool_stats(),
+            "history_writer": history_writer.stats(),
+            "response_cache": response_cache.stats(),
         })
 
+    # Optionally load the AI SDK etc. now, in the background, rather than on the first request
+    if Config.AI_WARMUP:
+        threading.Thread(target=_warm_up_in_background, name="speaksmart-warmup", daemon=True).start()
+
     logger.info("SpeakSmart app created successfully")
     return app
+
+
+def warm_up():
+    """Do the one-off work of the first AI requests ahead of time.
+
+    Loads the AI provider (importing the Gemini SDK dominates a cold start),
+    starts the async runner and trains the local language detector. Servers
+    can call this from a startup hook (e.g. gunicorn's post_fork), or set
+    AI_WARMUP to run it in a background thread whenever an app is created.
+    """
+    from app.services.ai_service import ai_service
+    from app.services.language_detector import language_detector
+
+    ai_service.warm_up()
+    if Config.LANG_DETECT_LOCAL:
+        language_detector.train()
+
+
+def _warm_up_in_background():
+    try:
+        warm_up()
+    except Exception as e:
+        logger.error("AI warm-up failed: %s", e)
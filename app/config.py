@@ -3,19 +3,118 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class Config:
     """Application configuration loaded from environment variables."""
 
     # Database
-    DATABASE_PATH = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "speaksmart.db",
-    )
+    DATABASE_PATH = os.path.join(BASE_DIR, "speaksmart.db")
+    DB_POOL_MAX_IDLE = int(os.getenv("DB_POOL_MAX_IDLE", 16))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", 16384))
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", 64 * 1024 * 1024))
+    DB_MAINTENANCE_INTERVAL = int(os.getenv("DB_MAINTENANCE_INTERVAL", 600))
+
+    # Pagination for list endpoints
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 1000))
+
+    # AI backend: "gemini" (Google Gemini API) or "local" (offline, deterministic)
+    AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini").strip().lower()
+
+    # Load the AI provider and train the language detector in the background at startup
+    AI_WARMUP = os.getenv("AI_WARMUP", "False").lower() in ("true", "1", "yes")
 
     # Google Gemini
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+    # Local provider: latency distribution (fixed, uniform, normal, lognormal,
+    # exponential) and share of simulated 429 / 500 failures
+    AI_LOCAL_LATENCY_MS = float(os.getenv("AI_LOCAL_LATENCY_MS", 50.0))
+    AI_LOCAL_LATENCY_DIST = os.getenv("AI_LOCAL_LATENCY_DIST", "lognormal").strip().lower()
+    AI_LOCAL_LATENCY_JITTER = float(os.getenv("AI_LOCAL_LATENCY_JITTER", 0.3))
+    AI_LOCAL_RATE_LIMIT_RATE = float(os.getenv("AI_LOCAL_RATE_LIMIT_RATE", 0.0))
+    AI_LOCAL_ERROR_RATE = float(os.getenv("AI_LOCAL_ERROR_RATE", 0.0))
+    AI_LOCAL_RETRY_AFTER = float(os.getenv("AI_LOCAL_RETRY_AFTER", 1.0))
+    AI_LOCAL_STREAM_CHUNK_CHARS = int(os.getenv("AI_LOCAL_STREAM_CHUNK_CHARS", 32))
+    AI_LOCAL_SEED = int(os.getenv("AI_LOCAL_SEED", 0))
 
     # Flask
     DEBUG = os.getenv("FLASK_DEBUG", "True").lower() in ("true", "1", "yes")
     PORT = int(os.getenv("FLASK_PORT", 5000))
+
+    # Maximum concurrent Gemini calls per worker process
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 8))
+
+    # Adaptive (AIMD token bucket) rate limiting of Gemini calls per worker process
+    AI_RATE_LIMIT_RPS = float(os.getenv("AI_RATE_LIMIT_RPS", 5.0))
+    AI_RATE_LIMIT_MIN_RPS = float(os.getenv("AI_RATE_LIMIT_MIN_RPS", 0.2))
+    AI_RATE_LIMIT_MAX_RPS = float(os.getenv("AI_RATE_LIMIT_MAX_RPS", 20.0))
+    AI_RATE_LIMIT_BURST = int(os.getenv("AI_RATE_LIMIT_BURST", 5))
+    AI_RATE_LIMIT_INCREASE = float(os.getenv("AI_RATE_LIMIT_INCREASE", 0.05))
+    AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", 30.0))
+    AI_MAX_ATTEMPTS = int(os.getenv("AI_MAX_ATTEMPTS", 3))
+
+    # Circuit breaker around Gemini, and what is served locally while it is open
+    AI_BREAKER_ENABLED = os.getenv("AI_BREAKER_ENABLED", "True").lower() in ("true", "1", "yes")
+    AI_BREAKER_WINDOW = int(os.getenv("AI_BREAKER_WINDOW", 20))
+    AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", 5))
+    AI_BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", 0.5))
+    AI_BREAKER_OPEN_SECONDS = float(os.getenv("AI_BREAKER_OPEN_SECONDS", 30.0))
+    AI_DEGRADED_MIN_SIMILARITY = float(os.getenv("AI_DEGRADED_MIN_SIMILARITY", 0.6))
+
+    # Prometheus metrics; set METRICS_MULTIPROC_DIR when running several worker processes
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "yes")
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5.0))
+
+    # Server-Timing spans; DEBUG_TIMING lets "X-Debug-Timing: 1" add them to JSON bodies
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() in ("true", "1", "yes")
+    DEBUG_TIMING = os.getenv("DEBUG_TIMING", "False").lower() in ("true", "1", "yes")
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 1000))
+
+    # Write-behind history recorder
+    HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "True").lower() in ("true", "1", "yes")
+    HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", 10000))
+    HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", 200))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", 1.0))
+    HISTORY_ENQUEUE_TIMEOUT = float(os.getenv("HISTORY_ENQUEUE_TIMEOUT", 0.5))
+
+    # AI result cache (separate SQLite file, shared by all workers on a host)
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+    AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", os.path.join(BASE_DIR, "speaksmart_cache.db"))
+    AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", 7 * 24 * 3600))
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 50000))
+
+    # Response cache for the GET list endpoints (see app/utils/http_cache.py)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", 256 * 1024))
+    RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", 0))
+    # How often (seconds) to re-read the change counters written by other workers
+    CHANGE_CHECK_INTERVAL = float(os.getenv("CHANGE_CHECK_INTERVAL", 1.0))
+
+    # Translation memory (lookups against the curated translations table)
+    TM_ENABLED = os.getenv("TM_ENABLED", "True").lower() in ("true", "1", "yes")
+    TM_MIN_SIMILARITY = float(os.getenv("TM_MIN_SIMILARITY", 0.85))
+    TM_MAX_CANDIDATES = int(os.getenv("TM_MAX_CANDIDATES", 5000))
+
+    # Local language detection in front of Gemini
+    LANG_DETECT_LOCAL = os.getenv("LANG_DETECT_LOCAL", "True").lower() in ("true", "1", "yes")
+    LANG_DETECT_MIN_CONFIDENCE = float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", 0.9))
+    LANG_DETECT_RETRAIN_INTERVAL = int(os.getenv("LANG_DETECT_RETRAIN_INTERVAL", 3600))
+    LANG_DETECT_MAX_SAMPLES = int(os.getenv("LANG_DETECT_MAX_SAMPLES", 5000))
+
+    # Batch translation
+    AI_BATCH_MAX_TEXTS = int(os.getenv("AI_BATCH_MAX_TEXTS", 500))
+    AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", 50))
+    AI_BATCH_MAX_CHARS = int(os.getenv("AI_BATCH_MAX_CHARS", 6000))
+    AI_MULTI_MAX_TARGETS = int(os.getenv("AI_MULTI_MAX_TARGETS", 12))
+
+    # Map-reduce summarization of long documents (sizes in estimated tokens)
+    AI_SUMMARY_SINGLE_MAX_TOKENS = int(os.getenv("AI_SUMMARY_SINGLE_MAX_TOKENS", 4000))
+    AI_SUMMARY_CHUNK_TOKENS = int(os.getenv("AI_SUMMARY_CHUNK_TOKENS", 1500))
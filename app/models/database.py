@@ -1,67 +1,201 @@
-import sqlite3
+import atexit
 import os
+import sqlite3
+import threading
+import time
 from app.config import Config
+from app.models.migrations import migrate
 from app.utils.logger import logger
 
 
-def get_db() -> sqlite3.Connection:
-    """Return a connection to the SQLite database with row_factory set."""
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() returns it to its pool instead of closing."""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+
+class ConnectionPool:
+    """A pool of long-lived connections to one SQLite database file.
+
+    Connections are configured once (WAL journal, busy timeout, cache and mmap
+    sizes, foreign keys) and reused across requests and threads; at most
+    DB_POOL_MAX_IDLE idle connections are kept. Every DB_MAINTENANCE_INTERVAL
+    seconds a returned connection runs ``PRAGMA optimize`` and a passive WAL
+    checkpoint.
+
+    Pools belong to the process that created them: a forked child (e.g. a
+    gunicorn --preload worker) starts with fresh pools and never touches the
+    connections it inherited.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._last_maintenance = time.monotonic()
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.maintenance_runs = 0
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = {-int(Config.DB_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self.in_use += 1
+            if conn is not None:
+                self.reused += 1
+            else:
+                self.created += 1
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if self._pid != os.getpid():
+            _inherited.append(conn)  # acquired before a fork
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._maybe_maintain(conn)
+        except sqlite3.Error as e:
+            logger.warning("Discarding pooled connection after error: %s", e)
+            with self._lock:
+                self.in_use -= 1
+            conn.close_for_real()
+            return
+
+        with self._lock:
+            self.in_use -= 1
+            keep = len(self._idle) < Config.DB_POOL_MAX_IDLE
+            if keep:
+                self._idle.append(conn)
+        if not keep:
+            conn.close_for_real()
+
+    def _maybe_maintain(self, conn: PooledConnection):
+        now = time.monotonic()
+        with self._lock:
+            due = now - self._last_maintenance >= Config.DB_MAINTENANCE_INTERVAL
+            if due:
+                self._last_maintenance = now
+        if due:
+            conn.execute("PRAGMA optimize")
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self.maintenance_runs += 1
+            logger.debug("Ran SQLite maintenance on %s", self.path)
+
+    def close_all(self):
+        """Close every idle connection (in-use ones close when released)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_for_real()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "created": self.created,
+                "reused": self.reused,
+                "maintenance_runs": self.maintenance_runs,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Connections inherited across fork(). SQLite connections must not be used in
+# the child, and closing one there could checkpoint or remove the parent's
+# WAL, so they are only kept referenced (never closed) until the child exits.
+_inherited = []
+
+
+def get_pool(path: str = None) -> ConnectionPool:
+    """Return the connection pool for *path* (default: the main database)."""
+    path = path or Config.DATABASE_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+def close_pools():
+    """Close and forget every connection pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats() -> list:
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+def _after_fork():
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    for pool in _pools.values():
+        _inherited.extend(pool._idle)
+        pool._idle = []
+    _pools.clear()
+
+
+atexit.register(close_pools)
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def get_db(path: str = None) -> sqlite3.Connection:
+    """Return a pooled connection to the SQLite database with row_factory set.
+
+    *path* defaults to Config.DATABASE_PATH. Calling close() on the connection
+    returns it to the pool.
+    """
+    return get_pool(path).acquire()
 
 
 def init_db():
-    """Create all tables if they do not exist."""
+    """Bring the database schema up to date by applying pending migrations."""
     logger.info("Initializing database at %s", Config.DATABASE_PATH)
     conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS languages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            code TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS translations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            source_language_id INTEGER NOT NULL,
-            target_language_id INTEGER NOT NULL,
-            source_text TEXT NOT NULL,
-            translated_text TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (source_language_id) REFERENCES languages (id) ON DELETE CASCADE,
-            FOREIGN KEY (target_language_id) REFERENCES languages (id) ON DELETE CASCADE
-        );
-
-        CREATE TABLE IF NOT EXISTS grammar_rules (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            language_id INTEGER NOT NULL,
-            rule_name TEXT NOT NULL,
-            description TEXT NOT NULL,
-            example_correct TEXT,
-            example_incorrect TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (language_id) REFERENCES languages (id) ON DELETE CASCADE
-        );
-
-        CREATE TABLE IF NOT EXISTS translation_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            source_language TEXT,
-            target_language TEXT,
-            source_text TEXT,
-            translated_text TEXT,
-            grammar_score REAL,
-            ai_provider TEXT DEFAULT 'gemini',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-    )
-    conn.commit()
-    conn.close()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
     logger.info("Database initialized successfully")
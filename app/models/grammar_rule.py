@@ -1,38 +1,91 @@
 from app.models.database import get_db
+from app.services.change_tracker import change_tracker
+from app.services.language_registry import language_registry
 from app.utils.logger import logger
+from app.utils.metrics import instrument_queries
+from app.utils.search import highlight
 
 
+@instrument_queries
 class GrammarRule:
     """Data-access layer for the grammar_rules table."""
 
     @staticmethod
-    def get_all():
+    def get_page(limit: int, after: int = None):
+        """Return up to *limit* grammar rules with id greater than *after*, ordered by id."""
         conn = get_db()
-        rows = conn.execute(
-            """
-            SELECT g.*, l.name AS language_name, l.code AS language_code
-            FROM grammar_rules g
-            JOIN languages l ON g.language_id = l.id
-            ORDER BY g.id
-            """
-        ).fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+        try:
+            rows = conn.execute(
+                """
+                SELECT g.*
+                FROM grammar_rules g
+                WHERE g.id > ?
+                ORDER BY g.id
+                LIMIT ?
+                """,
+                (after or 0, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return language_registry.annotate([dict(r) for r in rows], "language")
+
+    @staticmethod
+    def search(match: str, limit: int, offset: int = 0, language_id: int = None):
+        """Full-text search over rule names and descriptions, best matches first.
+
+        *match* is an FTS5 query. Each row carries rule_name_snippet and
+        description_snippet (HTML-escaped, with matches wrapped in <mark> tags)
+        and its bm25 rank.
+        """
+        filters, params = "", [match]
+        if language_id:
+            filters = " AND g.language_id = ?"
+            params.append(language_id)
+        conn = get_db()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT g.*,
+                       snippet(grammar_rules_fts, 0, char(2), char(3), '…', 12) AS rule_name_snippet,
+                       snippet(grammar_rules_fts, 1, char(2), char(3), '…', 12) AS description_snippet,
+                       bm25(grammar_rules_fts) AS rank
+                FROM grammar_rules_fts
+                JOIN grammar_rules g ON g.id = grammar_rules_fts.rowid
+                WHERE grammar_rules_fts MATCH ?{filters}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset),
+            ).fetchall()
+        finally:
+            conn.close()
+        rows = highlight([dict(r) for r in rows], "rule_name_snippet", "description_snippet")
+        return language_registry.annotate(rows, "language")
+
+    @staticmethod
+    def count() -> int:
+        conn = get_db()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM grammar_rules").fetchone()[0]
+        finally:
+            conn.close()
+        return total
 
     @staticmethod
     def get_by_id(rule_id: int):
         conn = get_db()
-        row = conn.execute(
-            """
-            SELECT g.*, l.name AS language_name, l.code AS language_code
-            FROM grammar_rules g
-            JOIN languages l ON g.language_id = l.id
-            WHERE g.id = ?
-            """,
-            (rule_id,),
-        ).fetchone()
-        conn.close()
-        return dict(row) if row else None
+        try:
+            row = conn.execute(
+                """
+                SELECT g.*
+                FROM grammar_rules g
+                WHERE g.id = ?
+                """,
+                (rule_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return language_registry.annotate([dict(row)], "language")[0] if row else None
 
     @staticmethod
     def create(language_id: int, rule_name: str, description: str, example_correct: str = None, example_incorrect: str = None):
@@ -47,10 +100,32 @@ class GrammarRule:
             conn.commit()
             rid = cursor.lastrowid
             logger.info("Created grammar rule id=%s name=%s", rid, rule_name)
+            change_tracker.invalidate()
         finally:
             conn.close()
         return GrammarRule.get_by_id(rid)
 
+    @staticmethod
+    def create_many(rows: list) -> int:
+        """Insert many (language_id, rule_name, description, example_correct,
+        example_incorrect) tuples in a single transaction."""
+        if not rows:
+            return 0
+        conn = get_db()
+        try:
+            with conn:
+                conn.executemany(
+                    """INSERT INTO grammar_rules 
+                       (language_id, rule_name, description, example_correct, example_incorrect)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    rows,
+                )
+            logger.info("Bulk-created %d grammar rules", len(rows))
+            change_tracker.invalidate()
+        finally:
+            conn.close()
+        return len(rows)
+
     @staticmethod
     def update(rule_id: int, language_id: int, rule_name: str, description: str, example_correct: str = None, example_incorrect: str = None):
         conn = get_db()
@@ -64,6 +139,7 @@ class GrammarRule:
             )
             conn.commit()
             logger.info("Updated grammar rule id=%s", rule_id)
+            change_tracker.invalidate()
         finally:
             conn.close()
         return GrammarRule.get_by_id(rule_id)
@@ -77,6 +153,7 @@ class GrammarRule:
             deleted = cursor.rowcount > 0
             if deleted:
                 logger.info("Deleted grammar rule id=%s", rule_id)
+                change_tracker.invalidate()
         finally:
             conn.close()
         return deleted
@@ -1,20 +1,75 @@
 from app.models.database import get_db
 from app.utils.logger import logger
+from app.utils.metrics import instrument_queries
 
 
+@instrument_queries
 class History:
     """Data-access layer for the translation_history table."""
 
     @staticmethod
-    def get_all(limit: int = 50):
+    def get_page(limit: int, after: tuple = None):
+        """Return up to *limit* records, newest first, that sort after the
+        (created_at, id) cursor *after*."""
         conn = get_db()
-        rows = conn.execute(
-            "SELECT * FROM translation_history ORDER BY created_at DESC LIMIT ?",
-            (limit,),
-        ).fetchall()
-        conn.close()
+        try:
+            if after:
+                rows = conn.execute(
+                    """SELECT * FROM translation_history
+                       WHERE (created_at, id) < (?, ?)
+                       ORDER BY created_at DESC, id DESC LIMIT ?""",
+                    (after[0], after[1], limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM translation_history ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+        finally:
+            conn.close()
         return [dict(r) for r in rows]
 
+    @staticmethod
+    def iter_all(batch_size: int = 500):
+        """Yield every history record, oldest first, streaming from the cursor."""
+        conn = get_db()
+        try:
+            cursor = conn.execute("SELECT * FROM translation_history ORDER BY created_at, id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for r in rows:
+                    yield dict(r)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def find_translation(source_text: str, source_language: str, target_language: str):
+        """Return the latest recorded translation of exactly *source_text*
+        between the two languages (matched case-insensitively), or None."""
+        conn = get_db()
+        try:
+            row = conn.execute(
+                """SELECT * FROM translation_history
+                   WHERE source_text = ? AND lower(source_language) = lower(?)
+                     AND lower(target_language) = lower(?) AND translated_text != ''
+                   ORDER BY id DESC LIMIT 1""",
+                (source_text, source_language, target_language),
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    @staticmethod
+    def count() -> int:
+        conn = get_db()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM translation_history").fetchone()[0]
+        finally:
+            conn.close()
+        return total
+
     @staticmethod
     def create(
         session_id: str,
@@ -38,3 +93,39 @@ class History:
             logger.info("Saved history record id=%s", cursor.lastrowid)
         finally:
             conn.close()
+
+    @staticmethod
+    def create_many(records: list, db_path: str = None):
+        """Insert many history records in a single transaction.
+
+        Each record is a dict with the same keys as create()'s arguments.
+        *db_path* overrides the database file (the write-behind worker writes to
+        the one it was started for).
+        """
+        if not records:
+            return
+        rows = [
+            (
+                r.get("session_id"),
+                r.get("source_language"),
+                r.get("target_language"),
+                r.get("source_text"),
+                r.get("translated_text"),
+                r.get("grammar_score"),
+                r.get("ai_provider", "gemini"),
+            )
+            for r in records
+        ]
+        conn = get_db(db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    """INSERT INTO translation_history 
+                       (session_id, source_language, target_language, 
+                        source_text, translated_text, grammar_score, ai_provider)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    rows,
+                )
+            logger.info("Saved %d history records", len(rows))
+        finally:
+            conn.close()
@@ -1,22 +1,62 @@
 from app.models.database import get_db
+from app.services.change_tracker import change_tracker
+from app.services.language_detector import language_detector
+from app.services.translation_memory import translation_memory
 from app.utils.logger import logger
+from app.utils.metrics import instrument_queries
 
 
+@instrument_queries
 class Language:
     """Data-access layer for the languages table."""
 
     @staticmethod
-    def get_all():
+    def get_page(limit: int, after: int = None):
+        """Return up to *limit* languages with id greater than *after*, ordered by id."""
         conn = get_db()
-        rows = conn.execute("SELECT * FROM languages ORDER BY id").fetchall()
-        conn.close()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM languages WHERE id > ? ORDER BY id LIMIT ?",
+                (after or 0, limit),
+            ).fetchall()
+        finally:
+            conn.close()
         return [dict(r) for r in rows]
 
+    @staticmethod
+    def get_lookup() -> dict:
+        """Return every language indexed by id and by lower-cased name / code.
+
+        Used to resolve many language references with a single query.
+        """
+        conn = get_db()
+        try:
+            rows = conn.execute("SELECT * FROM languages").fetchall()
+        finally:
+            conn.close()
+        by_id = {r["id"]: dict(r) for r in rows}
+        by_key = {}
+        for r in rows:
+            by_key[r["name"].lower()] = r["id"]
+            by_key[r["code"].lower()] = r["id"]
+        return {"by_id": by_id, "by_key": by_key}
+
+    @staticmethod
+    def count() -> int:
+        conn = get_db()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM languages").fetchone()[0]
+        finally:
+            conn.close()
+        return total
+
     @staticmethod
     def get_by_id(language_id: int):
         conn = get_db()
-        row = conn.execute("SELECT * FROM languages WHERE id = ?", (language_id,)).fetchone()
-        conn.close()
+        try:
+            row = conn.execute("SELECT * FROM languages WHERE id = ?", (language_id,)).fetchone()
+        finally:
+            conn.close()
         return dict(row) if row else None
 
     @staticmethod
@@ -30,10 +70,30 @@ class Language:
             conn.commit()
             language_id = cursor.lastrowid
             logger.info("Created language id=%s name=%s", language_id, name)
+            translation_memory.invalidate()
+            language_detector.invalidate()
+            change_tracker.invalidate()
         finally:
             conn.close()
         return Language.get_by_id(language_id)
 
+    @staticmethod
+    def create_many(rows: list) -> int:
+        """Insert many (name, code) tuples in a single transaction."""
+        if not rows:
+            return 0
+        conn = get_db()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO languages (name, code) VALUES (?, ?)", rows)
+            logger.info("Bulk-created %d languages", len(rows))
+            translation_memory.invalidate()
+            language_detector.invalidate()
+            change_tracker.invalidate()
+        finally:
+            conn.close()
+        return len(rows)
+
     @staticmethod
     def update(language_id: int, name: str, code: str):
         conn = get_db()
@@ -44,6 +104,9 @@ class Language:
             )
             conn.commit()
             logger.info("Updated language id=%s", language_id)
+            translation_memory.invalidate()
+            language_detector.invalidate()
+            change_tracker.invalidate()
         finally:
             conn.close()
         return Language.get_by_id(language_id)
@@ -57,6 +120,9 @@ class Language:
             deleted = cursor.rowcount > 0
             if deleted:
                 logger.info("Deleted language id=%s", language_id)
+                translation_memory.invalidate()
+                language_detector.invalidate()
+                change_tracker.invalidate()
         finally:
             conn.close()
         return deleted
@@ -0,0 +1,190 @@
+from app.utils.logger import logger
+
+# Ordered (version, description, SQL script) steps. The database records the
+# last applied version in PRAGMA user_version; never edit a released step,
+# append a new one instead.
+MIGRATIONS = [
+    (
+        1,
+        "initial schema",
+        """
+        CREATE TABLE IF NOT EXISTS languages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            code TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS translations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_language_id INTEGER NOT NULL,
+            target_language_id INTEGER NOT NULL,
+            source_text TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (source_language_id) REFERENCES languages (id) ON DELETE CASCADE,
+            FOREIGN KEY (target_language_id) REFERENCES languages (id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS grammar_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            language_id INTEGER NOT NULL,
+            rule_name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            example_correct TEXT,
+            example_incorrect TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (language_id) REFERENCES languages (id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS translation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            source_language TEXT,
+            target_language TEXT,
+            source_text TEXT,
+            translated_text TEXT,
+            grammar_score REAL,
+            ai_provider TEXT DEFAULT 'gemini',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ),
+    (
+        2,
+        "query-supporting indexes",
+        """
+        CREATE INDEX IF NOT EXISTS idx_translations_language_pair
+            ON translations (source_language_id, target_language_id);
+        CREATE INDEX IF NOT EXISTS idx_grammar_rules_language
+            ON grammar_rules (language_id);
+        CREATE INDEX IF NOT EXISTS idx_history_created_at
+            ON translation_history (created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_history_session
+            ON translation_history (session_id);
+        """,
+    ),
+    (
+        3,
+        "full-text search over translations and grammar rules",
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS translations_fts USING fts5(
+            source_text, translated_text,
+            content='translations', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS translations_fts_ai AFTER INSERT ON translations BEGIN
+            INSERT INTO translations_fts (rowid, source_text, translated_text)
+            VALUES (new.id, new.source_text, new.translated_text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS translations_fts_ad AFTER DELETE ON translations BEGIN
+            INSERT INTO translations_fts (translations_fts, rowid, source_text, translated_text)
+            VALUES ('delete', old.id, old.source_text, old.translated_text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS translations_fts_au AFTER UPDATE OF source_text, translated_text ON translations BEGIN
+            INSERT INTO translations_fts (translations_fts, rowid, source_text, translated_text)
+            VALUES ('delete', old.id, old.source_text, old.translated_text);
+            INSERT INTO translations_fts (rowid, source_text, translated_text)
+            VALUES (new.id, new.source_text, new.translated_text);
+        END;
+        INSERT INTO translations_fts (translations_fts) VALUES ('rebuild');
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS grammar_rules_fts USING fts5(
+            rule_name, description,
+            content='grammar_rules', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_fts_ai AFTER INSERT ON grammar_rules BEGIN
+            INSERT INTO grammar_rules_fts (rowid, rule_name, description)
+            VALUES (new.id, new.rule_name, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_fts_ad AFTER DELETE ON grammar_rules BEGIN
+            INSERT INTO grammar_rules_fts (grammar_rules_fts, rowid, rule_name, description)
+            VALUES ('delete', old.id, old.rule_name, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_fts_au AFTER UPDATE OF rule_name, description ON grammar_rules BEGIN
+            INSERT INTO grammar_rules_fts (grammar_rules_fts, rowid, rule_name, description)
+            VALUES ('delete', old.id, old.rule_name, old.description);
+            INSERT INTO grammar_rules_fts (rowid, rule_name, description)
+            VALUES (new.id, new.rule_name, new.description);
+        END;
+        INSERT INTO grammar_rules_fts (grammar_rules_fts) VALUES ('rebuild');
+        """,
+    ),
+    (
+        4,
+        "history lookup by source text",
+        """
+        CREATE INDEX IF NOT EXISTS idx_history_source_text
+            ON translation_history (source_text);
+        """,
+    ),
+    (
+        5,
+        "change counters for cache invalidation",
+        """
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO change_counters (name) VALUES ('languages'), ('translations'), ('grammar_rules');
+        CREATE TRIGGER IF NOT EXISTS languages_changes_ai AFTER INSERT ON languages BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'languages';
+        END;
+        CREATE TRIGGER IF NOT EXISTS languages_changes_au AFTER UPDATE ON languages BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'languages';
+        END;
+        CREATE TRIGGER IF NOT EXISTS languages_changes_ad AFTER DELETE ON languages BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'languages';
+        END;
+        CREATE TRIGGER IF NOT EXISTS translations_changes_ai AFTER INSERT ON translations BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'translations';
+        END;
+        CREATE TRIGGER IF NOT EXISTS translations_changes_au AFTER UPDATE ON translations BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'translations';
+        END;
+        CREATE TRIGGER IF NOT EXISTS translations_changes_ad AFTER DELETE ON translations BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'translations';
+        END;
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_changes_ai AFTER INSERT ON grammar_rules BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'grammar_rules';
+        END;
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_changes_au AFTER UPDATE ON grammar_rules BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'grammar_rules';
+        END;
+        CREATE TRIGGER IF NOT EXISTS grammar_rules_changes_ad AFTER DELETE ON grammar_rules BEGIN
+            UPDATE change_counters SET version = version + 1 WHERE name = 'grammar_rules';
+        END;
+        """,
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn) -> int:
+    """Apply every migration newer than the database's user_version.
+
+    Each step runs in its own transaction together with the version bump, so
+    a failed step leaves the database at the previous version. Returns the
+    number of steps applied; when the schema is current no DDL runs at all.
+    """
+    current = schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+    if not pending:
+        logger.info("Database schema is current (version %d)", current)
+        return 0
+
+    for version, description, script in pending:
+        logger.info("Applying migration %d: %s", version, description)
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+    return len(pending)
@@ -1,44 +1,128 @@
 from app.models.database import get_db
+from app.services.change_tracker import change_tracker
+from app.services.language_detector import language_detector
+from app.services.language_registry import language_registry
+from app.services.translation_memory import translation_memory
 from app.utils.logger import logger
+from app.utils.metrics import instrument_queries
+from app.utils.search import highlight
 
+# Language names and codes come from the registry rather than joins.
+_LANGUAGES = ("source_language", "target_language")
 
+
+def _version(conn) -> int:
+    """The translations change version, read inside the writing transaction."""
+    return conn.execute("SELECT version FROM change_counters WHERE name = 'translations'").fetchone()[0]
+
+
+@instrument_queries
 class Translation:
     """Data-access layer for the translations table."""
 
     @staticmethod
-    def get_all():
+    def get_page(limit: int, after: int = None):
+        """Return up to *limit* translations with id greater than *after*, ordered by id."""
         conn = get_db()
-        rows = conn.execute(
-            """
-            SELECT t.*, 
-                   sl.name AS source_language_name, sl.code AS source_language_code,
-                   tl.name AS target_language_name, tl.code AS target_language_code
-            FROM translations t
-            JOIN languages sl ON t.source_language_id = sl.id
-            JOIN languages tl ON t.target_language_id = tl.id
-            ORDER BY t.id
-            """
-        ).fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+        try:
+            rows = conn.execute(
+                """
+                SELECT t.*
+                FROM translations t
+                WHERE t.id > ?
+                ORDER BY t.id
+                LIMIT ?
+                """,
+                (after or 0, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return language_registry.annotate([dict(r) for r in rows], *_LANGUAGES)
+
+    @staticmethod
+    def iter_all(batch_size: int = 500):
+        """Yield every translation (with language names/codes) in id order.
+
+        Rows are streamed from the cursor in batches, so memory use does not
+        grow with the table size.
+        """
+        conn = get_db()
+        try:
+            cursor = conn.execute(
+                """
+                SELECT t.*
+                FROM translations t
+                ORDER BY t.id
+                """
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from language_registry.annotate([dict(r) for r in rows], *_LANGUAGES)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def search(match: str, limit: int, offset: int = 0, source_language_id: int = None, target_language_id: int = None):
+        """Full-text search over source and translated text, best matches first.
+
+        *match* is an FTS5 query. Each row carries source_snippet and
+        translated_snippet (HTML-escaped, with matches wrapped in <mark> tags)
+        and its bm25 rank.
+        """
+        filters, params = "", [match]
+        if source_language_id:
+            filters += " AND t.source_language_id = ?"
+            params.append(source_language_id)
+        if target_language_id:
+            filters += " AND t.target_language_id = ?"
+            params.append(target_language_id)
+        conn = get_db()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT t.*,
+                       snippet(translations_fts, 0, char(2), char(3), '…', 12) AS source_snippet,
+                       snippet(translations_fts, 1, char(2), char(3), '…', 12) AS translated_snippet,
+                       bm25(translations_fts) AS rank
+                FROM translations_fts
+                JOIN translations t ON t.id = translations_fts.rowid
+                WHERE translations_fts MATCH ?{filters}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset),
+            ).fetchall()
+        finally:
+            conn.close()
+        rows = highlight([dict(r) for r in rows], "source_snippet", "translated_snippet")
+        return language_registry.annotate(rows, *_LANGUAGES)
+
+    @staticmethod
+    def count() -> int:
+        conn = get_db()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        finally:
+            conn.close()
+        return total
 
     @staticmethod
     def get_by_id(translation_id: int):
         conn = get_db()
-        row = conn.execute(
-            """
-            SELECT t.*, 
-                   sl.name AS source_language_name, sl.code AS source_language_code,
-                   tl.name AS target_language_name, tl.code AS target_language_code
-            FROM translations t
-            JOIN languages sl ON t.source_language_id = sl.id
-            JOIN languages tl ON t.target_language_id = tl.id
-            WHERE t.id = ?
-            """,
-            (translation_id,),
-        ).fetchone()
-        conn.close()
-        return dict(row) if row else None
+        try:
+            row = conn.execute(
+                """
+                SELECT t.*
+                FROM translations t
+                WHERE t.id = ?
+                """,
+                (translation_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return language_registry.annotate([dict(row)], *_LANGUAGES)[0] if row else None
 
     @staticmethod
     def create(source_language_id: int, target_language_id: int, source_text: str, translated_text: str):
@@ -50,12 +134,40 @@ class Translation:
                    VALUES (?, ?, ?, ?)""",
                 (source_language_id, target_language_id, source_text, translated_text),
             )
+            version = _version(conn)
             conn.commit()
             tid = cursor.lastrowid
             logger.info("Created translation id=%s", tid)
+            change_tracker.invalidate()
+        finally:
+            conn.close()
+        translation = Translation.get_by_id(tid)
+        translation_memory.add(translation, version)
+        language_detector.invalidate()
+        return translation
+
+    @staticmethod
+    def create_many(rows: list) -> int:
+        """Insert many (source_language_id, target_language_id, source_text,
+        translated_text) tuples in a single transaction."""
+        if not rows:
+            return 0
+        conn = get_db()
+        try:
+            with conn:
+                conn.executemany(
+                    """INSERT INTO translations 
+                       (source_language_id, target_language_id, source_text, translated_text)
+                       VALUES (?, ?, ?, ?)""",
+                    rows,
+                )
+            logger.info("Bulk-created %d translations", len(rows))
+            translation_memory.invalidate()
+            language_detector.invalidate()
+            change_tracker.invalidate()
         finally:
             conn.close()
-        return Translation.get_by_id(tid)
+        return len(rows)
 
     @staticmethod
     def update(translation_id: int, source_language_id: int, target_language_id: int, source_text: str, translated_text: str):
@@ -68,21 +180,30 @@ class Translation:
                    WHERE id = ?""",
                 (source_language_id, target_language_id, source_text, translated_text, translation_id),
             )
+            version = _version(conn)
             conn.commit()
             logger.info("Updated translation id=%s", translation_id)
+            change_tracker.invalidate()
         finally:
             conn.close()
-        return Translation.get_by_id(translation_id)
+        translation = Translation.get_by_id(translation_id)
+        translation_memory.update(translation, version)
+        language_detector.invalidate()
+        return translation
 
     @staticmethod
     def delete(translation_id: int) -> bool:
         conn = get_db()
         try:
             cursor = conn.execute("DELETE FROM translations WHERE id = ?", (translation_id,))
+            version = _version(conn)
             conn.commit()
             deleted = cursor.rowcount > 0
             if deleted:
                 logger.info("Deleted translation id=%s", translation_id)
+                translation_memory.remove(translation_id, version)
+                language_detector.invalidate()
+                change_tracker.invalidate()
         finally:
             conn.close()
         return deleted
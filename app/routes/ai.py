@@ -1,17 +1,85 @@
+import json
+import math
 import uuid
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, Response, request, jsonify, abort, stream_with_context
+from werkzeug.exceptions import ServiceUnavailable
 from app.services.ai_service import ai_service
+from app.services.cache import result_cache
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.language_detector import language_detector
+from app.services.translation_memory import translation_memory
+from app.config import Config
 from app.models.history import History
+from app.services.history_writer import history_writer
+from app.utils.export import export_response
 from app.utils.logger import logger
+from app.utils.pagination import page_args, id_cursor, encode_cursor, decode_cursor, paginate
 
 ai_bp = Blueprint("ai", __name__)
 
 
+def _memory_result(match: dict, source_lang: str, target_lang: str) -> dict:
+    """Shape a translation-memory match like an AI translation result."""
+    return {
+        "translated_text": match["translated_text"],
+        "source_language": source_lang,
+        "target_language": target_lang,
+        "confidence": match["score"],
+        "notes": f"{match['match'].capitalize()} translation memory match",
+        "translation_memory": match,
+    }
+
+
+def _degraded_translation(text: str, source_lang: str, target_lang: str):
+    """Best locally stored translation to serve while Gemini is unavailable.
+
+    Tries the latest exact match in the translation history, then the
+    translation memory with the looser AI_DEGRADED_MIN_SIMILARITY threshold.
+    Returns a result flagged "degraded": true, or None.
+    """
+    record = History.find_translation(text, source_lang, target_lang)
+    if record:
+        return {
+            "translated_text": record["translated_text"],
+            "source_language": source_lang,
+            "target_language": target_lang,
+            "confidence": record["grammar_score"],
+            "notes": "Previously recorded translation (AI service unavailable)",
+            "degraded": True,
+        }
+    if Config.TM_ENABLED:
+        match = translation_memory.lookup(text, source_lang, target_lang, Config.AI_DEGRADED_MIN_SIMILARITY)
+        if match:
+            return {**_memory_result(match, source_lang, target_lang), "degraded": True}
+    return None
+
+
+def _unavailable(error: CircuitOpenError):
+    """Abort with 503 and a Retry-After hint while the AI circuit is open."""
+    logger.warning("AI request refused: %s", error)
+    raise ServiceUnavailable(description=str(error), retry_after=max(1, math.ceil(error.retry_after)))
+
+
+def _translate_one(text: str, source_lang: str, target_lang: str):
+    """Translate via the translation memory, falling back to the AI provider.
+
+    Returns (result, provider) where provider is recorded in the history.
+    """
+    if Config.TM_ENABLED:
+        match = translation_memory.lookup(text, source_lang, target_lang)
+        if match:
+            logger.info("Translation memory %s match (score=%s)", match["match"], match["score"])
+            return _memory_result(match, source_lang, target_lang), "translation_memory"
+    return ai_service.translate(text, source_lang, target_lang), ai_service.provider.name
+
+
 @ai_bp.route("/api/ai/translate", methods=["POST"])
 def ai_translate():
     """Translate text using AI (Gemini).
 
     Expects JSON: { "text": str, "source_language": str, "target_language": str }
+    or, for several targets at once, "target_languages": [str, ...] instead of
+    "target_language".
     """
     data = request.get_json()
     if not data:
@@ -21,28 +89,238 @@ def ai_translate():
     source_lang = data.get("source_language")
     target_lang = data.get("target_language")
 
+    if "target_languages" in data:
+        return _translate_multi(data, text, source_lang, data["target_languages"])
+
     if not all([text, source_lang, target_lang]):
         abort(400, description="Fields 'text', 'source_language', and 'target_language' are required")
+    if not isinstance(text, str):
+        abort(400, description="Field 'text' must be a string")
 
     try:
-        result = ai_service.translate(text, source_lang, target_lang)
+        result, provider = _translate_one(text, source_lang, target_lang)
 
-        # Save to history
-        History.create(
+        # Save to history (written in the background)
+        history_writer.record(
             session_id=data.get("session_id", str(uuid.uuid4())),
             source_language=source_lang,
             target_language=target_lang,
             source_text=text,
             translated_text=result.get("translated_text", ""),
             grammar_score=result.get("confidence"),
+            ai_provider=provider,
         )
 
         return jsonify({"status": "success", "data": result})
+    except CircuitOpenError as e:
+        result = _degraded_translation(text, source_lang, target_lang)
+        if result is None:
+            _unavailable(e)
+        return jsonify({"status": "success", "data": result})
     except Exception as e:
         logger.error("AI translation error: %s", e)
         abort(500, description=f"AI translation failed: {str(e)}")
 
 
+def _translate_multi(data: dict, text: str, source_lang: str, target_langs):
+    """Handle /api/ai/translate with a list of target languages."""
+    if not isinstance(target_langs, list) or not target_langs or not all(isinstance(t, str) and t for t in target_langs):
+        abort(400, description="Field 'target_languages' must be a non-empty list of language names")
+    if not all([text, source_lang]):
+        abort(400, description="Fields 'text', 'source_language', and 'target_languages' are required")
+    if not isinstance(text, str):
+        abort(400, description="Field 'text' must be a string")
+
+    target_langs = list(dict.fromkeys(target_langs))
+    results = {}
+    providers = {}
+    pending = []
+    for lang in target_langs:
+        match = translation_memory.lookup(text, source_lang, lang) if Config.TM_ENABLED else None
+        if match:
+            results[lang] = _memory_result(match, source_lang, lang)
+            providers[lang] = "translation_memory"
+        else:
+            pending.append(lang)
+
+    if pending:
+        try:
+            translated = ai_service.translate_multi(text, source_lang, pending)
+        except Exception as e:
+            logger.error("AI multi-target translation error: %s", e)
+            abort(500, description=f"AI translation failed: {str(e)}")
+        for lang in pending:
+            result = translated[lang]
+            if "error" in result and ai_service.breaker.is_open:
+                result = _degraded_translation(text, source_lang, lang) or result
+            results[lang] = result
+            if not result.get("degraded"):
+                providers[lang] = ai_service.provider.name
+
+    session_id = data.get("session_id", str(uuid.uuid4()))
+    history_writer.record_many([
+        {
+            "session_id": session_id,
+            "source_language": source_lang,
+            "target_language": lang,
+            "source_text": text,
+            "translated_text": result.get("translated_text", ""),
+            "grammar_score": result.get("confidence"),
+            "ai_provider": providers[lang],
+        }
+        for lang, result in results.items()
+        if lang in providers and "error" not in result
+    ])
+
+    translations = {lang: results[lang] for lang in target_langs}
+    failed = sum(1 for r in translations.values() if "error" in r)
+    body = {"translations": translations, "succeeded": len(translations) - failed, "failed": failed}
+    if any(r.get("degraded") for r in translations.values()):
+        body["degraded"] = True
+    return jsonify({"status": "success" if not failed else "partial", "data": body})
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events) -> Response:
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@ai_bp.route("/api/ai/translate/stream", methods=["POST"])
+def ai_translate_stream():
+    """Translate text using AI (Gemini), streaming the output as Server-Sent Events.
+
+    Expects the same JSON as /api/ai/translate (single target). Emits "delta"
+    events with partial model text, then one "result" event with the parsed
+    result, or an "error" event.
+    """
+    data = request.get_json()
+    if not data:
+        abort(400, description="Request body must be JSON")
+
+    text = data.get("text")
+    source_lang = data.get("source_language")
+    target_lang = data.get("target_language")
+
+    if not all([text, source_lang, target_lang]):
+        abort(400, description="Fields 'text', 'source_language', and 'target_language' are required")
+    if not isinstance(text, str):
+        abort(400, description="Field 'text' must be a string")
+
+    session_id = data.get("session_id", str(uuid.uuid4()))
+
+    def events():
+        try:
+            match = translation_memory.lookup(text, source_lang, target_lang) if Config.TM_ENABLED else None
+            if match:
+                result, provider = _memory_result(match, source_lang, target_lang), "translation_memory"
+            else:
+                provider = ai_service.provider.name
+                try:
+                    for kind, value in ai_service.translate_stream(text, source_lang, target_lang):
+                        if kind == "delta":
+                            yield _sse("delta", {"text": value})
+                        else:
+                            result = value
+                except CircuitOpenError:
+                    result, provider = _degraded_translation(text, source_lang, target_lang), None
+                    if result is None:
+                        raise
+
+            if provider:
+                history_writer.record(
+                    session_id=session_id,
+                    source_language=source_lang,
+                    target_language=target_lang,
+                    source_text=text,
+                    translated_text=result.get("translated_text", ""),
+                    grammar_score=result.get("confidence"),
+                    ai_provider=provider,
+                )
+            yield _sse("result", {"status": "success", "data": result})
+        except Exception as e:
+            logger.error("AI streaming translation error: %s", e)
+            yield _sse("error", {"error": "Internal server error", "message": f"AI translation failed: {str(e)}"})
+
+    return _sse_response(events())
+
+
+@ai_bp.route("/api/ai/translate/batch", methods=["POST"])
+def ai_translate_batch():
+    """Translate many texts for one language pair using AI (Gemini).
+
+    Expects JSON: { "texts": [str, ...], "source_language": str, "target_language": str }
+    Each result carries its input "index"; failed items carry an "error" instead.
+    """
+    data = request.get_json()
+    if not data:
+        abort(400, description="Request body must be JSON")
+
+    texts = data.get("texts")
+    source_lang = data.get("source_language")
+    target_lang = data.get("target_language")
+
+    if not isinstance(texts, list) or not texts or not all([source_lang, target_lang]):
+        abort(400, description="Fields 'texts' (non-empty list), 'source_language', and 'target_language' are required")
+    if len(texts) > Config.AI_BATCH_MAX_TEXTS:
+        abort(400, description=f"At most {Config.AI_BATCH_MAX_TEXTS} texts may be sent per batch")
+
+    results = [None] * len(texts)
+    providers = {}
+    pending = []
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i] = {"index": i, "error": "Text must be a non-empty string"}
+            continue
+        match = translation_memory.lookup(text, source_lang, target_lang) if Config.TM_ENABLED else None
+        if match:
+            results[i] = {"index": i, **_memory_result(match, source_lang, target_lang)}
+            providers[i] = "translation_memory"
+        else:
+            pending.append(i)
+
+    if pending:
+        try:
+            translated = ai_service.translate_batch([texts[i] for i in pending], source_lang, target_lang)
+        except Exception as e:
+            logger.error("AI batch translation error: %s", e)
+            abort(500, description=f"AI batch translation failed: {str(e)}")
+        for i, result in zip(pending, translated):
+            if "error" in result and ai_service.breaker.is_open:
+                result = _degraded_translation(texts[i], source_lang, target_lang) or result
+            results[i] = {**result, "index": i}
+            if not result.get("degraded"):
+                providers[i] = ai_service.provider.name
+
+    session_id = data.get("session_id", str(uuid.uuid4()))
+    history_writer.record_many([
+        {
+            "session_id": session_id,
+            "source_language": source_lang,
+            "target_language": target_lang,
+            "source_text": texts[i],
+            "translated_text": results[i].get("translated_text", ""),
+            "grammar_score": results[i].get("confidence"),
+            "ai_provider": providers[i],
+        }
+        for i in range(len(texts))
+        if i in providers and "error" not in results[i]
+    ])
+
+    failed = sum(1 for r in results if "error" in r)
+    body = {"results": results, "succeeded": len(results) - failed, "failed": failed}
+    if any(r.get("degraded") for r in results):
+        body["degraded"] = True
+    return jsonify({"status": "success" if not failed else "partial", "data": body})
+
+
 @ai_bp.route("/api/ai/grammar-check", methods=["POST"])
 def ai_grammar_check():
     """Check grammar using AI (Gemini).
@@ -62,16 +340,27 @@ def ai_grammar_check():
     try:
         result = ai_service.grammar_check(text, language)
         return jsonify({"status": "success", "data": result})
+    except CircuitOpenError as e:
+        _unavailable(e)
     except Exception as e:
         logger.error("AI grammar check error: %s", e)
         abort(500, description=f"AI grammar check failed: {str(e)}")
 
 
+def _summary_mode(data: dict) -> str:
+    mode = data.get("mode", "auto")
+    if mode not in ("auto", "single", "chunked"):
+        abort(400, description="Field 'mode' must be 'auto', 'single' or 'chunked'")
+    return mode
+
+
 @ai_bp.route("/api/ai/summarize", methods=["POST"])
 def ai_summarize():
     """Summarize text using AI (Gemini).
 
-    Expects JSON: { "text": str, "target_language": str (optional), "max_sentences": int (optional) }
+    Expects JSON: { "text": str, "target_language": str (optional), "max_sentences": int (optional),
+    "mode": "auto" | "single" | "chunked" (optional) }. Long texts are summarized chunk by
+    chunk and then combined ("chunked"); "auto" does so above AI_SUMMARY_SINGLE_MAX_TOKENS.
     """
     data = request.get_json()
     if not data:
@@ -83,20 +372,58 @@ def ai_summarize():
 
     target_language = data.get("target_language")
     max_sentences = data.get("max_sentences", 3)
+    mode = _summary_mode(data)
 
     try:
-        result = ai_service.summarize(text, target_language, max_sentences)
+        result = ai_service.summarize(text, target_language, max_sentences, mode)
         return jsonify({"status": "success", "data": result})
+    except CircuitOpenError as e:
+        _unavailable(e)
     except Exception as e:
         logger.error("AI summarize error: %s", e)
         abort(500, description=f"AI summarization failed: {str(e)}")
 
 
+@ai_bp.route("/api/ai/summarize/stream", methods=["POST"])
+def ai_summarize_stream():
+    """Summarize text using AI (Gemini), streaming the output as Server-Sent Events.
+
+    Expects the same JSON as /api/ai/summarize. Emits "delta" events with partial
+    model text, then one "result" event with the parsed result, or an "error" event.
+    """
+    data = request.get_json()
+    if not data:
+        abort(400, description="Request body must be JSON")
+
+    text = data.get("text")
+    if not text:
+        abort(400, description="Field 'text' is required")
+
+    target_language = data.get("target_language")
+    max_sentences = data.get("max_sentences", 3)
+    mode = _summary_mode(data)
+
+    def events():
+        try:
+            for kind, value in ai_service.summarize_stream(text, target_language, max_sentences, mode):
+                if kind == "delta":
+                    yield _sse("delta", {"text": value})
+                else:
+                    yield _sse("result", {"status": "success", "data": value})
+        except Exception as e:
+            logger.error("AI streaming summarize error: %s", e)
+            yield _sse("error", {"error": "Internal server error", "message": f"AI summarization failed: {str(e)}"})
+
+    return _sse_response(events())
+
+
 @ai_bp.route("/api/ai/language-detect", methods=["POST"])
 def ai_language_detect():
-    """Detect the language of text using AI (Gemini).
+    """Detect the language of text, locally when confident, else with AI (Gemini).
 
     Expects JSON: { "text": str }
+    The result's "engine" is "local" for the offline detector, else the
+    AI provider's name (see AI_PROVIDER).
     """
     data = request.get_json()
     if not data:
@@ -105,10 +432,20 @@ def ai_language_detect():
     text = data.get("text")
     if not text:
         abort(400, description="Field 'text' is required")
+    if not isinstance(text, str):
+        abort(400, description="Field 'text' must be a string")
+
+    guess = language_detector.detect(text) if Config.LANG_DETECT_LOCAL else None
+    if guess and guess["confidence"] >= Config.LANG_DETECT_MIN_CONFIDENCE:
+        return jsonify({"status": "success", "data": {**guess, "engine": "local"}})
 
     try:
         result = ai_service.detect_language(text)
-        return jsonify({"status": "success", "data": result})
+        return jsonify({"status": "success", "data": {**result, "engine": ai_service.provider.name}})
+    except CircuitOpenError as e:
+        if guess is None:
+            _unavailable(e)
+        return jsonify({"status": "success", "data": {**guess, "engine": "local", "degraded": True}})
     except Exception as e:
         logger.error("AI language detection error: %s", e)
         abort(500, description=f"AI language detection failed: {str(e)}")
@@ -116,7 +453,42 @@ def ai_language_detect():
 
 @ai_bp.route("/api/ai/history", methods=["GET"])
 def ai_history():
-    """Get recent AI translation history."""
-    limit = request.args.get("limit", 50, type=int)
-    history = History.get_all(limit=limit)
-    return jsonify({"history": history, "count": len(history)})
+    """Get AI translation history, newest first, one keyset page at a time.
+
+    Query params: limit (default 50), after (opaque created_at/id cursor),
+    total (include a COUNT(*) total).
+    """
+    limit, after, include_total = page_args(default_limit=50)
+    after = decode_cursor(after, 2)
+    if after:
+        after = (after[0], id_cursor(after[1]))
+    history, next_cursor = paginate(
+        lambda n: History.get_page(n, after),
+        limit,
+        lambda r: encode_cursor(r["created_at"], r["id"]),
+    )
+    body = {"history": history, "count": len(history), "next_cursor": next_cursor}
+    if include_total:
+        body["total"] = History.count()
+    return jsonify(body)
+
+
+@ai_bp.route("/api/ai/history/export", methods=["GET"])
+def ai_history_export():
+    """Stream the whole AI translation history as NDJSON or CSV (?format=, ?gzip=true)."""
+    fields = [
+        "id", "session_id", "source_language", "target_language", "source_text",
+        "translated_text", "grammar_score", "ai_provider", "created_at",
+    ]
+    return export_response(History.iter_all(), fields, "translation_history")
+
+
+@ai_bp.route("/api/ai/cache/stats", methods=["GET"])
+def ai_cache_stats():
+    """Get AI result cache and request-coalescing statistics."""
+    stats = result_cache.stats()
+    stats["coalescing"] = ai_service.inflight.stats()
+    stats["rate_limiter"] = ai_service.limiter.stats()
+    stats["circuit_breaker"] = ai_service.breaker.stats()
+    stats["provider"] = {"name": ai_service.provider.name, "model": ai_service.model_name}
+    return jsonify(stats)
@@ -1,16 +1,46 @@
 from flask import Blueprint, request, jsonify, abort
 from app.models.grammar_rule import GrammarRule
 from app.models.language import Language
+from app.services.language_registry import language_registry
+from app.utils.bulk import read_rows, text_field, resolve_language, finish_import
+from app.utils.http_cache import cached_response
 from app.utils.logger import logger
+from app.utils.pagination import page_args, id_cursor, paginate
+from app.utils.search import search_args, search_page
 
 grammar_rules_bp = Blueprint("grammar_rules", __name__)
 
 
 @grammar_rules_bp.route("/api/grammar-rules", methods=["GET"])
+@cached_response("grammar_rules", "languages")
 def get_grammar_rules():
-    """List all grammar rules."""
-    rules = GrammarRule.get_all()
-    return jsonify({"grammar_rules": rules, "count": len(rules)})
+    """List grammar rules, one keyset page at a time.
+
+    Query params: limit, after (id cursor), total (include a COUNT(*) total).
+    """
+    limit, after, include_total = page_args()
+    after = id_cursor(after)
+    rules, next_cursor = paginate(lambda n: GrammarRule.get_page(n, after), limit, lambda r: r["id"])
+    body = {"grammar_rules": rules, "count": len(rules), "next_cursor": next_cursor}
+    if include_total:
+        body["total"] = GrammarRule.count()
+    return jsonify(body)
+
+
+@grammar_rules_bp.route("/api/grammar-rules/search", methods=["GET"])
+def search_grammar_rules():
+    """Full-text search over grammar rules, ranked by relevance.
+
+    Query params: q (required), language_id, limit, offset.
+    """
+    match, limit, offset = search_args()
+    language_id = request.args.get("language_id", type=int)
+    results, next_offset = search_page(
+        lambda n, o: GrammarRule.search(match, n, o, language_id),
+        limit,
+        offset,
+    )
+    return jsonify({"results": results, "count": len(results), "next_offset": next_offset})
 
 
 @grammar_rules_bp.route("/api/grammar-rules/<int:rule_id>", methods=["GET"])
@@ -36,7 +66,7 @@ def create_grammar_rule():
     if not all([language_id, rule_name, description]):
         abort(400, description="Fields 'language_id', 'rule_name', and 'description' are required")
 
-    if not Language.get_by_id(language_id):
+    if not language_registry.get(language_id):
         abort(404, description=f"Language with id {language_id} not found")
 
     try:
@@ -53,6 +83,40 @@ def create_grammar_rule():
         raise
 
 
+@grammar_rules_bp.route("/api/grammar-rules/bulk", methods=["POST"])
+def bulk_create_grammar_rules():
+    """Create many grammar rules in one transaction.
+
+    Body: JSON array, JSON Lines or CSV (or a multipart "file" upload) of rows
+    with "rule_name", "description", optional examples, and the language as
+    "language_id" or as a "language" code or name. Invalid rows are reported
+    individually; pass ?atomic=true to insert nothing when any row is invalid.
+    """
+    rows, errors = read_rows()
+    total = len(rows) + len(errors)
+    lookup = Language.get_lookup()
+
+    valid = []
+    for n, row in rows:
+        rule_name, description = text_field(row, "rule_name"), text_field(row, "description")
+        try:
+            language_id = resolve_language(row, "language_id", "language", lookup)
+            if not rule_name or not description:
+                raise ValueError("Fields 'rule_name' and 'description' are required")
+        except ValueError as e:
+            errors.append({"row": n, "error": str(e)})
+            continue
+        valid.append((n, (
+            language_id,
+            rule_name,
+            description,
+            text_field(row, "example_correct"),
+            text_field(row, "example_incorrect"),
+        )))
+
+    return finish_import(valid, errors, total, GrammarRule.create_many)
+
+
 @grammar_rules_bp.route("/api/grammar-rules/<int:rule_id>", methods=["PUT"])
 def update_grammar_rule(rule_id):
     """Update an existing grammar rule."""
@@ -1,15 +1,27 @@
 from flask import Blueprint, request, jsonify, abort
 from app.models.language import Language
+from app.utils.bulk import read_rows, text_field, finish_import
+from app.utils.http_cache import cached_response
 from app.utils.logger import logger
+from app.utils.pagination import page_args, id_cursor, paginate
 
 languages_bp = Blueprint("languages", __name__)
 
 
 @languages_bp.route("/api/languages", methods=["GET"])
+@cached_response("languages")
 def get_languages():
-    """List all languages."""
-    languages = Language.get_all()
-    return jsonify({"languages": languages, "count": len(languages)})
+    """List languages, one keyset page at a time.
+
+    Query params: limit, after (id cursor), total (include a COUNT(*) total).
+    """
+    limit, after, include_total = page_args()
+    after = id_cursor(after)
+    languages, next_cursor = paginate(lambda n: Language.get_page(n, after), limit, lambda r: r["id"])
+    body = {"languages": languages, "count": len(languages), "next_cursor": next_cursor}
+    if include_total:
+        body["total"] = Language.count()
+    return jsonify(body)
 
 
 @languages_bp.route("/api/languages/<int:language_id>", methods=["GET"])
@@ -44,6 +56,35 @@ def create_language():
         raise
 
 
+@languages_bp.route("/api/languages/bulk", methods=["POST"])
+def bulk_create_languages():
+    """Create many languages in one transaction.
+
+    Body: JSON array, JSON Lines or CSV (or a multipart "file" upload) of rows
+    with "name" and "code". Invalid rows are reported individually; pass
+    ?atomic=true to insert nothing when any row is invalid.
+    """
+    rows, errors = read_rows()
+    total = len(rows) + len(errors)
+    lookup = Language.get_lookup()
+    names = {lang["name"].lower() for lang in lookup["by_id"].values()}
+    codes = {lang["code"].lower() for lang in lookup["by_id"].values()}
+
+    valid = []
+    for n, row in rows:
+        name, code = text_field(row, "name"), text_field(row, "code")
+        if not name or not code:
+            errors.append({"row": n, "error": "Both 'name' and 'code' are required"})
+        elif name.lower() in names or code.lower() in codes:
+            errors.append({"row": n, "error": "Language with this name or code already exists"})
+        else:
+            names.add(name.lower())
+            codes.add(code.lower())
+            valid.append((n, (name, code)))
+
+    return finish_import(valid, errors, total, Language.create_many)
+
+
 @languages_bp.route("/api/languages/<int:language_id>", methods=["PUT"])
 def update_language(language_id):
     """Update an existing language."""
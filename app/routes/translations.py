@@ -1,16 +1,60 @@
 from flask import Blueprint, request, jsonify, abort
 from app.models.translation import Translation
 from app.models.language import Language
+from app.services.language_registry import language_registry
+from app.utils.bulk import read_rows, text_field, resolve_language, finish_import
+from app.utils.export import export_response
+from app.utils.http_cache import cached_response
 from app.utils.logger import logger
+from app.utils.pagination import page_args, id_cursor, paginate
+from app.utils.search import search_args, search_page
 
 translations_bp = Blueprint("translations", __name__)
 
 
 @translations_bp.route("/api/translations", methods=["GET"])
+@cached_response("translations", "languages")
 def get_translations():
-    """List all translations."""
-    translations = Translation.get_all()
-    return jsonify({"translations": translations, "count": len(translations)})
+    """List translations, one keyset page at a time.
+
+    Query params: limit, after (id cursor), total (include a COUNT(*) total).
+    """
+    limit, after, include_total = page_args()
+    after = id_cursor(after)
+    translations, next_cursor = paginate(lambda n: Translation.get_page(n, after), limit, lambda r: r["id"])
+    body = {"translations": translations, "count": len(translations), "next_cursor": next_cursor}
+    if include_total:
+        body["total"] = Translation.count()
+    return jsonify(body)
+
+
+@translations_bp.route("/api/translations/search", methods=["GET"])
+def search_translations():
+    """Full-text search over translations, ranked by relevance.
+
+    Query params: q (required), source_language_id, target_language_id,
+    limit, offset.
+    """
+    match, limit, offset = search_args()
+    source_language_id = request.args.get("source_language_id", type=int)
+    target_language_id = request.args.get("target_language_id", type=int)
+    results, next_offset = search_page(
+        lambda n, o: Translation.search(match, n, o, source_language_id, target_language_id),
+        limit,
+        offset,
+    )
+    return jsonify({"results": results, "count": len(results), "next_offset": next_offset})
+
+
+@translations_bp.route("/api/translations/export", methods=["GET"])
+def export_translations():
+    """Stream every translation as NDJSON or CSV (?format=, ?gzip=true)."""
+    fields = [
+        "id", "source_language_id", "source_language_code", "source_language_name",
+        "target_language_id", "target_language_code", "target_language_name",
+        "source_text", "translated_text", "created_at",
+    ]
+    return export_response(Translation.iter_all(), fields, "translations")
 
 
 @translations_bp.route("/api/translations/<int:translation_id>", methods=["GET"])
@@ -38,9 +82,9 @@ def create_translation():
         abort(400, description="Fields 'source_language_id', 'target_language_id', 'source_text', and 'translated_text' are required")
 
     # Validate language IDs exist
-    if not Language.get_by_id(source_language_id):
+    if not language_registry.get(source_language_id):
         abort(404, description=f"Source language with id {source_language_id} not found")
-    if not Language.get_by_id(target_language_id):
+    if not language_registry.get(target_language_id):
         abort(404, description=f"Target language with id {target_language_id} not found")
 
     try:
@@ -56,6 +100,36 @@ def create_translation():
         raise
 
 
+@translations_bp.route("/api/translations/bulk", methods=["POST"])
+def bulk_create_translations():
+    """Create many translations in one transaction.
+
+    Body: JSON array, JSON Lines or CSV (or a multipart "file" upload) of rows
+    with "source_text", "translated_text" and the languages given either as
+    "source_language_id"/"target_language_id" or as "source_language"/
+    "target_language" codes or names. Invalid rows are reported individually;
+    pass ?atomic=true to insert nothing when any row is invalid.
+    """
+    rows, errors = read_rows()
+    total = len(rows) + len(errors)
+    lookup = Language.get_lookup()
+
+    valid = []
+    for n, row in rows:
+        source_text, translated_text = text_field(row, "source_text"), text_field(row, "translated_text")
+        try:
+            source_id = resolve_language(row, "source_language_id", "source_language", lookup)
+            target_id = resolve_language(row, "target_language_id", "target_language", lookup)
+            if not source_text or not translated_text:
+                raise ValueError("Fields 'source_text' and 'translated_text' are required")
+        except ValueError as e:
+            errors.append({"row": n, "error": str(e)})
+            continue
+        valid.append((n, (source_id, target_id, source_text, translated_text)))
+
+    return finish_import(valid, errors, total, Translation.create_many)
+
+
 @translations_bp.route("/api/translations/<int:translation_id>", methods=["PUT"])
 def update_translation(translation_id):
     """Update an existing translation."""
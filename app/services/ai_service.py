@@ -1,54 +1,343 @@
+import asyncio
 import json
+import queue
+import re
 import time
-import google.generativeai as genai
 from app.config import Config
+from app.services.async_runner import AsyncRunner
+from app.services.cache import result_cache
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.providers import create_provider
+from app.services.rate_limiter import AdaptiveRateLimiter, RateLimitTimeout, is_rate_limited, retry_after
+from app.services.singleflight import SingleFlight
 from app.utils.logger import logger
+from app.utils.metrics import metrics
+from app.utils.timing import span
+
+# Bump whenever a prompt template changes so stale cached results are not reused.
+PROMPT_VERSION = "1"
+# Rough characters-per-token ratio used to budget summarization chunks.
+_CHARS_PER_TOKEN = 4
+# Reduce passes before the combined chunk summaries are used as they are.
+_MAX_REDUCE_LEVELS = 3
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+GEMINI_CALLS = metrics.counter(
+    "speaksmart_gemini_calls_total",
+    "Gemini API calls by task and outcome (success, rate_limited, error)",
+    ("task", "outcome"),
+)
+GEMINI_LATENCY = metrics.histogram(
+    "speaksmart_gemini_call_duration_seconds",
+    "Latency of individual Gemini API calls by task",
+    ("task",),
+)
+GEMINI_RETRIES = metrics.counter(
+    "speaksmart_gemini_retries_total",
+    "Gemini calls retried after a rate-limit response, by task",
+    ("task",),
+)
+GEMINI_ERRORS = metrics.counter(
+    "speaksmart_gemini_errors_total",
+    "Gemini requests that failed, by task and reason (circuit_open, queue_timeout, rate_limited, error)",
+    ("task", "reason"),
+)
 
 
 class AIService:
-    """Wrapper around Google Gemini for language-related AI tasks."""
+    """Language-related AI tasks on top of a text-generation provider.
+
+    The provider (Google Gemini unless AI_PROVIDER says otherwise) only turns
+    prompts into text; prompts, caching, rate limiting, retries, the circuit
+    breaker and parsing live here.
+    """
+
+    def __init__(self, provider=None):
+        # Cheap: providers defer SDK imports and clients to their first call.
+        self.provider = provider or create_provider()
+        self.cache = result_cache
+        self.inflight = SingleFlight()
+        self.runner = AsyncRunner()
+        self.limiter = AdaptiveRateLimiter()
+        self.breaker = CircuitBreaker("gemini")
+        self._semaphore = None
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
 
-    def __init__(self):
-        api_key = Config.GEMINI_API_KEY
-        if not api_key:
-            logger.warning("GEMINI_API_KEY is not set – AI endpoints will fail")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def warm_up(self):
+        """Do the one-off work of the first AI request now.
+
+        Loads the provider (importing the Gemini SDK) and starts the runner
+        loop, so a server can pay for it before taking traffic.
+        """
+        started = time.perf_counter()
+        self.provider.warm_up()
+        self.runner.loop
+        logger.info("AI service warmed up in %.0f ms", (time.perf_counter() - started) * 1000)
 
     # ── helpers ────────────────────────────────────────────────────────
 
-    def _generate(self, prompt: str) -> str:
+    def _generate(self, prompt: str, task: str = "generate") -> str:
         """Send a prompt to Gemini and return the raw text response.
 
-        Retries up to 3 times on rate-limit (429) errors with backoff.
+        Synchronous facade over _agenerate() for the blocking Flask routes.
+        *task* labels the call in metrics.
+        """
+        # Load the provider here rather than on the runner loop, where a
+        # first-call SDK import would stall every call in flight.
+        self.provider.warm_up()
+        with span("ai"):
+            return self.runner.run(self._agenerate(prompt, task))
+
+    def _generate_many(self, prompts: list, task: str = "generate") -> list:
+        """Send several prompts to Gemini concurrently.
+
+        Returns the raw text responses in order; a failed prompt yields its
+        exception in place of the text.
+        """
+        if not prompts:
+            return []
+        self.provider.warm_up()
+        with span("ai"):
+            return self.runner.run(self._agenerate_many(prompts, task))
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding concurrent Gemini calls (runner loop only)."""
+        limit = max(1, Config.AI_MAX_CONCURRENCY)
+        if self._semaphore is None or self._semaphore[0] != limit:
+            self._semaphore = (limit, asyncio.Semaphore(limit))
+        return self._semaphore[1]
+
+    async def _agenerate(self, prompt: str, task: str = "generate") -> str:
+        """Send a prompt to Gemini asynchronously and return the raw text response.
+
+        Raises CircuitOpenError without calling Gemini while the circuit
+        breaker is open. Successes and upstream failures are reported to the
+        breaker; local queue timeouts and client errors are not.
         """
         logger.debug("Gemini prompt (%d chars): %s…", len(prompt), prompt[:120])
+        try:
+            self.breaker.allow()
+            try:
+                text = await self._acall(prompt, task)
+            except Exception as e:
+                self._report_failure(e)
+                raise
+        except Exception as e:
+            GEMINI_ERRORS.inc(task=task, reason=_failure_reason(e))
+            raise
+        self.breaker.record_success()
+        text = text.strip()
+        logger.debug("Gemini response (%d chars)", len(text))
+        return text
+
+    async def _acall(self, prompt: str, task: str):
+        """Call Gemini once a rate-limit token is available, retrying on 429.
+
+        Every attempt first takes a token from the adaptive rate limiter and at
+        most AI_MAX_CONCURRENCY calls run at once per process. A rate-limited
+        (429) attempt slows the limiter down and is retried, up to
+        AI_MAX_ATTEMPTS attempts within AI_QUEUE_TIMEOUT seconds.
+        """
+        deadline = time.monotonic() + Config.AI_QUEUE_TIMEOUT
+        attempts = max(1, Config.AI_MAX_ATTEMPTS)
         last_error = None
-        for attempt in range(3):
+        for attempt in range(attempts):
+            if attempt:
+                GEMINI_RETRIES.inc(task=task)
+            try:
+                await self.limiter.acquire(deadline)
+            except RateLimitTimeout as e:
+                # Out of time while backing off from 429s: the upstream's fault.
+                if last_error is not None:
+                    raise e from last_error
+                raise
             try:
-                response = self.model.generate_content(prompt)
-                text = response.text.strip()
-                logger.debug("Gemini response (%d chars)", len(text))
-                return text
+                text = await self._call_model(prompt, task)
             except Exception as e:
+                if not is_rate_limited(e):
+                    raise
                 last_error = e
-                if "429" in str(e) or "quota" in str(e).lower():
-                    wait = (attempt + 1) * 10  # 10s, 20s, 30s
-                    logger.warning("Rate limited (attempt %d/3), retrying in %ds…", attempt + 1, wait)
-                    time.sleep(wait)
+                hint = retry_after(e)
+                self.limiter.throttled(hint)
+                logger.warning(
+                    "Rate limited (attempt %d/%d), retry hint %s",
+                    attempt + 1, attempts, f"{hint}s" if hint is not None else "none",
+                )
+                continue
+            self.limiter.succeeded()
+            return text
+        raise Exception(f"AI request failed after {attempts} attempts (rate limited). Please wait a minute and try again. Details: {last_error}")
+
+    async def _call_model(self, prompt: str, task: str):
+        """One Gemini call under the AI_MAX_CONCURRENCY limit, timed and counted per task."""
+        async with self._limit():
+            started = time.perf_counter()
+            try:
+                text = await self.provider.generate(prompt, task)
+            except Exception as e:
+                GEMINI_CALLS.inc(task=task, outcome="rate_limited" if is_rate_limited(e) else "error")
+                raise
+            finally:
+                GEMINI_LATENCY.observe(time.perf_counter() - started, task=task)
+        GEMINI_CALLS.inc(task=task, outcome="success")
+        return text
+
+    def _report_failure(self, error: Exception):
+        """Count *error* against the breaker only if it says the upstream is unavailable."""
+        if _is_upstream_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    async def _agenerate_many(self, prompts: list, task: str = "generate") -> list:
+        return await asyncio.gather(*(self._agenerate(p, task) for p in prompts), return_exceptions=True)
+
+    def _stream(self, prompt: str, task: str = "generate"):
+        """Yield text chunks from Gemini's streaming mode as they arrive.
+
+        The stream is consumed on the runner loop (counting against
+        AI_MAX_CONCURRENCY) and handed over through a queue; closing the
+        generator early cancels the upstream request.
+        """
+        self.provider.warm_up()
+        chunks = queue.Queue()
+
+        async def pump():
+            try:
+                async for text in self._astream(prompt, task):
+                    chunks.put(("chunk", text))
+                chunks.put(("done", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.runner.loop)
+        try:
+            while True:
+                kind, value = chunks.get()
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    raise value
                 else:
-                    raise
-        raise Exception(f"AI request failed after 3 retries (rate limited). Please wait a minute and try again. Details: {last_error}")
+                    return
+        finally:
+            future.cancel()
+
+    async def _astream(self, prompt: str, task: str = "generate"):
+        """Async generator over Gemini's streamed text chunks (rate limited, no retries).
+
+        Metrics time the call until the stream is established.
+        """
+        logger.debug("Gemini streaming prompt (%d chars): %s…", len(prompt), prompt[:120])
+        try:
+            self.breaker.allow()
+            try:
+                await self.limiter.acquire(time.monotonic() + Config.AI_QUEUE_TIMEOUT)
+            except Exception:
+                self.breaker.release()
+                raise
+        except Exception as e:
+            GEMINI_ERRORS.inc(task=task, reason=_failure_reason(e))
+            raise
+        async with self._limit():
+            started = time.perf_counter()
+            try:
+                chunks = await self.provider.stream(prompt, task)
+            except Exception as e:
+                limited = is_rate_limited(e)
+                if limited:
+                    self.limiter.throttled(retry_after(e))
+                self._report_failure(e)
+                GEMINI_CALLS.inc(task=task, outcome="rate_limited" if limited else "error")
+                GEMINI_ERRORS.inc(task=task, reason=_failure_reason(e))
+                raise
+            finally:
+                GEMINI_LATENCY.observe(time.perf_counter() - started, task=task)
+            GEMINI_CALLS.inc(task=task, outcome="success")
+            self.limiter.succeeded()
+            self.breaker.record_success()
+            async for text in chunks:
+                if text:
+                    yield text
 
     def _parse_json(self, raw: str) -> dict:
         """Try to extract a JSON object from the model output."""
-        # Gemini sometimes wraps JSON in ```json ... ```
-        cleaned = raw
-        if "```json" in cleaned:
-            cleaned = cleaned.split("```json")[-1]
-        if "```" in cleaned:
-            cleaned = cleaned.split("```")[0]
-        return json.loads(cleaned.strip())
+        with span("parse"):
+            # Gemini sometimes wraps JSON in ```json ... ```
+            cleaned = raw
+            if "```json" in cleaned:
+                cleaned = cleaned.split("```json")[-1]
+            if "```" in cleaned:
+                cleaned = cleaned.split("```")[0]
+            return json.loads(cleaned.strip())
+
+    def _key(self, task: str, text: str, params: dict = None) -> str:
+        return self.cache.make_key(task, text, params, self.model_name, PROMPT_VERSION)
+
+    def _translate_key(self, text: str, source_lang: str, target_lang: str) -> str:
+        params = {"source_language": source_lang.lower(), "target_language": target_lang.lower()}
+        return self._key("translate", text, params)
+
+    def _complete(self, task: str, key: str, prompt: str, fallback) -> dict:
+        """Run *prompt* through the result cache and Gemini, parsing the JSON reply.
+
+        Identical concurrent requests are coalesced so only one Gemini call runs.
+        *fallback* builds a result from the raw text when the reply is not valid
+        JSON; such results are returned but never cached.
+        """
+        if Config.AI_CACHE_ENABLED:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug("AI cache hit for %s", task)
+                return cached
+
+        def call():
+            if Config.AI_CACHE_ENABLED:
+                # A caller that finished just before us may have filled the cache.
+                cached = self.cache.peek(key)
+                if cached is not None:
+                    return cached
+            raw = self._generate(prompt, task)
+            try:
+                result = self._parse_json(raw)
+            except json.JSONDecodeError:
+                return fallback(raw)
+            if Config.AI_CACHE_ENABLED:
+                self.cache.set(key, task, result)
+            return result
+
+        return self.inflight.do(key, call)
+
+    def _complete_stream(self, task: str, key: str, prompt: str, fallback):
+        """Streaming counterpart of _complete().
+
+        Yields ("delta", text) events as Gemini produces output, then a single
+        ("result", dict) event with the parsed reply. A cached result is yielded
+        as the "result" event straight away.
+        """
+        if Config.AI_CACHE_ENABLED:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield "result", cached
+                return
+
+        parts = []
+        for text in self._stream(prompt, task):
+            parts.append(text)
+            yield "delta", text
+
+        raw = "".join(parts).strip()
+        try:
+            result = self._parse_json(raw)
+        except json.JSONDecodeError:
+            yield "result", fallback(raw)
+            return
+        if Config.AI_CACHE_ENABLED:
+            self.cache.set(key, task, result)
+        yield "result", result
 
     # ── public methods ─────────────────────────────────────────────────
 
@@ -57,6 +346,14 @@ class AIService:
 
         Returns dict with keys: translated_text, source_language, target_language, confidence
         """
+        return self._complete("translate", *self._translate_request(text, source_lang, target_lang))
+
+    def translate_stream(self, text: str, source_lang: str, target_lang: str):
+        """Streaming variant of translate(); see _complete_stream() for the events."""
+        return self._complete_stream("translate", *self._translate_request(text, source_lang, target_lang))
+
+    def _translate_request(self, text: str, source_lang: str, target_lang: str) -> tuple:
+        """Return (cache key, prompt, fallback) for a single translation."""
         prompt = f"""You are a professional language translator. 
 Translate the following text from {source_lang} to {target_lang}.
 Respond ONLY with a JSON object (no markdown fences) containing:
@@ -69,17 +366,164 @@ Respond ONLY with a JSON object (no markdown fences) containing:
 Text to translate:
 \"\"\"{text}\"\"\"
 """
-        raw = self._generate(prompt)
+        return self._translate_key(text, source_lang, target_lang), prompt, lambda raw: {
+            "translated_text": raw,
+            "source_language": source_lang,
+            "target_language": target_lang,
+            "confidence": None,
+            "notes": "Could not parse structured response",
+        }
+
+    def translate_batch(self, texts: list, source_lang: str, target_lang: str) -> list:
+        """Translate many *texts* from source_lang to target_lang.
+
+        Cached texts are answered directly; the rest are packed into prompts of
+        at most AI_BATCH_MAX_ITEMS texts / AI_BATCH_MAX_CHARS characters and the
+        structured reply is matched back to each input by index.
+
+        Returns one dict per input, in order, with keys: index, translated_text,
+        source_language, target_language, confidence, notes — or index, error.
+        """
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            key = self._translate_key(text, source_lang, target_lang)
+            cached = self.cache.get(key) if Config.AI_CACHE_ENABLED else None
+            if cached is not None:
+                results[i] = {"index": i, **cached}
+            else:
+                pending.append((i, text, key))
+
+        chunks = _pack_chunks(pending, Config.AI_BATCH_MAX_ITEMS, Config.AI_BATCH_MAX_CHARS)
+        prompts = [self._batch_prompt(chunk, source_lang, target_lang) for chunk in chunks]
+        for chunk, raw in zip(chunks, self._generate_many(prompts, "translate_batch")):
+            for i, result in self._batch_results(chunk, raw, source_lang, target_lang).items():
+                results[i] = result
+        return results
+
+    def translate_multi(self, text: str, source_lang: str, target_langs: list) -> dict:
+        """Translate one *text* from source_lang into each of *target_langs*.
+
+        Cached targets are answered directly; the rest are requested together,
+        at most AI_MULTI_MAX_TARGETS per prompt, so the source text is sent once
+        per chunk rather than once per language.
+
+        Returns a dict keyed by target language; each value has the same keys as
+        translate() or a single "error" key.
+        """
+        results = {}
+        pending = []
+        for lang in target_langs:
+            key = self._translate_key(text, source_lang, lang)
+            cached = self.cache.get(key) if Config.AI_CACHE_ENABLED else None
+            if cached is not None:
+                results[lang] = cached
+            else:
+                pending.append((lang, key))
+
+        size = max(1, Config.AI_MULTI_MAX_TARGETS)
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+        prompts = [self._targets_prompt(text, source_lang, chunk) for chunk in chunks]
+        for chunk, raw in zip(chunks, self._generate_many(prompts, "translate_multi")):
+            results.update(self._targets_results(chunk, raw, source_lang))
+        return {lang: results[lang] for lang in target_langs}
+
+    def _targets_prompt(self, text: str, source_lang: str, targets: list) -> str:
+        """Build the prompt translating *text* into one chunk of (target language, cache key) tuples."""
+        names = [lang for lang, _ in targets]
+        return f"""You are a professional language translator.
+Translate the following text from {source_lang} into each of these target languages: {json.dumps(names, ensure_ascii=False)}.
+Respond ONLY with a JSON object (no markdown fences) containing:
+- "translations": a list with one object per target language, each with
+  - "target_language": the target language exactly as listed above
+  - "translated_text": the translated text
+  - "confidence": a confidence score between 0.0 and 1.0
+  - "notes": any translation notes (brief, may be empty)
+
+Text to translate:
+\"\"\"{text}\"\"\"
+"""
+
+    def _targets_results(self, targets: list, raw, source_lang: str) -> dict:
+        """Map one multi-target reply (or the exception raised for it) back to its languages."""
+        names = [lang for lang, _ in targets]
         try:
-            return self._parse_json(raw)
-        except json.JSONDecodeError:
-            return {
-                "translated_text": raw,
+            if isinstance(raw, Exception):
+                raise raw
+            parsed = self._parse_json(raw)
+            entries = parsed.get("translations", []) if isinstance(parsed, dict) else parsed
+            by_lang = {
+                str(e.get("target_language", "")).strip().lower(): e
+                for e in entries
+                if isinstance(e, dict)
+            }
+        except Exception as e:
+            logger.error("Multi-target translation into %d languages failed: %s", len(targets), e)
+            return {lang: {"error": str(e)} for lang in names}
+
+        results = {}
+        for lang, key in targets:
+            entry = by_lang.get(lang.strip().lower())
+            if not entry or not isinstance(entry.get("translated_text"), str):
+                results[lang] = {"error": "No translation returned for this language"}
+                continue
+            result = {
+                "translated_text": entry["translated_text"],
+                "source_language": source_lang,
+                "target_language": lang,
+                "confidence": entry.get("confidence"),
+                "notes": entry.get("notes", ""),
+            }
+            if Config.AI_CACHE_ENABLED:
+                self.cache.set(key, "translate", result)
+            results[lang] = result
+        return results
+
+    def _batch_prompt(self, chunk: list, source_lang: str, target_lang: str) -> str:
+        """Build the prompt for one packed chunk of (index, text, cache key) tuples."""
+        items = [{"index": i, "text": text} for i, text, _ in chunk]
+        return f"""You are a professional language translator.
+Translate each item's "text" from {source_lang} to {target_lang}.
+Respond ONLY with a JSON object (no markdown fences) containing:
+- "translations": a list with one object per input item, each with
+  - "index": the item's index, unchanged
+  - "translated_text": the translated text
+  - "confidence": a confidence score between 0.0 and 1.0
+  - "notes": any translation notes (brief, may be empty)
+
+Items to translate (JSON):
+{json.dumps(items, ensure_ascii=False)}
+"""
+
+    def _batch_results(self, chunk: list, raw, source_lang: str, target_lang: str) -> dict:
+        """Map one batch reply (or the exception raised for it) back to its inputs by index."""
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            parsed = self._parse_json(raw)
+            entries = parsed.get("translations", []) if isinstance(parsed, dict) else parsed
+            by_index = {e.get("index"): e for e in entries if isinstance(e, dict)}
+        except Exception as e:
+            logger.error("Batch translation chunk of %d items failed: %s", len(chunk), e)
+            return {i: {"index": i, "error": str(e)} for i, _, _ in chunk}
+
+        results = {}
+        for i, _, key in chunk:
+            entry = by_index.get(i)
+            if not entry or not isinstance(entry.get("translated_text"), str):
+                results[i] = {"index": i, "error": "No translation returned for this item"}
+                continue
+            result = {
+                "translated_text": entry["translated_text"],
                 "source_language": source_lang,
                 "target_language": target_lang,
-                "confidence": None,
-                "notes": "Could not parse structured response",
+                "confidence": entry.get("confidence"),
+                "notes": entry.get("notes", ""),
             }
+            if Config.AI_CACHE_ENABLED:
+                self.cache.set(key, "translate", result)
+            results[i] = {"index": i, **result}
+        return results
 
     def grammar_check(self, text: str, language: str = "English") -> dict:
         """Check grammar of *text* and return corrections.
@@ -97,22 +541,47 @@ Respond ONLY with a JSON object (no markdown fences) containing:
 Text to analyze:
 \"\"\"{text}\"\"\"
 """
-        raw = self._generate(prompt)
-        try:
-            return self._parse_json(raw)
-        except json.JSONDecodeError:
-            return {
-                "corrected_text": raw,
-                "errors": [],
-                "score": None,
-                "suggestions": [],
-            }
+        key = self._key("grammar_check", text, {"language": language.lower()})
+        return self._complete("grammar_check", key, prompt, lambda raw: {
+            "corrected_text": raw,
+            "errors": [],
+            "score": None,
+            "suggestions": [],
+        })
 
-    def summarize(self, text: str, target_language: str = None, max_sentences: int = 3) -> dict:
+    def summarize(self, text: str, target_language: str = None, max_sentences: int = 3, mode: str = "auto") -> dict:
         """Summarize *text*, optionally in *target_language*.
 
+        *mode* is "single" (one prompt), "chunked" (map-reduce, see
+        _reduce_request()) or "auto", which chunks texts estimated above
+        AI_SUMMARY_SINGLE_MAX_TOKENS.
+
         Returns dict with keys: summary, language, sentence_count, key_points
+        (and chunks, the number of chunks summarized, in chunked mode)
         """
+        if self._chunked(text, mode):
+            chunks, request = self._reduce_request(text, target_language, max_sentences)
+            return {**self._complete("summarize", *request), "chunks": chunks}
+        return self._complete("summarize", *self._summarize_request(text, target_language, max_sentences))
+
+    def summarize_stream(self, text: str, target_language: str = None, max_sentences: int = 3, mode: str = "auto"):
+        """Streaming variant of summarize(); see _complete_stream() for the events.
+
+        In chunked mode the chunk summaries are produced first and only the
+        reduce pass is streamed.
+        """
+        if self._chunked(text, mode):
+            return self._complete_stream("summarize", *self._reduce_request(text, target_language, max_sentences)[1])
+        return self._complete_stream("summarize", *self._summarize_request(text, target_language, max_sentences))
+
+    @staticmethod
+    def _chunked(text: str, mode: str) -> bool:
+        if mode == "auto":
+            return _estimate_tokens(text) > Config.AI_SUMMARY_SINGLE_MAX_TOKENS
+        return mode == "chunked"
+
+    def _summarize_request(self, text: str, target_language: str, max_sentences: int) -> tuple:
+        """Return (cache key, prompt, fallback) for a summary."""
         lang_instruction = ""
         if target_language:
             lang_instruction = f"Provide the summary in {target_language}."
@@ -128,16 +597,102 @@ Respond ONLY with a JSON object (no markdown fences) containing:
 Text to summarize:
 \"\"\"{text}\"\"\"
 """
-        raw = self._generate(prompt)
-        try:
-            return self._parse_json(raw)
-        except json.JSONDecodeError:
-            return {
-                "summary": raw,
-                "language": target_language or "unknown",
-                "sentence_count": None,
-                "key_points": [],
-            }
+        params = {"target_language": (target_language or "").lower(), "max_sentences": max_sentences}
+        return self._key("summarize", text, params), prompt, lambda raw: {
+            "summary": raw,
+            "language": target_language or "unknown",
+            "sentence_count": None,
+            "key_points": [],
+        }
+
+    def _summarize_chunks(self, text: str) -> list:
+        """Map step: summarize each AI_SUMMARY_CHUNK_TOKENS chunk of *text* concurrently.
+
+        Chunk summaries are cached by chunk content alone, so re-summarizing an
+        edited document only sends the chunks that changed. Returns one
+        {"summary", "key_points"} dict per chunk, in order; raises the first
+        error if any chunk could not be summarized.
+        """
+        chunks = _split_for_summary(text, Config.AI_SUMMARY_CHUNK_TOKENS)
+        results = [None] * len(chunks)
+        pending = []
+        for i, chunk in enumerate(chunks):
+            key = self._key("summarize_chunk", chunk)
+            cached = self.cache.get(key) if Config.AI_CACHE_ENABLED else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, chunk, key))
+
+        logger.info("Summarizing %d chunks (%d cached)", len(chunks), len(chunks) - len(pending))
+        prompts = [self._chunk_prompt(chunk) for _, chunk, _ in pending]
+        for (i, _, key), raw in zip(pending, self._generate_many(prompts, "summarize_chunk")):
+            if isinstance(raw, Exception):
+                raise raw
+            try:
+                parsed = self._parse_json(raw)
+                result = {"summary": str(parsed["summary"]), "key_points": list(parsed.get("key_points") or [])}
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                results[i] = {"summary": raw, "key_points": []}
+                continue
+            if Config.AI_CACHE_ENABLED:
+                self.cache.set(key, "summarize_chunk", result)
+            results[i] = result
+        return results
+
+    def _chunk_prompt(self, chunk: str) -> str:
+        return f"""You are a text summarization expert.
+The text below is one section of a longer document. Summarize it in a few sentences,
+keeping names, numbers and conclusions.
+Respond ONLY with a JSON object (no markdown fences) containing:
+- "summary": the summary of this section, in the section's language
+- "key_points": a list of key points from this section
+
+Section to summarize:
+\"\"\"{chunk}\"\"\"
+"""
+
+    def _reduce_request(self, text: str, target_language: str, max_sentences: int) -> tuple:
+        """Map *text* to chunk summaries and return (chunk count, (cache key, prompt, fallback)) for the reduce pass.
+
+        When the chunk summaries together are still too long for one prompt
+        they are summarized again, up to _MAX_REDUCE_LEVELS times.
+        """
+        parts = self._summarize_chunks(text)
+        chunks = len(parts)
+        for _ in range(_MAX_REDUCE_LEVELS - 1):
+            combined = "\n\n".join(p["summary"] for p in parts)
+            if len(parts) == 1 or _estimate_tokens(combined) <= Config.AI_SUMMARY_SINGLE_MAX_TOKENS:
+                break
+            parts = self._summarize_chunks(combined)
+
+        lang_instruction = ""
+        if target_language:
+            lang_instruction = f"Provide the summary in {target_language}."
+        sections = json.dumps(parts, ensure_ascii=False)
+        prompt = f"""You are a text summarization expert.
+Below are summaries of consecutive sections of one document, in order.
+Combine them into a summary of the whole document in at most {max_sentences} sentences. {lang_instruction}
+Respond ONLY with a JSON object (no markdown fences) containing:
+- "summary": the summarized text
+- "language": the language of the summary
+- "sentence_count": number of sentences in the summary
+- "key_points": a list of the most important key points of the whole document
+
+Section summaries (in order, JSON):
+{sections}
+"""
+        params = {
+            "target_language": (target_language or "").lower(),
+            "max_sentences": max_sentences,
+            "mode": "reduce",
+        }
+        return chunks, (self._key("summarize", sections, params), prompt, lambda raw: {
+            "summary": raw,
+            "language": target_language or "unknown",
+            "sentence_count": None,
+            "key_points": [point for p in parts for point in p["key_points"]],
+        })
 
     def detect_language(self, text: str) -> dict:
         """Detect the language of *text*.
@@ -155,17 +710,96 @@ Respond ONLY with a JSON object (no markdown fences) containing:
 Text to analyze:
 \"\"\"{text}\"\"\"
 """
-        raw = self._generate(prompt)
-        try:
-            return self._parse_json(raw)
-        except json.JSONDecodeError:
-            return {
-                "detected_language": raw,
-                "language_code": None,
-                "confidence": None,
-                "alternatives": [],
-            }
+        return self._complete("detect_language", self._key("detect_language", text), prompt, lambda raw: {
+            "detected_language": raw,
+            "language_code": None,
+            "confidence": None,
+            "alternatives": [],
+        })
+
+
+def _pack_chunks(items: list, max_items: int, max_chars: int) -> list:
+    """Split (index, text, key) tuples into chunks bounded by count and total text size.
+
+    A single text longer than *max_chars* still gets a chunk of its own.
+    """
+    chunks, current, size = [], [], 0
+    for item in items:
+        length = len(item[1])
+        if current and (len(current) >= max_items or size + length > max_chars):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += length
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _failure_reason(error: Exception) -> str:
+    """Classify a failed Gemini request for the errors metric."""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, RateLimitTimeout):
+        return "queue_timeout"
+    if is_rate_limited(error):
+        return "rate_limited"
+    return "error"
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """True for errors that mean Gemini is unavailable (5xx, timeouts, connection
+    errors, 429 after retries), as opposed to local queue timeouts and
+    client errors (other 4xx)."""
+    if isinstance(error, RateLimitTimeout):
+        # Only a deadline missed while backing off from 429s is Gemini's doing.
+        return error.__cause__ is not None
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code != 429:
+        return False
+    return True
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _split_for_summary(text: str, max_tokens: int) -> list:
+    """Split *text* into chunks of about *max_tokens* tokens for summarization.
+
+    Paragraphs (blank-line separated) are packed whole; a paragraph over the
+    budget is split into sentences, and a sentence over the budget into
+    fixed-size pieces.
+    """
+    max_chars = max(1, max_tokens) * _CHARS_PER_TOKEN
+    pieces = []  # (text, separator placed before it when packed)
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        separator = "\n\n"
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append((sentence[:max_chars], separator))
+                sentence, separator = sentence[max_chars:], ""
+            if sentence:
+                pieces.append((sentence, separator))
+            separator = " "
+
+    chunks, current = [], ""
+    for piece, separator in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = current + separator + piece if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
 
 
 # Module-level singleton
 ai_service = AIService()
+metrics.on_collect(lambda: ai_service.limiter.publish_metrics())
@@ -0,0 +1,59 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+from app.utils.logger import logger
+
+
+class AsyncRunner:
+    """Run coroutines on a private event loop from synchronous code.
+
+    The loop lives in a daemon thread started on first use (and restarted after
+    a fork), so Flask's blocking request threads can hand AI calls to asyncio
+    and wait for the result, while independent calls fan out concurrently.
+    """
+
+    def __init__(self, name: str = "speaksmart-async"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self._name, daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        self._pid = os.getpid()
+        logger.debug("Started async runner loop in thread %s", self._name)
+
+    def in_loop(self) -> bool:
+        """Return True when called from the runner's own loop thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro, timeout: float = None):
+        """Run *coro* on the loop and block until it finishes (or *timeout* passes)."""
+        if self.in_loop():
+            raise RuntimeError("AsyncRunner.run() cannot be called from its own event loop")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
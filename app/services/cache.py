@@ -0,0 +1,220 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from app.config import Config
+from app.models.database import get_pool
+from app.utils.logger import logger
+from app.utils.timing import span
+
+# How often (in writes) expired / surplus rows are swept out of the cache.
+_EVICT_EVERY = 100
+# Minimum age (seconds) before a hit refreshes last_access, to avoid a write per read.
+_TOUCH_INTERVAL = 60
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keying (Unicode NFC, trimmed, collapsed spaces)."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+
+class ResultCache:
+    """Persistent, content-addressed cache for AI results.
+
+    Entries live in a small SQLite database on disk, so they survive restarts
+    and are shared by every worker process on the host. Rows expire after
+    ``AI_CACHE_TTL`` seconds and the table is trimmed to ``AI_CACHE_MAX_ENTRIES``
+    using least-recently-used order.
+    """
+
+    def __init__(self, path: str = None, ttl: int = None, max_entries: int = None):
+        self._path = path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = set()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ── configuration ──────────────────────────────────────────────────
+
+    @property
+    def path(self) -> str:
+        return self._path or Config.AI_CACHE_PATH
+
+    @property
+    def ttl(self) -> int:
+        return self._ttl if self._ttl is not None else Config.AI_CACHE_TTL
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries if self._max_entries is not None else Config.AI_CACHE_MAX_ENTRIES
+
+    # ── helpers ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def make_key(task: str, text: str, params: dict, model: str, prompt_version: str) -> str:
+        """Return a stable SHA-256 key for one AI request."""
+        payload = json.dumps(
+            [task, normalize_text(text), params or {}, model, prompt_version],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.path
+        conn = get_pool(path).acquire()
+        if path not in self._initialized:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS ai_cache (
+                    key TEXT PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_ai_cache_last_access ON ai_cache (last_access);
+                """
+            )
+            self._initialized.add(path)
+        return conn
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # ── public API ─────────────────────────────────────────────────────
+
+    def get(self, key: str):
+        """Return the cached value for *key*, or None on a miss."""
+        with span("cache"):
+            return self._get(key, count=True)
+
+    def peek(self, key: str):
+        """Like get(), but without touching the hit/miss counters."""
+        with span("cache"):
+            return self._get(key, count=False)
+
+    def _get(self, key: str, count: bool):
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, expires_at, last_access FROM ai_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row and row[1] > now and now - row[2] > _TOUCH_INTERVAL:
+                    conn.execute("UPDATE ai_cache SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("AI cache read failed: %s", e)
+            row = None
+
+        hit = bool(row) and row[1] > now
+        if count:
+            self._count(hit=hit)
+        return json.loads(row[0]) if hit else None
+
+    def set(self, key: str, task: str, value) -> None:
+        """Store *value* (any JSON-serializable object) under *key*."""
+        with span("cache"):
+            self._set(key, task, value)
+
+    def _set(self, key: str, task: str, value) -> None:
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    """INSERT OR REPLACE INTO ai_cache
+                       (key, task, value, created_at, expires_at, last_access)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (key, task, json.dumps(value, ensure_ascii=False), now, now + self.ttl, now),
+                )
+                conn.commit()
+                with self._lock:
+                    self._writes += 1
+                    sweep = self._writes % _EVICT_EVERY == 0
+                if sweep:
+                    self._evict(conn, now)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("AI cache write failed: %s", e)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows, then the least-recently-used rows over the size bound."""
+        conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (now,))
+        excess = conn.execute("SELECT COUNT(*) FROM ai_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM ai_cache WHERE key IN "
+                "(SELECT key FROM ai_cache ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            logger.info("AI cache evicted %d entries", excess)
+        conn.commit()
+
+    def evict(self) -> None:
+        """Run an eviction sweep immediately."""
+        try:
+            conn = self._connect()
+            try:
+                self._evict(conn, time.time())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("AI cache eviction failed: %s", e)
+
+    def clear(self) -> None:
+        """Remove every cached entry and reset the counters."""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM ai_cache")
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("AI cache clear failed: %s", e)
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process and the shared entry count."""
+        try:
+            conn = self._connect()
+            try:
+                entries = conn.execute("SELECT COUNT(*) FROM ai_cache").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            entries = None
+        total = self.hits + self.misses
+        return {
+            "enabled": Config.AI_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
+
+
+# Module-level singleton
+result_cache = ResultCache()
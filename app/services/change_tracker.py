@@ -0,0 +1,58 @@
+import threading
+import time
+from app.config import Config
+from app.models.database import get_db
+
+
+class ChangeTracker:
+    """Process-local view of the database's per-table change counters.
+
+    Triggers bump ``change_counters.version`` on every insert, update and
+    delete of the languages, translations and grammar_rules tables, whichever
+    worker process made the change. Caches compare the versions they were
+    built at with versions() to know whether they are stale. The counters are
+    re-read at most every CHANGE_CHECK_INTERVAL seconds, so changes made by
+    other workers are noticed within that interval; model writes call
+    invalidate() so this process sees its own changes at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._read_at = None
+        self._path = None
+        self.reads = 0
+
+    def _refresh(self):
+        conn = get_db()
+        try:
+            rows = conn.execute("SELECT name, version FROM change_counters").fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            self._versions = {r["name"]: r["version"] for r in rows}
+            self._read_at = time.monotonic()
+            self._path = Config.DATABASE_PATH
+            self.reads += 1
+
+    def versions(self, tables: tuple) -> tuple:
+        """Current change versions of *tables*, in order."""
+        with self._lock:
+            stale = (
+                self._read_at is None
+                or self._path != Config.DATABASE_PATH
+                or time.monotonic() - self._read_at >= Config.CHANGE_CHECK_INTERVAL
+            )
+        if stale:
+            self._refresh()
+        versions = self._versions
+        return tuple(versions.get(t, 0) for t in tables)
+
+    def invalidate(self):
+        """Re-read the counters on the next versions() call."""
+        with self._lock:
+            self._read_at = None
+
+
+# Module-level singleton
+change_tracker = ChangeTracker()
@@ -0,0 +1,128 @@
+import collections
+import threading
+import time
+from app.config import Config
+from app.utils.logger import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """A call was refused because the circuit is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast while a dependency keeps failing.
+
+    The outcome of the last AI_BREAKER_WINDOW calls is kept; once at least
+    AI_BREAKER_MIN_CALLS have been seen and the failure share reaches
+    AI_BREAKER_ERROR_RATE the circuit opens and calls are refused with
+    CircuitOpenError. After AI_BREAKER_OPEN_SECONDS the next call is let
+    through as a half-open probe (one at a time): success closes the circuit,
+    failure opens it again for another period.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._outcomes = collections.deque()
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_started = None
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused or probed (open or half-open)."""
+        return self._state != CLOSED
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        if not Config.AI_BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            period = Config.AI_BREAKER_OPEN_SECONDS
+            if self._state == OPEN and now - self._opened_at >= period:
+                self._state = HALF_OPEN
+                self._probe_started = None
+                logger.info("Circuit %s half-open, probing", self.name)
+            # A probe that never reported back (e.g. cancelled) frees its slot
+            # after one open period.
+            if self._state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= period):
+                self._probe_started = now
+                return
+            self.rejected += 1
+            wait = period if self._state == HALF_OPEN else period - (now - self._opened_at)
+        raise CircuitOpenError(f"AI service is temporarily unavailable ({self.name} circuit open)", max(0.0, wait))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._probe_started = None
+            self._record(True)
+
+    def release(self):
+        """Report a call that says nothing about the dependency's health.
+
+        Used for calls that failed before or without reaching it (local
+        queue timeouts, client errors): the outcome is not recorded, but a
+        half-open probe slot is freed so the next call can probe.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._record(False)
+            failures = sum(1 for ok in self._outcomes if not ok)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= Config.AI_BREAKER_MIN_CALLS
+                and failures / len(self._outcomes) >= Config.AI_BREAKER_ERROR_RATE
+            ):
+                self._open()
+
+    def _record(self, ok: bool):
+        self._outcomes.append(ok)
+        while len(self._outcomes) > max(1, Config.AI_BREAKER_WINDOW):
+            self._outcomes.popleft()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning("Circuit %s opened for %ss", self.name, Config.AI_BREAKER_OPEN_SECONDS)
+
+    def stats(self) -> dict:
+        with self._lock:
+            failures = sum(1 for ok in self._outcomes if not ok)
+            return {
+                "state": self._state,
+                "enabled": Config.AI_BREAKER_ENABLED,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": failures,
+                "times_opened": self.opened,
+                "rejected": self.rejected,
+            }
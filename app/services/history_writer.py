@@ -0,0 +1,192 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from app.config import Config
+from app.models.history import History
+from app.utils.logger import logger
+
+# Queue markers understood by the worker thread.
+_FLUSH = object()
+_STOP = object()
+
+
+class HistoryWriter:
+    """Write-behind recorder for translation_history rows.
+
+    Requests enqueue records into a bounded in-memory queue and return
+    immediately; a background thread inserts them with History.create_many,
+    one transaction per batch of up to HISTORY_BATCH_SIZE records or every
+    HISTORY_FLUSH_INTERVAL seconds, whichever comes first. When the queue is
+    full, callers wait up to HISTORY_ENQUEUE_TIMEOUT seconds once and then
+    write the rest of their records synchronously in one transaction
+    (back-pressure rather than data loss). A batch the worker fails to write
+    is retried once before it is given up on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._db_path = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.overflow_writes = 0
+        self.flushes = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.last_flush_seconds = None
+
+    # ── public API ─────────────────────────────────────────────────────
+
+    def record(self, **fields):
+        """Queue one history record (keyword arguments as for History.create)."""
+        self.record_many([fields])
+
+    def record_many(self, records: list):
+        """Queue several history records."""
+        if not records:
+            return
+        if not Config.HISTORY_WRITE_BEHIND:
+            History.create_many(records)
+            return
+
+        q = self._ensure_started()
+        overflow = []
+        for i, record in enumerate(records):
+            try:
+                q.put(record, timeout=Config.HISTORY_ENQUEUE_TIMEOUT)
+            except queue.Full:
+                overflow = records[i:]
+                break
+        with self._lock:
+            self.enqueued += len(records) - len(overflow)
+            self.overflow_writes += len(overflow)
+        if overflow:
+            logger.warning("History queue full, writing %d records synchronously", len(overflow))
+            History.create_many(overflow)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write everything queued so far; returns False if *timeout* expired."""
+        q = self._queue
+        if q is None or self._pid != os.getpid():
+            return True
+        try:
+            q.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        deadline = time.monotonic() + timeout
+        while q.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush pending records and stop the worker thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self.flush(timeout)
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        q = self._queue
+        with self._lock:
+            return {
+                "enabled": Config.HISTORY_WRITE_BEHIND,
+                "queue_depth": q.qsize() if q is not None else 0,
+                "queue_capacity": Config.HISTORY_QUEUE_SIZE,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "retried": self.retried,
+                "overflow_writes": self.overflow_writes,
+                "flushes": self.flushes,
+                "last_flush_ms": None if self.last_flush_seconds is None else round(self.last_flush_seconds * 1000, 3),
+                "avg_flush_ms": round(self.flush_seconds_total / self.flushes * 1000, 3) if self.flushes else None,
+                "max_flush_ms": round(self.flush_seconds_max * 1000, 3),
+            }
+
+    # ── worker ─────────────────────────────────────────────────────────
+
+    def _ensure_started(self) -> queue.Queue:
+        """Return the queue of a worker writing to the configured database."""
+        with self._lock:
+            running = self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+            if running and self._db_path == Config.DATABASE_PATH:
+                return self._queue
+            if running:
+                # DATABASE_PATH changed: the old worker writes what it has, then stops.
+                self._queue.put(_STOP)
+            self._queue = queue.Queue(maxsize=Config.HISTORY_QUEUE_SIZE)
+            self._db_path = Config.DATABASE_PATH
+            self._thread = threading.Thread(
+                target=self._run, args=(self._queue, self._db_path), name="speaksmart-history", daemon=True,
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+            return self._queue
+
+    def _run(self, q: queue.Queue, db_path: str):
+        while True:
+            batch = []
+            item = q.get()
+            deadline = time.monotonic() + Config.HISTORY_FLUSH_INTERVAL
+            taken = 1
+            while item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if len(batch) >= Config.HISTORY_BATCH_SIZE:
+                    item = None
+                    break
+                try:
+                    item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+                    taken += 1
+                except queue.Empty:
+                    item = None
+                    break
+
+            if batch:
+                self._write(batch, db_path)
+            for _ in range(taken):
+                q.task_done()
+            if item is _STOP:
+                return
+
+    def _write(self, batch: list, db_path: str):
+        started = time.perf_counter()
+        written = failed = retried = 0
+        try:
+            History.create_many(batch, db_path=db_path)
+            written = len(batch)
+        except Exception as e:
+            # Usually a transient lock or I/O error: give it one more chance.
+            logger.warning("Failed to write %d history records, retrying: %s", len(batch), e)
+            retried = 1
+            time.sleep(min(1.0, Config.HISTORY_FLUSH_INTERVAL))
+            try:
+                History.create_many(batch, db_path=db_path)
+                written = len(batch)
+            except Exception as e:
+                failed = len(batch)
+                logger.error("Dropped %d history records after a retry: %s", len(batch), e)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.retried += retried
+            self.flushes += 1
+            self.last_flush_seconds = elapsed
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+
+# Module-level singleton
+history_writer = HistoryWriter()
+atexit.register(history_writer.shutdown)
@@ -0,0 +1,263 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from app.config import Config
+from app.models.database import get_db
+from app.utils.logger import logger
+
+# Languages with less training text than this are left out of the model.
+_MIN_TRAINING_CHARS = 200
+
+
+def _features(text: str) -> Counter:
+    """Character 1-3 grams of *text* (lower-cased letters only, word-padded)."""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    text = re.sub(r"[\W\d_]+", " ", text).strip()
+    if not text:
+        return Counter()
+    padded = f" {text} "
+    grams = Counter()
+    for n in (1, 2, 3):
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            if gram.strip():
+                grams[gram] += 1
+    return grams
+
+
+class _Profile:
+    """Smoothed n-gram log-probabilities for one language."""
+
+    __slots__ = ("language_id", "name", "code", "logprob", "unseen")
+
+    def __init__(self, language: dict, counts: Counter, vocabulary: int):
+        self.language_id = language["id"]
+        self.name = language["name"]
+        self.code = language["code"]
+        denominator = sum(counts.values()) + vocabulary
+        self.logprob = {g: math.log((c + 1) / denominator) for g, c in counts.items()}
+        self.unseen = math.log(1 / denominator)
+
+
+def _classify(profiles: list, grams: Counter):
+    """Score *grams* against *profiles*.
+
+    Returns (best profile, confidence, [(profile, posterior), ...] best first).
+    """
+    scores = []
+    for p in profiles:
+        logprob, unseen = p.logprob, p.unseen
+        score = sum(count * logprob.get(g, unseen) for g, count in grams.items())
+        scores.append((score, p))
+    scores.sort(key=lambda s: s[0], reverse=True)
+
+    top = scores[0][0]
+    weights = [math.exp(score - top) for score, _ in scores]
+    total = sum(weights)
+    best = scores[0][1]
+    bigrams = {g: c for g, c in grams.items() if len(g) == 2} or grams
+    seen = sum(c for g, c in bigrams.items() if g in best.logprob)
+    coverage = seen / sum(bigrams.values())
+    ranked = [(p, w / total) for (_, p), w in zip(scores, weights)]
+    return best, ranked[0][1] * coverage, ranked
+
+
+def _build(languages: dict, samples: list) -> list:
+    """Profiles for the languages of *samples* with enough training text."""
+    counts, chars = {}, Counter()
+    for language_id, text in samples:
+        if language_id in languages and text:
+            counts.setdefault(language_id, Counter()).update(_features(text))
+            chars[language_id] += len(text)
+
+    trained = {lid: c for lid, c in counts.items() if chars[lid] >= _MIN_TRAINING_CHARS}
+    vocabulary = len(set().union(*trained.values())) if trained else 0
+    return [_Profile(languages[lid], c, vocabulary) for lid, c in trained.items()]
+
+
+class LanguageDetector:
+    """Offline character n-gram language classifier.
+
+    Profiles are trained from the text already stored in ``translations``
+    (both sides of each pair) and ``translation_history``, and scored as a
+    multinomial naive Bayes model. The reported confidence is the posterior of
+    the best language scaled by the share of the input's bigrams that language
+    has actually seen, so text in an untrained language scores low and can be
+    handed to Gemini.
+
+    History rows carry whatever language names the caller sent, so a history
+    sample is dropped when the model built from ``translations`` alone
+    confidently puts it in a different language. The model is retrained every
+    LANG_DETECT_RETRAIN_INTERVAL seconds and after language or translation
+    writes; retraining runs in one background thread at a time while the
+    previous model keeps answering. Only the first training for a database
+    happens inline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for the whole of a training run (single flight).
+        self._training = threading.Lock()
+        self._profiles = []
+        self._trained_at = None
+        self._path = None
+        self._stale = False
+        self._discarded = 0
+
+    # ── training ───────────────────────────────────────────────────────
+
+    def _samples(self):
+        """Return the languages and the (language id, text) training pairs.
+
+        Pairs from ``translations`` and from ``translation_history`` are
+        returned separately.
+        """
+        limit = Config.LANG_DETECT_MAX_SAMPLES
+        conn = get_db()
+        try:
+            languages = {r["id"]: dict(r) for r in conn.execute("SELECT id, name, code FROM languages")}
+            keys = {}
+            for lang in languages.values():
+                keys[lang["name"].lower()] = lang["id"]
+                keys[lang["code"].lower()] = lang["id"]
+
+            rows = conn.execute(
+                """SELECT source_language_id, target_language_id, source_text, translated_text
+                   FROM translations ORDER BY id DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+            history = conn.execute(
+                """SELECT source_language, target_language, source_text, translated_text
+                   FROM translation_history ORDER BY id DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        curated = []
+        for r in rows:
+            curated.append((r["source_language_id"], r["source_text"]))
+            curated.append((r["target_language_id"], r["translated_text"]))
+        recorded = []
+        for r in history:
+            source = keys.get((r["source_language"] or "").strip().lower())
+            target = keys.get((r["target_language"] or "").strip().lower())
+            if source:
+                recorded.append((source, r["source_text"]))
+            if target:
+                recorded.append((target, r["translated_text"]))
+        return languages, curated, recorded
+
+    @staticmethod
+    def _plausible(profiles: list, samples: list) -> list:
+        """Drop samples *profiles* confidently classify as another language."""
+        if len(profiles) < 2:
+            return samples
+        kept = []
+        for language_id, text in samples:
+            grams = _features(text)
+            if grams:
+                best, confidence, _ = _classify(profiles, grams)
+                if best.language_id != language_id and confidence >= Config.LANG_DETECT_MIN_CONFIDENCE:
+                    continue
+            kept.append((language_id, text))
+        return kept
+
+    def _train(self):
+        started = time.perf_counter()
+        path = Config.DATABASE_PATH
+        # Cleared before reading, so a write during training marks the new
+        # model stale again.
+        self._stale = False
+        languages, curated, recorded = self._samples()
+        plausible = self._plausible(_build(languages, curated), recorded)
+        profiles = _build(languages, curated + plausible)
+
+        with self._lock:
+            self._profiles = profiles
+            self._trained_at = time.monotonic()
+            self._path = path
+            self._discarded = len(recorded) - len(plausible)
+        logger.info(
+            "Trained local language detector on %d languages in %.1f ms",
+            len(profiles), (time.perf_counter() - started) * 1000,
+        )
+
+    def train(self):
+        """Rebuild the language profiles from the database."""
+        with self._training:
+            self._train()
+
+    def _train_in_background(self):
+        if not self._training.acquire(blocking=False):
+            return  # already retraining
+
+        def run():
+            try:
+                self._train()
+            except Exception as e:
+                logger.error("Language detector retraining failed: %s", e)
+            finally:
+                self._training.release()
+
+        threading.Thread(target=run, name="lang-detect-train", daemon=True).start()
+
+    def _ensure_trained(self):
+        if self._trained_at is None or self._path != Config.DATABASE_PATH:
+            # Nothing usable to serve meanwhile.
+            with self._training:
+                if self._trained_at is None or self._path != Config.DATABASE_PATH:
+                    self._train()
+        elif self._stale or time.monotonic() - self._trained_at > Config.LANG_DETECT_RETRAIN_INTERVAL:
+            self._train_in_background()
+
+    def invalidate(self):
+        """Retrain (in the background) on the next detection."""
+        self._stale = True
+
+    def wait(self, timeout: float = 10.0) -> bool:
+        """Wait for a running retrain; returns False if *timeout* expired."""
+        if not self._training.acquire(timeout=timeout):
+            return False
+        self._training.release()
+        return True
+
+    # ── detection ──────────────────────────────────────────────────────
+
+    def detect(self, text: str):
+        """Classify *text*.
+
+        Returns a dict shaped like AIService.detect_language() (detected_language,
+        language_code, confidence, alternatives), or None when fewer than two
+        languages have enough training text or *text* has no letters.
+        """
+        self._ensure_trained()
+        profiles = self._profiles
+        grams = _features(text)
+        if len(profiles) < 2 or not grams:
+            return None
+
+        best, confidence, ranked = _classify(profiles, grams)
+        return {
+            "detected_language": best.name,
+            "language_code": best.code,
+            "confidence": round(confidence, 4),
+            "alternatives": [
+                {"language": p.name, "code": p.code, "confidence": round(w, 4)}
+                for p, w in ranked[1:4]
+            ],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "trained": self._trained_at is not None,
+            "languages": [p.code for p in self._profiles],
+            "discarded_samples": self._discarded,
+        }
+
+
+# Module-level singleton
+language_detector = LanguageDetector()
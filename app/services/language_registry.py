@@ -0,0 +1,77 @@
+import threading
+from app.config import Config
+from app.models.database import get_db
+from app.services.change_tracker import change_tracker
+
+
+class LanguageRegistry:
+    """Process-local copy of the languages table (id <-> code <-> name).
+
+    Validating a language id and naming the languages of translation and
+    grammar-rule rows are dict lookups instead of queries. The table is
+    reloaded whenever its change version moves on (see ChangeTracker): at
+    once after this process's own Language writes, and within
+    CHANGE_CHECK_INTERVAL of another worker's. An unknown id forces a fresh
+    check first, so a language just created by another worker is found.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._version = None
+        self._path = None
+        self.loads = 0
+
+    def _load(self, version: tuple):
+        conn = get_db()
+        try:
+            rows = conn.execute("SELECT * FROM languages").fetchall()
+        finally:
+            conn.close()
+        by_id = {r["id"]: dict(r) for r in rows}
+        with self._lock:
+            self._by_id = by_id
+            self._version = version
+            self._path = Config.DATABASE_PATH
+            self.loads += 1
+
+    def _current(self) -> dict:
+        # Read the version before the table, so a concurrent write can only
+        # make the loaded copy look older than it is.
+        version = change_tracker.versions(("languages",))
+        if version != self._version or self._path != Config.DATABASE_PATH:
+            self._load(version)
+        return self._by_id
+
+    def _find(self, language_id: int):
+        language = self._current().get(language_id)
+        if language is None:
+            change_tracker.invalidate()
+            language = self._current().get(language_id)
+        return language
+
+    def get(self, language_id):
+        """Return the language with *language_id* (int or digit-only string), or None."""
+        if isinstance(language_id, str) and language_id.isascii() and language_id.isdigit():
+            language_id = int(language_id)
+        elif isinstance(language_id, bool) or not isinstance(language_id, int):
+            return None
+        language = self._find(language_id)
+        return dict(language) if language else None
+
+    def annotate(self, rows: list, *fields) -> list:
+        """Set ``<field>_name`` and ``<field>_code`` on *rows* from ``<field>_id``.
+
+        Replaces joining the languages table for every row of a list query.
+        """
+        by_id = self._current()
+        for row in rows:
+            for field in fields:
+                language = by_id.get(row[field + "_id"]) or self._find(row[field + "_id"]) or {}
+                row[field + "_name"] = language.get("name")
+                row[field + "_code"] = language.get("code")
+        return rows
+
+
+# Module-level singleton
+language_registry = LanguageRegistry()
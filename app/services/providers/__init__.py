@@ -0,0 +1,24 @@
+"""Text-generation backends for AIService, selected with Config.AI_PROVIDER."""
+
+from app.config import Config
+from app.services.providers.base import AIProvider, ProviderError
+from app.services.providers.gemini import GeminiProvider
+from app.services.providers.local import LocalProvider
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "local": LocalProvider,
+}
+
+
+def create_provider(name: str = None) -> AIProvider:
+    """Build the provider called *name* (default: Config.AI_PROVIDER)."""
+    name = (name or Config.AI_PROVIDER).strip().lower()
+    try:
+        cls = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown AI provider {name!r}; expected one of {sorted(PROVIDERS)}") from None
+    return cls()
+
+
+__all__ = ["AIProvider", "ProviderError", "GeminiProvider", "LocalProvider", "PROVIDERS", "create_provider"]
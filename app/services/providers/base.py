@@ -0,0 +1,39 @@
+class ProviderError(Exception):
+    """A failed provider call; ``code`` follows HTTP (429 = rate limited)."""
+
+    def __init__(self, message: str, code: int = 500):
+        super().__init__(message)
+        self.code = code
+
+
+class AIProvider:
+    """A text-generation backend behind AIService.
+
+    AIService owns retries, rate limiting, the circuit breaker, caching and
+    parsing; a provider only turns one prompt into model text. *task* names
+    the AIService operation the prompt belongs to (translate,
+    translate_batch, translate_multi, grammar_check, summarize,
+    summarize_chunk, detect_language). Failures are raised as exceptions;
+    rate limiting must be recognizable by ``rate_limiter.is_rate_limited``
+    (``code == 429`` or a "429"/quota message).
+    """
+
+    # Recorded as the history's ai_provider.
+    name = None
+    # Part of every result cache key, so backends never share cached results.
+    model_name = None
+
+    def warm_up(self):
+        """Do the one-off setup of the first call (SDK import, clients) now."""
+
+    async def generate(self, prompt: str, task: str) -> str:
+        """Return the model's complete reply to *prompt*."""
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, task: str):
+        """Start a streamed reply to *prompt* and return an async iterator of text chunks.
+
+        Errors establishing the stream are raised here rather than on the
+        first chunk, so they can be retried or reported before any output.
+        """
+        raise NotImplementedError
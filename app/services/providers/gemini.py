@@ -0,0 +1,56 @@
+import threading
+import time
+from app.config import Config
+from app.services.providers.base import AIProvider
+from app.utils.logger import logger
+
+
+class GeminiProvider(AIProvider):
+    """Google Gemini through the google-generativeai SDK (model GEMINI_MODEL).
+
+    The SDK pulls in gRPC and protobuf and takes the better part of a second
+    to import, so it is only loaded by the first call (or warm_up()).
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = None):
+        self.model_name = model_name or Config.GEMINI_MODEL
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The SDK's GenerativeModel, created on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    import google.generativeai as genai
+
+                    api_key = Config.GEMINI_API_KEY
+                    if not api_key:
+                        logger.warning("GEMINI_API_KEY is not set – AI endpoints will fail")
+                    genai.configure(api_key=api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+                    logger.info(
+                        "Loaded google-generativeai (%s) in %.0f ms",
+                        self.model_name, (time.perf_counter() - started) * 1000,
+                    )
+        return self._model
+
+    def warm_up(self):
+        self.model
+
+    async def generate(self, prompt: str, task: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str, task: str):
+        response = await self.model.generate_content_async(prompt, stream=True)
+        return _texts(response)
+
+
+async def _texts(response):
+    async for chunk in response:
+        yield chunk.text
@@ -0,0 +1,284 @@
+import asyncio
+import collections
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import unicodedata
+from app.config import Config
+from app.services.providers.base import AIProvider, ProviderError
+
+_QUOTED = re.compile(r'"""(.*)"""', re.DOTALL)
+_PAIR = re.compile(r"from (.+?) to (.+?)\.\n")
+_TARGETS = re.compile(r"target languages: (\[.*?\])\.\n")
+_MAX_SENTENCES = re.compile(r"at most (\d+) sentences")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+_REPEATED_WORD = re.compile(r"\b(\w+) \1\b", re.IGNORECASE)
+
+# Distinct prompts whose call counts are remembered (least recently used
+# first out), which bounds memory on long runs with ever-new prompts.
+_MAX_TRACKED_PROMPTS = 50000
+
+# First word of a letter's Unicode name -> (language, ISO 639-1 code).
+_SCRIPTS = {
+    "LATIN": ("English", "en"),
+    "CYRILLIC": ("Russian", "ru"),
+    "GREEK": ("Greek", "el"),
+    "ARABIC": ("Arabic", "ar"),
+    "HEBREW": ("Hebrew", "he"),
+    "DEVANAGARI": ("Hindi", "hi"),
+    "THAI": ("Thai", "th"),
+    "HANGUL": ("Korean", "ko"),
+    "HIRAGANA": ("Japanese", "ja"),
+    "KATAKANA": ("Japanese", "ja"),
+    "CJK": ("Chinese", "zh"),
+}
+
+
+class LocalProvider(AIProvider):
+    """Offline, deterministic stand-in for Gemini.
+
+    Replies are schema-valid JSON for every AIService task, built from the
+    prompt alone: translations echo the text tagged with the target
+    language, grammar checks fix capitalization, end punctuation and
+    repeated words, summaries keep the leading sentences and language
+    detection goes by script. Latency follows AI_LOCAL_LATENCY_DIST around
+    AI_LOCAL_LATENCY_MS, and AI_LOCAL_RATE_LIMIT_RATE / AI_LOCAL_ERROR_RATE
+    of calls fail with a simulated 429 / 500. Latencies and failures are drawn
+    from a stream seeded by AI_LOCAL_SEED, the prompt and how often that
+    prompt was sent before, so a run is reproducible however requests
+    interleave (counts are kept for the _MAX_TRACKED_PROMPTS most recently
+    sent prompts). Settings are read on every call.
+    """
+
+    name = "local"
+    model_name = "local-deterministic"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = collections.OrderedDict()
+        self.calls = 0
+        self.failures = 0
+
+    def _draw(self, prompt: str):
+        """Return (latency in seconds, simulated error or None) for the next call with *prompt*."""
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            n = self._seen.pop(digest, 0)
+            self._seen[digest] = n + 1
+            if len(self._seen) > _MAX_TRACKED_PROMPTS:
+                self._seen.popitem(last=False)
+            self.calls += 1
+        rng = random.Random(f"{Config.AI_LOCAL_SEED}:{digest}:{n}")
+        latency = _latency(rng, Config.AI_LOCAL_LATENCY_MS / 1000, Config.AI_LOCAL_LATENCY_JITTER)
+
+        roll = rng.random()
+        error = None
+        if roll < Config.AI_LOCAL_RATE_LIMIT_RATE:
+            error = ProviderError(
+                f"429 Resource has been exhausted (simulated). Please retry in {Config.AI_LOCAL_RETRY_AFTER}s.", 429,
+            )
+        elif roll < Config.AI_LOCAL_RATE_LIMIT_RATE + Config.AI_LOCAL_ERROR_RATE:
+            error = ProviderError("500 An internal error has occurred (simulated).", 500)
+        if error is not None:
+            with self._lock:
+                self.failures += 1
+        return latency, error
+
+    async def generate(self, prompt: str, task: str) -> str:
+        latency, error = self._draw(prompt)
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return reply(prompt, task)
+
+    async def stream(self, prompt: str, task: str):
+        # The first chunk arrives after a third of the latency, the rest
+        # spread evenly over the remainder.
+        latency, error = self._draw(prompt)
+        await asyncio.sleep(latency / 3)
+        if error is not None:
+            raise error
+        text = reply(prompt, task)
+        size = max(1, Config.AI_LOCAL_STREAM_CHUNK_CHARS)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        return _chunks(chunks, latency * 2 / 3 / max(1, len(chunks)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "simulated_failures": self.failures}
+
+
+async def _chunks(chunks: list, delay: float):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+def _latency(rng: random.Random, latency: float, jitter: float) -> float:
+    """Draw one latency (seconds) from AI_LOCAL_LATENCY_DIST.
+
+    fixed: always *latency*; uniform: within ±jitter of it; normal: standard
+    deviation jitter × latency; lognormal: median *latency*, sigma jitter;
+    exponential: mean *latency*.
+    """
+    if latency <= 0:
+        return 0.0
+    dist = Config.AI_LOCAL_LATENCY_DIST
+    if dist == "uniform":
+        value = rng.uniform(latency * (1 - jitter), latency * (1 + jitter))
+    elif dist == "normal":
+        value = rng.gauss(latency, latency * jitter)
+    elif dist == "lognormal":
+        value = rng.lognormvariate(math.log(latency), jitter)
+    elif dist == "exponential":
+        value = rng.expovariate(1 / latency)
+    else:
+        value = latency
+    return max(0.0, value)
+
+
+# ── replies ────────────────────────────────────────────────────────────
+
+def _quoted(prompt: str) -> str:
+    match = _QUOTED.search(prompt)
+    return match.group(1) if match else ""
+
+
+def _sentences(text: str, count: int) -> str:
+    return " ".join(_SENTENCE_END.split(text.strip())[:count])
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _translate(prompt: str) -> str:
+    source, target = _PAIR.search(prompt).groups()
+    return _dumps({
+        "translated_text": f"[{target}] {_quoted(prompt)}",
+        "source_language": source,
+        "target_language": target,
+        "confidence": 0.9,
+        "notes": "",
+    })
+
+
+def _translate_batch(prompt: str) -> str:
+    target = _PAIR.search(prompt).group(2)
+    items = json.loads(prompt.split("Items to translate (JSON):", 1)[1])
+    return _dumps({"translations": [
+        {"index": item["index"], "translated_text": f"[{target}] {item['text']}", "confidence": 0.9, "notes": ""}
+        for item in items
+    ]})
+
+
+def _translate_multi(prompt: str) -> str:
+    text = _quoted(prompt)
+    targets = json.loads(_TARGETS.search(prompt).group(1))
+    return _dumps({"translations": [
+        {"target_language": t, "translated_text": f"[{t}] {text}", "confidence": 0.9, "notes": ""}
+        for t in targets
+    ]})
+
+
+def _grammar_check(prompt: str) -> str:
+    text = _quoted(prompt)
+    corrected, errors = text.strip(), []
+
+    for match in reversed(list(_REPEATED_WORD.finditer(corrected))):
+        errors.append({
+            "original": match.group(0),
+            "correction": match.group(1),
+            "explanation": "Repeated word.",
+        })
+        corrected = corrected[:match.start()] + match.group(1) + corrected[match.end():]
+    if corrected[:1].islower():
+        errors.append({
+            "original": corrected.split(" ", 1)[0],
+            "correction": corrected.split(" ", 1)[0].capitalize(),
+            "explanation": "Sentences start with a capital letter.",
+        })
+        corrected = corrected[0].upper() + corrected[1:]
+    if corrected and corrected[-1].isalnum():
+        errors.append({
+            "original": corrected.rsplit(" ", 1)[-1],
+            "correction": corrected.rsplit(" ", 1)[-1] + ".",
+            "explanation": "Sentences end with punctuation.",
+        })
+        corrected += "."
+
+    return _dumps({
+        "corrected_text": corrected,
+        "errors": errors,
+        "score": round(max(0.0, 1.0 - 0.1 * len(errors)), 2),
+        "suggestions": [],
+    })
+
+
+def _summarize(prompt: str) -> str:
+    match = _MAX_SENTENCES.search(prompt)
+    count = int(match.group(1)) if match else 3
+    if "Section summaries (in order, JSON):" in prompt:
+        parts = json.loads(prompt.split("Section summaries (in order, JSON):", 1)[1])
+        text = " ".join(p["summary"] for p in parts)
+        key_points = [point for p in parts for point in p["key_points"]][:5]
+    else:
+        text = _quoted(prompt)
+        key_points = [_sentences(text, 1)]
+    summary = _sentences(text, count)
+    return _dumps({
+        "summary": summary,
+        "language": "English",
+        "sentence_count": len(_SENTENCE_END.split(summary)) if summary else 0,
+        "key_points": key_points,
+    })
+
+
+def _summarize_chunk(prompt: str) -> str:
+    text = _quoted(prompt)
+    return _dumps({"summary": _sentences(text, 2), "key_points": [_sentences(text, 1)]})
+
+
+def _detect_language(prompt: str) -> str:
+    counts = {}
+    for ch in _quoted(prompt):
+        if ch.isalpha():
+            script = unicodedata.name(ch, "UNKNOWN").split(" ", 1)[0]
+            if script in _SCRIPTS:
+                counts[_SCRIPTS[script]] = counts.get(_SCRIPTS[script], 0) + 1
+    if not counts:
+        return _dumps({"detected_language": "Unknown", "language_code": "und", "confidence": 0.0, "alternatives": []})
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    total = sum(counts.values())
+    (language, code), best = ranked[0]
+    return _dumps({
+        "detected_language": language,
+        "language_code": code,
+        "confidence": round(0.5 * best / total, 4),
+        "alternatives": [
+            {"language": lang, "code": c, "confidence": round(0.5 * n / total, 4)}
+            for (lang, c), n in ranked[1:4]
+        ],
+    })
+
+
+_REPLIES = {
+    "translate": _translate,
+    "translate_batch": _translate_batch,
+    "translate_multi": _translate_multi,
+    "grammar_check": _grammar_check,
+    "summarize": _summarize,
+    "summarize_chunk": _summarize_chunk,
+    "detect_language": _detect_language,
+}
+
+
+def reply(prompt: str, task: str) -> str:
+    """Build the model reply to one of AIService's *task* prompts (other tasks echo the quoted text)."""
+    build = _REPLIES.get(task)
+    if build is None:
+        return _quoted(prompt) or "OK"
+    return build(prompt)
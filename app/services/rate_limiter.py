@@ -0,0 +1,219 @@
+import asyncio
+import collections
+import re
+import threading
+import time
+from app.config import Config
+from app.utils.metrics import metrics
+
+# Window over which the effective request rate is measured.
+_RATE_WINDOW = 60.0
+
+RATE_LIMIT_WAIT = metrics.histogram(
+    "speaksmart_ai_rate_limit_wait_seconds",
+    "Time AI requests spent queued for a rate-limiter token",
+)
+RATE_LIMIT_THROTTLES = metrics.counter(
+    "speaksmart_ai_rate_limit_throttles_total",
+    "Rate-limit (429) responses that slowed the AI request rate down",
+)
+RATE_LIMIT_TIMEOUTS = metrics.counter(
+    "speaksmart_ai_rate_limit_queue_timeouts_total",
+    "AI requests refused because no token was free before their deadline",
+)
+RATE_LIMIT_RPS = metrics.gauge(
+    "speaksmart_ai_rate_limit_rps",
+    "AI requests per second the adaptive rate limiter currently allows",
+)
+RATE_LIMIT_EFFECTIVE_RPS = metrics.gauge(
+    "speaksmart_ai_rate_limit_effective_rps",
+    "AI requests per second granted by the rate limiter over the last minute",
+)
+RATE_LIMIT_WAITING = metrics.gauge(
+    "speaksmart_ai_rate_limit_waiting",
+    "AI requests currently queued for a rate-limiter token",
+)
+
+
+class RateLimitTimeout(Exception):
+    """A request could not be scheduled before its deadline."""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True when *error* is Gemini telling us to slow down (HTTP 429 / quota)."""
+    if getattr(error, "code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "resource exhausted" in message
+
+
+def retry_after(error: Exception):
+    """Return the server's retry hint for *error* in seconds, or None.
+
+    Looks at a Retry-After response header, a google.rpc.RetryInfo detail and
+    finally the "retry in 17s" / "retry_delay { seconds: 17 }" text Gemini
+    puts in its error messages.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers:
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            pass
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    message = str(error)
+    match = (
+        re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", message)
+        or re.search(r"retry in ([\d.]+)\s*s", message, re.IGNORECASE)
+    )
+    return float(match.group(1)) if match else None
+
+
+class AdaptiveRateLimiter:
+    """Process-wide token bucket in front of Gemini with AIMD rate control.
+
+    Requests take a token before calling Gemini and wait, in arrival order,
+    on the runner loop until one is available. The refill rate starts at
+    AI_RATE_LIMIT_RPS, grows by AI_RATE_LIMIT_INCREASE after every successful
+    call up to AI_RATE_LIMIT_MAX_RPS and halves on every throttle (429), never
+    dropping below AI_RATE_LIMIT_MIN_RPS. A retry hint from the server pauses
+    the bucket for that long. A request whose wait would run past its deadline fails at once
+    with RateLimitTimeout instead of sleeping.
+
+    acquire() must be awaited on a single event loop (the AIService runner);
+    the bookkeeping is also read from request threads by stats(). Queue
+    waits, throttles and timeouts are also recorded in app.utils.metrics, and
+    publish_metrics() sets the rate gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fifo = None
+        self._rate = None
+        self._tokens = None
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._grants = collections.deque()
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.throttle_events = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per second."""
+        if self._rate is None:
+            self._rate = float(Config.AI_RATE_LIMIT_RPS)
+        return self._rate
+
+    def _queue(self) -> asyncio.Lock:
+        # asyncio.Lock wakes waiters in FIFO order; rebuild it if the runner
+        # loop changed (e.g. after a fork).
+        loop = asyncio.get_running_loop()
+        if self._fifo is None or self._fifo[0] is not loop:
+            self._fifo = (loop, asyncio.Lock())
+        return self._fifo[1]
+
+    def _refill(self, now: float):
+        burst = max(1.0, float(Config.AI_RATE_LIMIT_BURST))
+        if self._tokens is None:
+            self._tokens = burst
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(burst, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    async def acquire(self, deadline: float) -> float:
+        """Wait for a token; returns the seconds spent queued.
+
+        *deadline* is a time.monotonic() value. Raises RateLimitTimeout as
+        soon as it is clear the token will not be available by then.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            async with self._queue():
+                while True:
+                    now = time.monotonic()
+                    with self._lock:
+                        self._refill(now)
+                        wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate, 0.0)
+                        if wait <= 0:
+                            self._tokens -= 1
+                            break
+                    if now + wait > deadline:
+                        with self._lock:
+                            self.timeouts += 1
+                        RATE_LIMIT_TIMEOUTS.inc()
+                        raise RateLimitTimeout(
+                            f"AI request could not be scheduled within the rate limit "
+                            f"(next slot in {wait:.1f}s). Please try again later."
+                        )
+                    await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self.acquired += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self._grants.append(now)
+            while self._grants and self._grants[0] < now - _RATE_WINDOW:
+                self._grants.popleft()
+        RATE_LIMIT_WAIT.observe(waited)
+        return waited
+
+    def succeeded(self):
+        """Additive increase after a call that was not throttled."""
+        with self._lock:
+            self._rate = min(
+                float(Config.AI_RATE_LIMIT_MAX_RPS),
+                self.rate + float(Config.AI_RATE_LIMIT_INCREASE),
+            )
+
+    def throttled(self, hint: float = None):
+        """Multiplicative decrease after a 429, pausing for *hint* seconds if given."""
+        now = time.monotonic()
+        RATE_LIMIT_THROTTLES.inc()
+        with self._lock:
+            self.throttle_events += 1
+            # Several in-flight calls usually hit the same limit together;
+            # halve once per second rather than once per failed call.
+            if now - self._last_decrease >= 1.0:
+                self._rate = max(float(Config.AI_RATE_LIMIT_MIN_RPS), self.rate / 2)
+                self._last_decrease = now
+            pause = hint if hint is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._blocked_until)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._grants if t >= now - _RATE_WINDOW)
+            return {
+                "rate_limit_rps": round(self.rate, 3),
+                "effective_rps": round(recent / _RATE_WINDOW, 3),
+                "blocked_for_s": round(max(0.0, self._blocked_until - now), 3),
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "throttle_events": self.throttle_events,
+                "queue_timeouts": self.timeouts,
+                "avg_queue_wait_ms": round(self.wait_seconds_total / self.acquired * 1000, 3) if self.acquired else None,
+                "max_queue_wait_ms": round(self.wait_seconds_max * 1000, 3),
+            }
+
+    def publish_metrics(self):
+        """Set the rate-limiter gauges from this limiter (a metrics collector)."""
+        stats = self.stats()
+        RATE_LIMIT_RPS.set(stats["rate_limit_rps"])
+        RATE_LIMIT_EFFECTIVE_RPS.set(stats["effective_rps"])
+        RATE_LIMIT_WAITING.set(stats["waiting"])
@@ -0,0 +1,94 @@
+import collections
+import hashlib
+import threading
+from app.config import Config
+from app.services.change_tracker import change_tracker
+
+
+class _Entry:
+    __slots__ = ("versions", "body", "etag")
+
+    def __init__(self, versions: tuple, body: bytes):
+        self.versions = versions
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Serialized bodies of read-mostly list responses.
+
+    Each entry remembers the change versions of the tables it was built from
+    (see ChangeTracker) and is dropped as soon as any of them moves on, so a
+    hit costs no SQL and no JSON encoding. At most RESPONSE_CACHE_MAX_ENTRIES
+    bodies totalling RESPONSE_CACHE_MAX_BYTES are kept, least recently used
+    first out; bodies over RESPONSE_CACHE_MAX_ENTRY_BYTES (e.g. pages of
+    thousands of rows) are not stored at all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, tables: tuple):
+        """Return the current entry for *key*, or None if missing or stale."""
+        key = (Config.DATABASE_PATH, key)
+        versions = change_tracker.versions(tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.versions != versions:
+                del self._entries[key]
+                self._bytes -= len(entry.body)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, versions: tuple, body: bytes) -> _Entry:
+        """Store *body*, built from tables at *versions* (read before querying them).
+
+        Returns the entry (for its ETag) even when *body* is too large to keep.
+        """
+        entry = _Entry(versions, body)
+        if len(body) > Config.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            return entry
+        key = (Config.DATABASE_PATH, key)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > 1 and (
+                len(self._entries) > Config.RESPONSE_CACHE_MAX_ENTRIES
+                or self._bytes > Config.RESPONSE_CACHE_MAX_BYTES
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": Config.RESPONSE_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Module-level singleton
+response_cache = ResponseCache()
@@ -0,0 +1,253 @@
+import itertools
+import math
+import re
+import threading
+import unicodedata
+from app.config import Config
+from app.models.database import get_db
+from app.services.change_tracker import change_tracker
+from app.utils.logger import logger
+
+# Tables the index is built from (see ChangeTracker).
+_TABLES = ("translations", "languages")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _trigrams(normalized: str) -> frozenset:
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _PairIndex:
+    """Exact and trigram indexes over the source texts of one language pair."""
+
+    def __init__(self):
+        self.exact = {}      # normalized source text -> set of translation ids
+        self.postings = {}   # trigram -> set of translation ids
+        self.grams = {}      # translation id -> frozenset of trigrams
+
+    def add(self, tid: int, normalized: str):
+        grams = _trigrams(normalized)
+        self.exact.setdefault(normalized, set()).add(tid)
+        self.grams[tid] = grams
+        for g in grams:
+            self.postings.setdefault(g, set()).add(tid)
+
+    def remove(self, tid: int, normalized: str):
+        ids = self.exact.get(normalized)
+        if ids is not None:
+            ids.discard(tid)
+            if not ids:
+                del self.exact[normalized]
+        for g in self.grams.pop(tid, ()):
+            ids = self.postings.get(g)
+            if ids is not None:
+                ids.discard(tid)
+                if not ids:
+                    del self.postings[g]
+
+    def candidates(self, query: frozenset, threshold: float, limit: int) -> list:
+        """Return up to *limit* (translation id, trigrams) pairs that may score *threshold*.
+
+        An entry with Dice similarity >= threshold shares at least
+        ceil(threshold * |query| / (2 - threshold)) trigrams with *query*, so it
+        holds one of the |query| - that + 1 rarest query trigrams; only their
+        postings are read (prefix filtering).
+        """
+        need = max(1, math.ceil(threshold * len(query) / (2 - threshold)))
+        rarest = sorted(query, key=lambda g: len(self.postings.get(g, ())))[:len(query) - need + 1]
+        found = set()
+        for g in rarest:
+            found.update(self.postings.get(g, ()))
+            if len(found) >= limit:
+                break
+        return [(tid, self.grams[tid]) for tid in itertools.islice(found, limit)]
+
+
+def _best_fuzzy(query: frozenset, candidates: list, threshold: float):
+    """Return (translation id, Dice similarity) of the closest candidate, or None."""
+    best = None
+    q = len(query)
+    for tid, grams in candidates:
+        score = 2.0 * len(query & grams) / (q + len(grams))
+        if score >= threshold and (best is None or score > best[1] or (score == best[1] and tid < best[0])):
+            best = (tid, score)
+    return best
+
+
+class TranslationMemory:
+    """In-memory translation memory over the curated ``translations`` table.
+
+    Source texts are indexed per (source_language_id, target_language_id) pair,
+    both verbatim (after normalization) and as character trigrams, so lookups
+    return exact matches immediately and near matches scored by Dice similarity.
+    The index is built lazily from the database. This process's Translation
+    writes update it in place; a change made by another worker moves the
+    tables' change version on (see ChangeTracker) and the index is reloaded
+    within CHANGE_CHECK_INTERVAL. Fuzzy matches are scored outside the lock,
+    over at most TM_MAX_CANDIDATES entries.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._path = None
+        self._versions = None
+        self.loads = 0
+        self._pairs = {}
+        self._entries = {}    # translation id -> (pair, normalized, source_text, translated_text)
+        self._languages = {}  # lower-cased language name / code -> language id
+
+    # ── loading ────────────────────────────────────────────────────────
+
+    def _ensure_loaded(self):
+        # Read the versions before the tables, so a concurrent write can only
+        # make the index look older than it is.
+        versions = change_tracker.versions(_TABLES)
+        if self._path == Config.DATABASE_PATH and versions == self._versions:
+            return
+        conn = get_db()
+        try:
+            languages = conn.execute("SELECT id, name, code FROM languages").fetchall()
+            rows = conn.execute(
+                "SELECT id, source_language_id, target_language_id, source_text, translated_text FROM translations"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        self._pairs = {}
+        self._entries = {}
+        self._languages = {}
+        for lang in languages:
+            self._languages[lang["name"].lower()] = lang["id"]
+            self._languages[lang["code"].lower()] = lang["id"]
+        for row in rows:
+            self._add(row["id"], row["source_language_id"], row["target_language_id"], row["source_text"], row["translated_text"])
+        self._path = Config.DATABASE_PATH
+        self._versions = versions
+        self.loads += 1
+        logger.info("Translation memory loaded %d entries", len(rows))
+
+    def _add(self, tid, source_language_id, target_language_id, source_text, translated_text):
+        pair = (source_language_id, target_language_id)
+        normalized = _normalize(source_text)
+        self._pairs.setdefault(pair, _PairIndex()).add(tid, normalized)
+        self._entries[tid] = (pair, normalized, source_text, translated_text)
+
+    def _remove(self, tid):
+        entry = self._entries.pop(tid, None)
+        if entry:
+            pair, normalized = entry[0], entry[1]
+            self._pairs[pair].remove(tid, normalized)
+
+    # ── model hooks ────────────────────────────────────────────────────
+    #
+    # *version* is the translations change version right after the write
+    # (read inside its transaction). The write is applied in place only when
+    # the index holds everything before it; otherwise the index is reloaded.
+
+    def _current_with(self, version: int) -> bool:
+        """Whether the index should apply the write that produced *version*."""
+        if self._path != Config.DATABASE_PATH or self._versions is None:
+            return False  # not loaded yet; the row is picked up on first lookup
+        loaded = self._versions[0]
+        if loaded >= version:
+            return False  # loaded after the write
+        if loaded != version - 1:
+            self._versions = None  # another worker wrote in between
+            return False
+        self._versions = (version,) + self._versions[1:]
+        return True
+
+    def _add_row(self, translation: dict):
+        self._add(
+            translation["id"],
+            translation["source_language_id"],
+            translation["target_language_id"],
+            translation["source_text"],
+            translation["translated_text"],
+        )
+
+    def add(self, translation: dict, version: int):
+        with self._lock:
+            if self._current_with(version):
+                self._add_row(translation)
+
+    def update(self, translation: dict, version: int):
+        with self._lock:
+            if self._current_with(version):
+                self._remove(translation["id"])
+                self._add_row(translation)
+
+    def remove(self, translation_id: int, version: int):
+        with self._lock:
+            if self._current_with(version):
+                self._remove(translation_id)
+
+    def invalidate(self):
+        """Drop the index so it is rebuilt from the database on next use."""
+        with self._lock:
+            self._path = None
+
+    # ── lookup ─────────────────────────────────────────────────────────
+
+    def lookup(self, text: str, source_language, target_language, min_similarity: float = None):
+        """Find the best stored translation of *text* for a language pair.
+
+        Languages may be given as ids, names or codes. Returns a dict with keys
+        translation_id, source_text, translated_text, match ("exact"/"fuzzy")
+        and score, or None when nothing scores at least *min_similarity*.
+        """
+        threshold = Config.TM_MIN_SIMILARITY if min_similarity is None else min_similarity
+        normalized = _normalize(text)
+        query = _trigrams(normalized)
+        with self._lock:
+            self._ensure_loaded()
+            pair = (self._language_id(source_language), self._language_id(target_language))
+            index = self._pairs.get(pair)
+            if index is None or not normalized:
+                return None
+
+            ids = index.exact.get(normalized)
+            if ids:
+                tid = min(ids)
+                _, _, source_text, translated_text = self._entries[tid]
+                return self._match(tid, source_text, translated_text, "exact", 1.0)
+            candidates = index.candidates(query, threshold, Config.TM_MAX_CANDIDATES)
+            entries = self._entries
+
+        best = _best_fuzzy(query, candidates, threshold)
+        entry = entries.get(best[0]) if best else None
+        if entry is None:
+            return None
+        return self._match(best[0], entry[2], entry[3], "fuzzy", best[1])
+
+    @staticmethod
+    def _match(tid, source_text, translated_text, match, score) -> dict:
+        return {
+            "translation_id": tid,
+            "source_text": source_text,
+            "translated_text": translated_text,
+            "match": match,
+            "score": round(score, 4),
+        }
+
+    def _language_id(self, language):
+        if isinstance(language, int):
+            return language
+        return self._languages.get(str(language).strip().lower())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._path is not None,
+                "entries": len(self._entries),
+                "language_pairs": len(self._pairs),
+            }
+
+
+# Module-level singleton
+translation_memory = TranslationMemory()
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import sqlite3
+from flask import request, abort, jsonify
+from app.utils.logger import logger
+
+# At most this many per-row errors are echoed back in a bulk response.
+MAX_REPORTED_ERRORS = 1000
+
+
+def _detect_format(content_type: str, filename: str = "") -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    filename = (filename or "").lower()
+    if content_type in ("text/csv", "application/csv") or filename.endswith(".csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines") \
+            or filename.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "json"
+
+
+def read_rows() -> tuple:
+    """Parse the bulk payload of the current request.
+
+    Accepts a JSON array, JSON Lines or CSV, either as the request body
+    (chosen by Content-Type) or as a multipart upload in the ``file`` field
+    (chosen by file extension). Returns (rows, errors) where rows is a list of
+    (row number, dict) and errors a list of {"row", "error"} dicts for lines
+    that could not be parsed. Row numbers start at 1.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        fmt = _detect_format(upload.mimetype, upload.filename)
+        text = upload.read().decode("utf-8-sig")
+    else:
+        fmt = _detect_format(request.content_type)
+        text = request.get_data(as_text=True)
+
+    if not text.strip():
+        abort(400, description="Request body must contain rows to import")
+
+    rows, errors = [], []
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            rows.append((n, {k: (v if v != "" else None) for k, v in row.items() if k}))
+    elif fmt == "jsonl":
+        n = 0
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append({"row": n, "error": f"Invalid JSON: {e.msg}"})
+                continue
+            if isinstance(row, dict):
+                rows.append((n, row))
+            else:
+                errors.append({"row": n, "error": "Each line must be a JSON object"})
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            abort(400, description="Request body must be a JSON array, JSON Lines or CSV")
+        if not isinstance(data, list):
+            abort(400, description="Request body must be a JSON array of objects")
+        for n, row in enumerate(data, start=1):
+            if isinstance(row, dict):
+                rows.append((n, row))
+            else:
+                errors.append({"row": n, "error": "Each item must be a JSON object"})
+    return rows, errors
+
+
+def atomic_requested() -> bool:
+    """True when ``?atomic=true`` asks for all-or-nothing imports."""
+    return request.args.get("atomic", "").lower() in ("true", "1", "yes")
+
+
+def bulk_response(inserted: int, errors: list, total: int):
+    """Build the JSON response summarizing a bulk import."""
+    errors = sorted(errors, key=lambda e: e["row"])
+    status = 201 if inserted and not errors else 200
+    if errors and not inserted:
+        status = 422
+    return jsonify({
+        "received": total,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }), status
+
+
+def text_field(row: dict, field: str):
+    """Return the stripped string value of *field*, or None when missing/blank."""
+    value = row.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def resolve_language(row: dict, id_field: str, ref_field: str, lookup: dict) -> int:
+    """Resolve a language reference given either as an id or as a code / name.
+
+    *lookup* is the result of Language.get_lookup(). Raises ValueError with a
+    row-level message when the language cannot be found.
+    """
+    raw_id = row.get(id_field)
+    if raw_id not in (None, ""):
+        try:
+            language_id = int(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{id_field}' must be an integer")
+        if language_id not in lookup["by_id"]:
+            raise ValueError(f"Language with id {language_id} not found")
+        return language_id
+
+    ref = text_field(row, ref_field)
+    if ref is None:
+        raise ValueError(f"'{id_field}' or '{ref_field}' is required")
+    language_id = lookup["by_key"].get(ref.lower())
+    if language_id is None:
+        raise ValueError(f"Language '{ref}' not found")
+    return language_id
+
+
+def finish_import(valid: list, errors: list, total: int, insert):
+    """Insert the validated rows with *insert* and build the response.
+
+    *valid* holds (row number, values) pairs. With ``?atomic=true`` nothing is
+    inserted when any row failed validation. A database error aborts the whole
+    transaction and is reported as 422.
+    """
+    if errors and atomic_requested():
+        return bulk_response(0, errors, total)
+    try:
+        inserted = insert([values for _, values in valid])
+    except sqlite3.IntegrityError as e:
+        logger.error("Bulk import rejected by the database: %s", e)
+        abort(422, description=f"Import rejected, no rows were inserted: {e}")
+    return bulk_response(inserted, errors, total)
@@ -25,6 +25,14 @@ def register_error_handlers(app):
         logger.error("Internal server error: %s", error)
         return jsonify({"error": "Internal server error", "message": str(error)}), 500
 
+    @app.errorhandler(503)
+    def service_unavailable(error):
+        logger.warning("Service unavailable: %s", error)
+        response = jsonify({"error": "Service unavailable", "message": str(error)})
+        if getattr(error, "retry_after", None) is not None:
+            response.headers["Retry-After"] = str(error.retry_after)
+        return response, 503
+
     @app.errorhandler(Exception)
     def handle_unexpected(error):
         logger.exception("Unhandled exception: %s", error)
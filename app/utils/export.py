@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import zlib
+from flask import Response, abort, request, stream_with_context
+
+# Flush the (optionally gzipped) output once this many bytes are buffered.
+_CHUNK_SIZE = 64 * 1024
+
+_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def _csv_lines(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # The header alone is still a valid (empty) export.
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _chunked(lines, compress: bool):
+    """Join text lines into ~_CHUNK_SIZE byte chunks, gzipping on the fly if asked."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        if gz:
+            data = gz.compress(data)
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= _CHUNK_SIZE:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if gz:
+        pending.append(gz.flush())
+    if pending:
+        yield b"".join(pending)
+
+
+def export_response(rows, fields: list, filename: str) -> Response:
+    """Stream *rows* (an iterator of dicts) as NDJSON or CSV.
+
+    Query params: format ("ndjson" or "csv", default "ndjson") and gzip
+    ("true" to gzip the body on the fly). A gzipped export is a .gz file
+    (application/gzip, no Content-Encoding), so clients save it compressed
+    rather than transparently decoding it. Memory use stays constant because
+    rows are encoded and sent as they are read.
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in _MIMETYPES:
+        abort(400, description="Query param 'format' must be 'ndjson' or 'csv'")
+    compress = request.args.get("gzip", "").lower() in ("true", "1", "yes")
+
+    lines = _csv_lines(rows, fields) if fmt == "csv" else _ndjson_lines(rows)
+    filename = f"{filename}.{fmt}.gz" if compress else f"{filename}.{fmt}"
+    return Response(
+        stream_with_context(_chunked(lines, compress)),
+        mimetype="application/gzip" if compress else _MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,57 @@
+import functools
+from urllib.parse import urlencode
+from flask import Response, make_response, request
+from app.config import Config
+from app.services.change_tracker import change_tracker
+from app.services.response_cache import response_cache
+from app.utils.metrics import metrics
+
+RESPONSE_CACHE_REQUESTS = metrics.counter(
+    "speaksmart_response_cache_requests_total",
+    "Cacheable list requests by route and result (hit, miss, not_modified)",
+    ("route", "result"),
+)
+
+
+def cached_response(*tables):
+    """Serve a GET list view from the response cache.
+
+    The view's JSON body is cached per path and query string until one of
+    *tables* changes. Responses carry a strong ETag of the body and
+    Cache-Control (no-cache, or public with RESPONSE_CACHE_MAX_AGE), and a
+    request whose If-None-Match matches gets 304 Not Modified without the
+    view running. Non-200 responses are passed through uncached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not Config.RESPONSE_CACHE_ENABLED:
+                return view(*args, **kwargs)
+            key = request.path + "?" + urlencode(sorted(request.args.items(multi=True)))
+            entry = response_cache.get(key, tables)
+            result = "hit"
+            if entry is None:
+                # Read the versions before the view queries, so a concurrent
+                # write can only make the entry look older than it is.
+                versions = change_tracker.versions(tables)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or not response.is_json:
+                    return response
+                entry = response_cache.put(key, versions, response.get_data())
+                result = "miss"
+
+            if request.if_none_match.contains_weak(entry.etag):
+                response = Response(status=304)
+                result = "not_modified"
+            else:
+                response = Response(entry.body, mimetype="application/json")
+            response.set_etag(entry.etag)
+            if Config.RESPONSE_CACHE_MAX_AGE > 0:
+                response.cache_control.public = True
+                response.cache_control.max_age = Config.RESPONSE_CACHE_MAX_AGE
+            else:
+                response.cache_control.no_cache = True
+            RESPONSE_CACHE_REQUESTS.inc(route=request.url_rule.rule, result=result)
+            return response
+        return wrapper
+    return decorator
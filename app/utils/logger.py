@@ -37,4 +37,27 @@ def setup_logger(name: str = "speaksmart") -> logging.Logger:
     return logger
 
 
+def setup_slow_request_logger(name: str = "speaksmart.slow") -> logging.Logger:
+    """Configure and return the slow-request logger.
+
+    Logs to logs/slow_requests.log (created on the first slow request) and
+    propagates to the application logger.
+    """
+    slow = logging.getLogger(name)
+    if slow.handlers:
+        return slow
+
+    slow.setLevel(logging.INFO)
+    log_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "logs",
+    )
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(os.path.join(log_dir, "slow_requests.log"), delay=True)
+    file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+    slow.addHandler(file_handler)
+    return slow
+
+
 logger = setup_logger()
+slow_logger = setup_slow_request_logger()
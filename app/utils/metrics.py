@@ -0,0 +1,447 @@
+import atexit
+import bisect
+import contextlib
+import functools
+import glob
+import inspect
+import json
+import os
+import threading
+import time
+from flask import Response, g, request
+from app.config import Config
+from app.utils.logger import logger
+from app.utils.timing import add_span, span
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process only
+    fcntl = None
+
+# Latency buckets (seconds) for HTTP requests and Gemini calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Finer buckets for SQLite queries.
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Counters and histograms of exited workers, kept in METRICS_MULTIPROC_DIR.
+_ARCHIVE = "archive.json"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), v] for k, v in self._values.items()]
+        return {"type": self.kind, "help": self.documentation, "labelnames": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, the last one being +Inf; sum.
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), [list(v[0]), v[1]]] for k, v in self._values.items()]
+        data = super().snapshot()
+        data["values"] = values
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    """Process-local metrics, rendered in the Prometheus text format.
+
+    Updates only touch an in-memory dict under a per-metric lock, so the hot
+    path stays cheap. With METRICS_MULTIPROC_DIR set, every worker process
+    writes a snapshot of its metrics to that directory every
+    METRICS_FLUSH_INTERVAL seconds (and when scraped); a scrape of any worker
+    merges all snapshots, summing counters, histograms and the gauges of live
+    processes. An exited worker's counters and histograms are folded into a
+    single archive file and its snapshot is deleted (on the next scrape, or
+    at once from gunicorn's child_exit hook via mark_process_dead), so
+    totals never go back and the directory does not grow with every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+        self._flusher = None
+        self._pid = os.getpid()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets)
+
+    def on_collect(self, callback):
+        """Call *callback* before every snapshot, e.g. to set gauges that are
+        derived from state kept elsewhere."""
+        with self._lock:
+            self._collectors.append(callback)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            collectors = list(self._collectors)
+        for callback in collectors:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning("Metrics collector %r failed: %s", callback, e)
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}
+
+    def reset(self):
+        """Drop every recorded value (used after a fork and by tests)."""
+        with self._lock:
+            for metric in self._metrics.values():
+                metric._reset()
+
+    # ── multi-process snapshots ────────────────────────────────────────
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(Config.METRICS_MULTIPROC_DIR, f"metrics-{pid}.json")
+
+    def write_snapshot(self):
+        """Write this process's snapshot to METRICS_MULTIPROC_DIR (if set)."""
+        if not Config.METRICS_MULTIPROC_DIR:
+            return
+        os.makedirs(Config.METRICS_MULTIPROC_DIR, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def start(self):
+        """Start the background snapshot writer when running multi-process."""
+        if not Config.METRICS_MULTIPROC_DIR:
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name="speaksmart-metrics", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(Config.METRICS_FLUSH_INTERVAL)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning("Could not write metrics snapshot: %s", e)
+
+    @contextlib.contextmanager
+    def _directory_lock(self):
+        # Serializes archiving with scrapes in other workers, so a dead
+        # worker's values are never counted twice.
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(Config.METRICS_MULTIPROC_DIR, _ARCHIVE + ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _archive(self, pid: int):
+        """Fold *pid*'s snapshot into the archive and delete it (lock held)."""
+        path = self._snapshot_path(pid)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except OSError:
+            return
+        except ValueError:
+            snapshot = {}  # unreadable; nothing to keep
+        archive_path = os.path.join(Config.METRICS_MULTIPROC_DIR, _ARCHIVE)
+        archive = _read(archive_path)
+        for name, data in snapshot.items():
+            if data["type"] != "gauge":
+                _merge(archive, name, data)
+        tmp = f"{archive_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(archive, f)
+        os.replace(tmp, archive_path)
+        for leftover in (path, f"{path}.tmp"):
+            try:
+                os.unlink(leftover)
+            except FileNotFoundError:
+                pass
+
+    def mark_process_dead(self, pid: int):
+        """Archive the snapshot of the exited worker *pid*.
+
+        Call it from gunicorn's ``child_exit`` server hook; otherwise the next
+        scrape does it.
+        """
+        if not Config.METRICS_MULTIPROC_DIR or not os.path.isdir(Config.METRICS_MULTIPROC_DIR):
+            return
+        with self._directory_lock():
+            self._archive(pid)
+
+    def _after_fork(self):
+        # The child starts from zero (the parent keeps reporting its own
+        # values) and needs fresh locks and its own writer thread.
+        self._lock = threading.Lock()
+        self._flusher = None
+        self.reset()
+        self.start()
+
+    def _collect(self) -> dict:
+        if not Config.METRICS_MULTIPROC_DIR:
+            return self.snapshot()
+        self.write_snapshot()
+        merged = {}
+        with self._directory_lock():
+            for path in glob.glob(os.path.join(Config.METRICS_MULTIPROC_DIR, "metrics-*.json")):
+                try:
+                    pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+                except ValueError:
+                    continue
+                if not _pid_alive(pid):
+                    self._archive(pid)
+                    continue
+                for name, data in _read(path).items():
+                    _merge(merged, name, data)
+            for name, data in _read(os.path.join(Config.METRICS_MULTIPROC_DIR, _ARCHIVE)).items():
+                _merge(merged, name, data)
+        return merged
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for name, data in sorted(self._collect().items()):
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            labelnames = data["labelnames"]
+            for labelvalues, value in sorted(data["values"], key=lambda v: v[0]):
+                labels = list(zip(labelnames, labelvalues))
+                if data["type"] != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(data["buckets"] + ["+Inf"], counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _merge(merged: dict, name: str, data: dict):
+    target = merged.get(name)
+    if target is None:
+        merged[name] = {**data, "values": [[k, v] for k, v in data["values"]]}
+        return
+    index = {tuple(entry[0]): entry for entry in target["values"]}
+    for labelvalues, value in data["values"]:
+        entry = index.get(tuple(labelvalues))
+        if entry is None:
+            target["values"].append([labelvalues, value])
+            index[tuple(labelvalues)] = target["values"][-1]
+        elif data["type"] == "histogram":
+            entry[1] = [[a + b for a, b in zip(entry[1][0], value[0])], entry[1][1] + value[1]]
+        else:
+            entry[1] += value
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Module-level singleton
+metrics = MetricsRegistry()
+os.register_at_fork(after_in_child=metrics._after_fork)
+atexit.register(lambda: Config.METRICS_MULTIPROC_DIR and metrics.write_snapshot())
+
+HTTP_REQUESTS = metrics.histogram(
+    "speaksmart_http_request_duration_seconds",
+    "HTTP request latency until the response headers are ready, by route and status",
+    ("method", "route", "status"),
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "speaksmart_http_requests_in_flight",
+    "HTTP requests currently being handled, by route",
+    ("route",),
+)
+DB_QUERIES = metrics.histogram(
+    "speaksmart_db_query_duration_seconds",
+    "Time spent in data-access methods, by model method",
+    ("method",),
+    buckets=DB_BUCKETS,
+)
+
+
+def instrument_queries(cls):
+    """Class decorator timing every public static method of a model into
+    DB_QUERIES and the request's "db" Server-Timing span.
+
+    Generator methods (e.g. iter_all) are timed over their whole iteration.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not isinstance(attr, staticmethod):
+            continue
+        setattr(cls, name, staticmethod(_timed(attr.__func__, f"{cls.__name__}.{name}")))
+    return cls
+
+
+def _timed(fn, label: str):
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                yield from fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                DB_QUERIES.observe(elapsed, method=label)
+                add_span("db", elapsed)
+        return generator
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span("db"):
+                return fn(*args, **kwargs)
+        finally:
+            DB_QUERIES.observe(time.perf_counter() - started, method=label)
+    return wrapper
+
+
+def register_metrics(app):
+    """Instrument every request of *app* and serve GET /metrics."""
+    if not Config.METRICS_ENABLED:
+        return
+    metrics.start()
+
+    @app.before_request
+    def start_timer():
+        if request.path == "/metrics":
+            return
+        g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(route=g.metrics_route)
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            HTTP_REQUESTS.observe(
+                time.perf_counter() - started,
+                method=request.method, route=g.metrics_route, status=response.status_code,
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        route = g.pop("metrics_route", None)
+        if route is not None:
+            HTTP_IN_FLIGHT.dec(route=route)
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
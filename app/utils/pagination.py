@@ -0,0 +1,62 @@
+import base64
+import binascii
+from flask import request, abort
+from app.config import Config
+
+
+def page_args(default_limit: int = None) -> tuple:
+    """Read keyset pagination query parameters from the current request.
+
+    Returns (limit, after, include_total). ``limit`` is clamped to
+    1..PAGE_SIZE_MAX, ``after`` is the raw cursor string (or None) and
+    ``include_total`` is true when ``?total=true`` was given.
+    """
+    limit = request.args.get("limit", default_limit or Config.PAGE_SIZE_DEFAULT, type=int)
+    limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+    after = request.args.get("after") or None
+    include_total = request.args.get("total", "").lower() in ("true", "1", "yes")
+    return limit, after, include_total
+
+
+def id_cursor(after):
+    """Parse an id cursor, aborting with 400 when it is not an integer."""
+    if after is None:
+        return None
+    try:
+        return int(after)
+    except ValueError:
+        abort(400, description="Invalid 'after' cursor")
+
+
+def encode_cursor(*values) -> str:
+    """Encode a compound keyset cursor as an opaque URL-safe token."""
+    raw = ",".join(str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, parts: int) -> list:
+    """Decode a token from encode_cursor(), aborting with 400 when malformed."""
+    if token is None:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").rsplit(",", parts - 1)
+    except (binascii.Error, UnicodeError, ValueError):
+        values = []
+    if len(values) != parts:
+        abort(400, description="Invalid 'after' cursor")
+    return values
+
+
+def paginate(fetch, limit: int, cursor_of) -> tuple:
+    """Fetch one page and the cursor of the next one.
+
+    *fetch* is called with ``limit + 1`` so a following page can be detected
+    without a COUNT; *cursor_of* turns the last row of the page into the
+    ``next_cursor`` value. Returns (rows, next_cursor).
+    """
+    rows = fetch(limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, cursor_of(rows[-1])
+    return rows, None
@@ -0,0 +1,65 @@
+import html
+import re
+from flask import request, abort
+from app.config import Config
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into a safe FTS5 query.
+
+    Every whitespace-separated term becomes a quoted phrase (so punctuation
+    and FTS5 operators in user input are taken literally) and all terms must
+    match. A trailing ``*`` on a term keeps its prefix-search meaning.
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith("*")
+        term = re.sub(r'["*]', "", term)
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+# FTS5 snippet() delimiters: control characters that never occur in stored
+# text. highlight() swaps them for <mark> tags once the text is escaped.
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+def highlight(rows: list, *fields) -> list:
+    """HTML-escape the snippet *fields* of *rows* and mark their matches.
+
+    Snippets are taken with MARK_START / MARK_END around matched terms, so
+    the stored text can be escaped without touching the highlighting and
+    only the <mark> tags reach the client as markup.
+    """
+    for row in rows:
+        for field in fields:
+            if row.get(field) is not None:
+                row[field] = html.escape(row[field]).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return rows
+
+
+def search_args() -> tuple:
+    """Read ``q``, ``limit`` and ``offset`` for a search endpoint.
+
+    Returns (match, limit, offset) where match is the FTS5 query built from
+    ``q``; aborts with 400 when ``q`` has no searchable terms.
+    """
+    match = fts_query(request.args.get("q", ""))
+    if not match:
+        abort(400, description="Query param 'q' is required")
+    limit = request.args.get("limit", Config.PAGE_SIZE_DEFAULT, type=int)
+    limit = max(1, min(limit, Config.PAGE_SIZE_MAX))
+    offset = max(0, request.args.get("offset", 0, type=int))
+    return match, limit, offset
+
+
+def search_page(search, limit: int, offset: int) -> tuple:
+    """Run *search(limit, offset)* for one extra row to detect a next page.
+
+    Returns (rows, next_offset) where next_offset is None on the last page.
+    """
+    rows = search(limit + 1, offset)
+    if len(rows) > limit:
+        return rows[:limit], offset + limit
+    return rows, None
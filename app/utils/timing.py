@@ -0,0 +1,139 @@
+import contextlib
+import time
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from app.config import Config
+from app.utils.logger import slow_logger
+
+
+class _RequestTiming:
+    """Accumulated span durations of the current request."""
+
+    __slots__ = ("started", "totals", "counts", "active", "status")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.counts = {}
+        self.active = set()
+        self.status = None
+
+    def add(self, name: str, seconds: float):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed_ms(), 3),
+            "spans": {
+                name: {"ms": round(seconds * 1000, 3), "count": self.counts[name]}
+                for name, seconds in self.totals.items()
+            },
+        }
+
+    def header(self) -> str:
+        parts = [
+            f'{name};dur={seconds * 1000:.3f};desc="{self.counts[name]}x"'
+            for name, seconds in self.totals.items()
+        ]
+        parts.append(f"total;dur={self.elapsed_ms():.3f}")
+        return ", ".join(parts)
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get("timing")
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """Time the enclosed block as span *name* of the current request.
+
+    A no-op outside a request (e.g. in background threads). Nested spans of
+    the same name (a model method calling another) are counted once.
+    """
+    timing = _current()
+    if timing is None or name in timing.active:
+        yield
+        return
+    timing.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.active.discard(name)
+        timing.add(name, time.perf_counter() - started)
+
+
+def add_span(name: str, seconds: float):
+    """Add an already measured duration to span *name* of the current request."""
+    timing = _current()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that records serialization as the "serialize" span."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        with span("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def register_timing(app):
+    """Emit a Server-Timing header on every response of *app*.
+
+    Spans: db (model methods), cache (AI result cache), ai (Gemini calls),
+    parse (model output parsing) and serialize (JSON encoding), plus total.
+    With DEBUG_TIMING on, a request sending "X-Debug-Timing: 1" also gets the
+    breakdown as a "debug_timing" key in its JSON body. Requests slower than
+    SLOW_REQUEST_MS are written to the slow-request log.
+    """
+    if not Config.SERVER_TIMING_ENABLED:
+        return
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timing():
+        g.timing = _RequestTiming()
+
+    @app.after_request
+    def add_server_timing(response):
+        timing = g.get("timing")
+        if timing is None:
+            return response
+        timing.status = response.status_code
+        wants_body = request.headers.get("X-Debug-Timing", "").lower() in ("true", "1", "yes")
+        if Config.DEBUG_TIMING and wants_body and response.is_json and not response.is_streamed:
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body["debug_timing"] = timing.summary()
+                response.set_data(app.json.dumps(body))
+                if "ETag" in response.headers:
+                    # The ETag (e.g. from cached_response) described the
+                    # original body; this one is never the same twice.
+                    response.add_etag(overwrite=True)
+                    response.cache_control.no_store = True
+        response.headers["Server-Timing"] = timing.header()
+        return response
+
+    @app.teardown_request
+    def log_slow_request(error=None):
+        timing = g.pop("timing", None)
+        if timing is None:
+            return
+        elapsed = timing.elapsed_ms()
+        if elapsed < Config.SLOW_REQUEST_MS:
+            return
+        spans = " ".join(
+            f"{name}={seconds * 1000:.1f}ms/{timing.counts[name]}"
+            for name, seconds in timing.totals.items()
+        )
+        slow_logger.warning(
+            "Slow request %s %s -> %s in %.1f ms [%s]",
+            request.method, request.path, timing.status or "error", elapsed, spans or "no spans",
+        )
@@ -0,0 +1,4 @@
+"""Load and latency benchmarks for the SpeakSmart HTTP API.
+
+Run with:  python -m benchmarks.run --help
+"""
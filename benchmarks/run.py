@@ -0,0 +1,399 @@
+"""Load and latency benchmark for the SpeakSmart HTTP API.
+
+Starts the app on a local threaded HTTP server backed by a fresh temporary
+database and the offline "local" AI provider instead of Gemini, drives a
+weighted mix of requests at a fixed concurrency and reports throughput and
+p50/p95/p99 latency per route. Results are written as JSON; given a baseline
+file, the run fails (exit status 1) when a route got slower, or the overall
+throughput dropped, by more than the threshold.
+
+Examples:
+    python -m benchmarks.run --mix mixed --concurrency 16 --duration 30
+    python -m benchmarks.run --output benchmarks/results/new.json \\
+        --baseline benchmarks/results/main.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.scenarios import SCENARIOS, load_mix, seed  # noqa: E402
+
+# Latency percentiles reported per route and checked against a baseline.
+PERCENTILES = (50, 95, 99)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark the SpeakSmart HTTP API against the offline AI provider.",
+    )
+    load = parser.add_argument_group("load")
+    load.add_argument("--mix", default="mixed",
+                      help="request mix: crud, ai, mixed, or a JSON file of {scenario: weight} (default: mixed)")
+    load.add_argument("--concurrency", type=int, default=8, help="concurrent clients (default: 8)")
+    load.add_argument("--duration", type=float, default=20.0, help="measured seconds (default: 20)")
+    load.add_argument("--requests", type=int, default=None,
+                      help="stop after this many measured requests instead of after --duration")
+    load.add_argument("--warmup", type=float, default=2.0,
+                      help="seconds of traffic before measuring starts (default: 2)")
+    load.add_argument("--seed", type=int, default=1, help="seed for the request mix and AI provider (default: 1)")
+
+    data = parser.add_argument_group("data")
+    data.add_argument("--translations", type=int, default=2000, help="seeded translations (default: 2000)")
+    data.add_argument("--rules-per-language", type=int, default=50, help="seeded grammar rules per language (default: 50)")
+
+    ai = parser.add_argument_group("local AI provider")
+    ai.add_argument("--ai-latency-ms", type=float, default=200.0, help="median / mean call latency (default: 200)")
+    ai.add_argument("--ai-latency-dist", default="lognormal",
+                    choices=("fixed", "uniform", "normal", "lognormal", "exponential"),
+                    help="call latency distribution (default: lognormal)")
+    ai.add_argument("--ai-jitter", type=float, default=0.3, help="spread of the latency distribution (default: 0.3)")
+    ai.add_argument("--ai-error-rate", type=float, default=0.0, help="share of calls failing with a 500")
+    ai.add_argument("--ai-429-rate", type=float, default=0.0, help="share of calls failing with a 429")
+    ai.add_argument("--ai-rps", type=float, default=1000.0,
+                    help="AI_RATE_LIMIT_RPS/MAX_RPS for the run (default: 1000, i.e. not the bottleneck)")
+    ai.add_argument("--no-ai-cache", action="store_true", help="disable the AI result cache")
+
+    report = parser.add_argument_group("report")
+    report.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"),
+                        help="where to write the JSON results (default: benchmarks/results/latest.json)")
+    report.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    report.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown that counts as a regression (default: 0.2 = 20%%)")
+    report.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore latency changes smaller than this, whatever the ratio (default: 1.0)")
+    report.add_argument("--min-samples", type=int, default=20,
+                        help="routes with fewer measured requests in either run are not compared (default: 20)")
+    return parser
+
+
+# ── statistics ─────────────────────────────────────────────────────────
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile *q* (0-100) of the sorted list *values*."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """Aggregate (route, latency ms, status) samples measured over *elapsed* seconds."""
+    by_route = {}
+    for route, ms, status in samples:
+        by_route.setdefault(route, []).append((ms, status))
+
+    routes = {}
+    for route, entries in sorted(by_route.items()):
+        latencies = sorted(ms for ms, _ in entries)
+        statuses = {}
+        for _, status in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(n for status, n in statuses.items() if not status.isdigit() or int(status) >= 400)
+        stats = {
+            "count": len(entries),
+            "errors": errors,
+            "error_rate": round(errors / len(entries), 4),
+            "throughput_rps": round(len(entries) / elapsed, 3) if elapsed else None,
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "max_ms": round(latencies[-1], 3),
+            "status": statuses,
+        }
+        for q in PERCENTILES:
+            stats[f"p{q}_ms"] = round(percentile(latencies, q), 3)
+        routes[route] = stats
+
+    latencies = sorted(ms for _, ms, _ in samples)
+    errors = sum(r["errors"] for r in routes.values())
+    total = {
+        "count": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed else None,
+    }
+    for q in PERCENTILES:
+        total[f"p{q}_ms"] = round(percentile(latencies, q), 3) if latencies else None
+    return {"total": total, "routes": routes}
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 1.0, min_samples: int = 20) -> list:
+    """Return a description of every regression of *current* against *baseline* results.
+
+    A route regresses when one of its latency percentiles grew by more than
+    *threshold* (relative) and more than *min_delta_ms*; the run regresses
+    when its total throughput fell by more than *threshold*. Routes measured
+    fewer than *min_samples* times in either run are skipped as too noisy.
+    """
+    regressions = []
+    for route, now in sorted(current["routes"].items()):
+        before = baseline.get("routes", {}).get(route)
+        if not before or min(now["count"], before["count"]) < min_samples:
+            continue
+        for q in PERCENTILES:
+            key = f"p{q}_ms"
+            old, new = before.get(key), now.get(key)
+            if old is None or new is None:
+                continue
+            if new - old > min_delta_ms and new > old * (1 + threshold):
+                regressions.append(f"{route}: {key} {old:.1f} -> {new:.1f} ({(new / old - 1) * 100 if old else float('inf'):+.0f}%)")
+
+    old_rps = baseline.get("total", {}).get("throughput_rps")
+    new_rps = current["total"].get("throughput_rps")
+    if old_rps and new_rps is not None and new_rps < old_rps * (1 - threshold):
+        regressions.append(f"total: throughput_rps {old_rps:.1f} -> {new_rps:.1f} ({(new_rps / old_rps - 1) * 100:+.0f}%)")
+    return regressions
+
+
+# ── running ────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def _patched(obj, **values):
+    """Temporarily set attributes of *obj*."""
+    saved = {name: getattr(obj, name) for name in values}
+    for name, value in values.items():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(obj, name, value)
+
+
+@contextlib.contextmanager
+def _quiet_console():
+    """Keep per-request INFO logging off the console while the load runs."""
+    handlers = [h for h in logging.getLogger("speaksmart").handlers if type(h) is logging.StreamHandler]
+    levels = [h.level for h in handlers]
+    for h in handlers:
+        h.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        for h, level in zip(handlers, levels):
+            h.setLevel(level)
+
+
+@contextlib.contextmanager
+def benchmark_server(args):
+    """Run the app on 127.0.0.1 against a seeded temporary database and the local AI provider.
+
+    Yields (port, scenario context, provider). Config and the AI service are
+    restored afterwards, so the runner can be used from tests.
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app.config import Config
+
+    workdir = tempfile.mkdtemp(prefix="speaksmart-bench-")
+    overrides = {
+        "DATABASE_PATH": os.path.join(workdir, "bench.db"),
+        "AI_CACHE_PATH": os.path.join(workdir, "bench.cache.db"),
+        "AI_CACHE_ENABLED": not args.no_ai_cache,
+        "AI_RATE_LIMIT_RPS": args.ai_rps,
+        "AI_RATE_LIMIT_MAX_RPS": args.ai_rps,
+        "AI_RATE_LIMIT_BURST": max(int(Config.AI_RATE_LIMIT_BURST), int(args.ai_rps)),
+        "AI_LOCAL_LATENCY_MS": args.ai_latency_ms,
+        "AI_LOCAL_LATENCY_DIST": args.ai_latency_dist,
+        "AI_LOCAL_LATENCY_JITTER": args.ai_jitter,
+        "AI_LOCAL_ERROR_RATE": args.ai_error_rate,
+        "AI_LOCAL_RATE_LIMIT_RATE": args.ai_429_rate,
+        "AI_LOCAL_SEED": args.seed,
+    }
+    with contextlib.ExitStack() as stack:
+        stack.callback(shutil.rmtree, workdir, True)
+        stack.enter_context(_patched(Config, **overrides))
+        stack.enter_context(_quiet_console())
+
+        from app import create_app
+        from app.models.database import close_pools
+        from app.models.grammar_rule import GrammarRule
+        from app.models.language import Language
+        from app.models.translation import Translation
+        from app.services.ai_service import ai_service
+        from app.services.circuit_breaker import CircuitBreaker
+        from app.services.history_writer import history_writer
+        from app.services.providers import LocalProvider
+        from app.services.rate_limiter import AdaptiveRateLimiter
+
+        app = create_app()
+        stack.callback(close_pools)
+        ctx = seed((Language, Translation, GrammarRule), args.translations, args.rules_per_language)
+
+        provider = LocalProvider()
+        stack.enter_context(_patched(
+            ai_service, provider=provider, limiter=AdaptiveRateLimiter(), breaker=CircuitBreaker("gemini"),
+        ))
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *a, **kw):
+                pass
+
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        thread = threading.Thread(target=server.serve_forever, name="speaksmart-bench-server", daemon=True)
+        thread.start()
+        stack.callback(history_writer.flush)
+        stack.callback(server.server_close)
+        stack.callback(server.shutdown)
+        yield server.server_port, ctx, provider
+
+
+def _client(port: int, ctx: dict, mix: dict, rng: random.Random, plan: dict, samples: list, lock: threading.Lock):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while True:
+        with lock:
+            if plan["stop"]:
+                return
+        name = rng.choices(names, weights)[0]
+        method, path, body = SCENARIOS[name](ctx, rng)
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            status = type(e).__name__
+        finally:
+            conn.close()
+        finished = time.perf_counter()
+
+        with lock:
+            if started < plan["measure_from"]:
+                continue
+            if plan["limit"] is not None and len(samples) >= plan["limit"]:
+                plan["stop"] = True
+                continue
+            samples.append((name, (finished - started) * 1000, status))
+
+
+def run(args) -> dict:
+    """Run one benchmark described by parsed *args* and return its results."""
+    mix = load_mix(args.mix)
+    started_at = datetime.now(timezone.utc)
+    samples, lock = [], threading.Lock()
+    with benchmark_server(args) as (port, ctx, provider):
+        begin = time.perf_counter()
+        plan = {"stop": False, "measure_from": begin + args.warmup, "limit": args.requests}
+        clients = [
+            threading.Thread(
+                target=_client,
+                args=(port, ctx, mix, random.Random(args.seed * 1000 + i), plan, samples, lock),
+                name=f"speaksmart-bench-client-{i}",
+                daemon=True,
+            )
+            for i in range(max(1, args.concurrency))
+        ]
+        for t in clients:
+            t.start()
+        if args.requests is None:
+            time.sleep(args.warmup + args.duration)
+            with lock:
+                plan["stop"] = True
+        for t in clients:
+            t.join()
+        elapsed = time.perf_counter() - plan["measure_from"]
+        if args.requests is None:
+            elapsed = min(elapsed, args.duration)
+        provider_stats = provider.stats()
+
+    results = summarize(samples, max(elapsed, 1e-9))
+    results["meta"] = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "measured_seconds": round(elapsed, 3),
+        "mix": {"name": args.mix, "weights": mix},
+        "concurrency": args.concurrency,
+        "warmup_seconds": args.warmup,
+        "seed": args.seed,
+        "data": {"translations": args.translations, "rules_per_language": args.rules_per_language},
+        "ai": {
+            "provider": provider.name,
+            "latency_ms": args.ai_latency_ms,
+            "latency_dist": args.ai_latency_dist,
+            "jitter": args.ai_jitter,
+            "error_rate": args.ai_error_rate,
+            "rate_limit_rate": args.ai_429_rate,
+            "ai_rps": args.ai_rps,
+            "ai_cache": not args.no_ai_cache,
+            **provider_stats,
+        },
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def format_report(results: dict) -> str:
+    """Render *results* as a fixed-width table."""
+    header = f"{'route':<34} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    lines = [header, "-" * len(header)]
+    rows = list(results["routes"].items()) + [("TOTAL", results["total"])]
+    for route, r in rows:
+        lines.append(
+            f"{route:<34} {r['count']:>7} {r['throughput_rps'] or 0:>8.1f} "
+            f"{r['p50_ms'] or 0:>9.1f} {r['p95_ms'] or 0:>9.1f} {r['p99_ms'] or 0:>9.1f} {r['errors']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        results = run(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(format_report(results))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms, args.min_samples)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
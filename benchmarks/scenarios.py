@@ -0,0 +1,278 @@
+"""Seed data and weighted request mixes for the benchmark runner.
+
+A scenario is a named request template: ``build(ctx, rng)`` returns
+(method, path, json body or None). Names double as the route labels results
+are reported under. A mix maps scenario names to relative weights.
+"""
+
+import json
+import os
+
+# Parallel sentences used both as seed data (which also trains the local
+# language detector) and as AI request texts. AI texts repeat across
+# requests, so the result cache sees a realistic share of hits.
+CORPUS = {
+    "en": [
+        "Good morning, how are you today?",
+        "The train to the city leaves at eight o'clock.",
+        "Could you please send me the report before Friday?",
+        "We are looking forward to seeing you at the meeting.",
+        "The weather is beautiful and the sun is shining.",
+        "I would like to book a table for two people tonight.",
+        "Please remember to save your work before leaving the office.",
+        "The children are playing football in the park.",
+        "This restaurant serves the best fish in town.",
+        "My sister is studying medicine at the university.",
+        "Thank you very much for your help with the project.",
+        "The museum is closed on Mondays and public holidays.",
+    ],
+    "es": [
+        "Buenos días, ¿cómo estás hoy?",
+        "El tren a la ciudad sale a las ocho en punto.",
+        "¿Podrías enviarme el informe antes del viernes, por favor?",
+        "Esperamos verte en la reunión.",
+        "El tiempo es hermoso y el sol está brillando.",
+        "Me gustaría reservar una mesa para dos personas esta noche.",
+        "Por favor, recuerda guardar tu trabajo antes de salir de la oficina.",
+        "Los niños están jugando al fútbol en el parque.",
+        "Este restaurante sirve el mejor pescado de la ciudad.",
+        "Mi hermana está estudiando medicina en la universidad.",
+        "Muchas gracias por tu ayuda con el proyecto.",
+        "El museo está cerrado los lunes y los días festivos.",
+    ],
+    "fr": [
+        "Bonjour, comment allez-vous aujourd'hui ?",
+        "Le train pour la ville part à huit heures.",
+        "Pourriez-vous m'envoyer le rapport avant vendredi, s'il vous plaît ?",
+        "Nous avons hâte de vous voir à la réunion.",
+        "Il fait beau et le soleil brille.",
+        "Je voudrais réserver une table pour deux personnes ce soir.",
+        "N'oubliez pas d'enregistrer votre travail avant de quitter le bureau.",
+        "Les enfants jouent au football dans le parc.",
+        "Ce restaurant sert le meilleur poisson de la ville.",
+        "Ma sœur étudie la médecine à l'université.",
+        "Merci beaucoup pour votre aide avec le projet.",
+        "Le musée est fermé le lundi et les jours fériés.",
+    ],
+    "de": [
+        "Guten Morgen, wie geht es dir heute?",
+        "Der Zug in die Stadt fährt um acht Uhr ab.",
+        "Könnten Sie mir bitte den Bericht vor Freitag schicken?",
+        "Wir freuen uns darauf, Sie bei der Besprechung zu sehen.",
+        "Das Wetter ist schön und die Sonne scheint.",
+        "Ich möchte heute Abend einen Tisch für zwei Personen reservieren.",
+        "Bitte denken Sie daran, Ihre Arbeit zu speichern, bevor Sie das Büro verlassen.",
+        "Die Kinder spielen Fußball im Park.",
+        "Dieses Restaurant serviert den besten Fisch der Stadt.",
+        "Meine Schwester studiert Medizin an der Universität.",
+        "Vielen Dank für Ihre Hilfe bei dem Projekt.",
+        "Das Museum ist montags und an Feiertagen geschlossen.",
+    ],
+}
+
+LANGUAGES = [("English", "en"), ("Spanish", "es"), ("French", "fr"), ("German", "de")]
+
+GRAMMAR_RULES = [
+    ("Subject-verb agreement", "The verb must agree with its subject in number.",
+     "She walks to school.", "She walk to school."),
+    ("Articles", "Use 'an' before words starting with a vowel sound.",
+     "An apple a day.", "A apple a day."),
+    ("Past tense", "Regular verbs form the past tense with -ed.",
+     "I walked home.", "I walk home yesterday."),
+]
+
+# A document long enough to take the chunked (map-reduce) summarization path
+# with the benchmark's AI_SUMMARY_* settings.
+LONG_DOCUMENT = " ".join(
+    f"Section {n}. " + " ".join(CORPUS["en"][n % 12:] + CORPUS["en"][:n % 12])
+    for n in range(12)
+)
+
+
+def seed(models, translations: int, rules_per_language: int) -> dict:
+    """Fill an empty database and return the context scenarios draw ids from."""
+    Language, Translation, GrammarRule = models
+    Language.create_many(LANGUAGES)
+    lookup = Language.get_lookup()
+    ids = {code: lookup["by_key"][code] for _, code in LANGUAGES}
+
+    pairs = [(s, t) for s, _ in LANGUAGES for t, _ in LANGUAGES if s != t]
+    codes = dict(LANGUAGES)
+    rows = []
+    for n in range(translations):
+        source, target = pairs[n % len(pairs)]
+        i = (n // len(pairs)) % len(CORPUS["en"])
+        rows.append((ids[codes[source]], ids[codes[target]], CORPUS[codes[source]][i], CORPUS[codes[target]][i]))
+    Translation.create_many(rows)
+
+    rules = []
+    for _, code in LANGUAGES:
+        for n in range(rules_per_language):
+            name, description, correct, incorrect = GRAMMAR_RULES[n % len(GRAMMAR_RULES)]
+            rules.append((ids[code], f"{name} {n}", description, correct, incorrect))
+    GrammarRule.create_many(rules)
+
+    return {"language_ids": list(ids.values()), "translation_count": translations}
+
+
+def _text(rng, code: str = "en") -> str:
+    return rng.choice(CORPUS[code])
+
+
+def _list_languages(ctx, rng):
+    return "GET", "/api/languages", None
+
+
+def _get_language(ctx, rng):
+    return "GET", f"/api/languages/{rng.choice(ctx['language_ids'])}", None
+
+
+def _list_translations(ctx, rng):
+    return "GET", f"/api/translations?limit={rng.choice((20, 50, 100))}", None
+
+
+def _get_translation(ctx, rng):
+    return "GET", f"/api/translations/{rng.randint(1, ctx['translation_count'])}", None
+
+
+def _search_translations(ctx, rng):
+    word = rng.choice(("train", "restaurant", "museum", "project", "park", "weather"))
+    return "GET", f"/api/translations/search?q={word}&limit=20", None
+
+
+def _create_translation(ctx, rng):
+    source, target = rng.sample(ctx["language_ids"], 2)
+    return "POST", "/api/translations", {
+        "source_language_id": source,
+        "target_language_id": target,
+        "source_text": _text(rng),
+        "translated_text": _text(rng, "es"),
+    }
+
+
+def _update_translation(ctx, rng):
+    source, target = rng.sample(ctx["language_ids"], 2)
+    return "PUT", f"/api/translations/{rng.randint(1, ctx['translation_count'])}", {
+        "source_language_id": source,
+        "target_language_id": target,
+        "source_text": _text(rng),
+        "translated_text": _text(rng, "fr"),
+    }
+
+
+def _list_grammar_rules(ctx, rng):
+    return "GET", "/api/grammar-rules?limit=50", None
+
+
+def _ai_translate(ctx, rng):
+    target = rng.choice(("Spanish", "French", "German", "Italian", "Portuguese"))
+    return "POST", "/api/ai/translate", {"text": _text(rng), "source_language": "English", "target_language": target}
+
+
+def _ai_translate_multi(ctx, rng):
+    return "POST", "/api/ai/translate", {
+        "text": _text(rng),
+        "source_language": "English",
+        "target_languages": ["Spanish", "French", "German", "Italian"],
+    }
+
+
+def _ai_translate_batch(ctx, rng):
+    texts = rng.sample(CORPUS["en"], rng.randint(3, 8))
+    return "POST", "/api/ai/translate/batch", {"texts": texts, "source_language": "English", "target_language": "Italian"}
+
+
+def _ai_grammar_check(ctx, rng):
+    return "POST", "/api/ai/grammar-check", {"text": _text(rng), "language": "English"}
+
+
+def _ai_summarize(ctx, rng):
+    text = " ".join(rng.sample(CORPUS["en"], 6))
+    return "POST", "/api/ai/summarize", {"text": text, "max_sentences": 2}
+
+
+def _ai_summarize_long(ctx, rng):
+    return "POST", "/api/ai/summarize", {"text": LONG_DOCUMENT, "max_sentences": 3, "mode": "chunked"}
+
+
+def _ai_language_detect(ctx, rng):
+    return "POST", "/api/ai/language-detect", {"text": _text(rng, rng.choice(list(CORPUS)))}
+
+
+def _ai_history(ctx, rng):
+    return "GET", "/api/ai/history?limit=50", None
+
+
+SCENARIOS = {
+    "GET /api/languages": _list_languages,
+    "GET /api/languages/<id>": _get_language,
+    "GET /api/translations": _list_translations,
+    "GET /api/translations/<id>": _get_translation,
+    "GET /api/translations/search": _search_translations,
+    "POST /api/translations": _create_translation,
+    "PUT /api/translations/<id>": _update_translation,
+    "GET /api/grammar-rules": _list_grammar_rules,
+    "POST /api/ai/translate": _ai_translate,
+    "POST /api/ai/translate (multi)": _ai_translate_multi,
+    "POST /api/ai/translate/batch": _ai_translate_batch,
+    "POST /api/ai/grammar-check": _ai_grammar_check,
+    "POST /api/ai/summarize": _ai_summarize,
+    "POST /api/ai/summarize (chunked)": _ai_summarize_long,
+    "POST /api/ai/language-detect": _ai_language_detect,
+    "GET /api/ai/history": _ai_history,
+}
+
+MIXES = {
+    "crud": {
+        "GET /api/languages": 15,
+        "GET /api/languages/<id>": 10,
+        "GET /api/translations": 25,
+        "GET /api/translations/<id>": 20,
+        "GET /api/translations/search": 10,
+        "POST /api/translations": 8,
+        "PUT /api/translations/<id>": 4,
+        "GET /api/grammar-rules": 8,
+    },
+    "ai": {
+        "POST /api/ai/translate": 40,
+        "POST /api/ai/translate (multi)": 8,
+        "POST /api/ai/translate/batch": 8,
+        "POST /api/ai/grammar-check": 15,
+        "POST /api/ai/summarize": 8,
+        "POST /api/ai/summarize (chunked)": 2,
+        "POST /api/ai/language-detect": 14,
+        "GET /api/ai/history": 5,
+    },
+    "mixed": {
+        "GET /api/languages": 10,
+        "GET /api/languages/<id>": 5,
+        "GET /api/translations": 15,
+        "GET /api/translations/<id>": 10,
+        "GET /api/translations/search": 6,
+        "POST /api/translations": 4,
+        "PUT /api/translations/<id>": 2,
+        "GET /api/grammar-rules": 5,
+        "POST /api/ai/translate": 18,
+        "POST /api/ai/translate (multi)": 3,
+        "POST /api/ai/translate/batch": 3,
+        "POST /api/ai/grammar-check": 6,
+        "POST /api/ai/summarize": 3,
+        "POST /api/ai/summarize (chunked)": 1,
+        "POST /api/ai/language-detect": 6,
+        "GET /api/ai/history": 3,
+    },
+}
+
+
+def load_mix(name_or_path: str) -> dict:
+    """Return the mix named *name_or_path*, or read one from a JSON file of {scenario: weight}."""
+    if name_or_path in MIXES:
+        return dict(MIXES[name_or_path])
+    if not os.path.exists(name_or_path):
+        raise ValueError(f"Unknown mix {name_or_path!r}; use one of {sorted(MIXES)} or a JSON file")
+    with open(name_or_path) as f:
+        mix = json.load(f)
+    unknown = sorted(set(mix) - set(SCENARIOS))
+    if unknown:
+        raise ValueError(f"Unknown scenarios in {name_or_path}: {unknown}")
+    return {name: float(weight) for name, weight in mix.items() if weight > 0}
@@ -0,0 +1,1101 @@
+"""Automated tests for SpeakSmart AI endpoints and services.
+
+Gemini is never contacted: the tests patch ``AIService._agenerate``.
+
+Run with:  python -m pytest tests/test_ai.py -v
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_api import BaseTestCase  # noqa: E402
+
+
+def fake_translation(prompt, task=None):
+    return json.dumps({
+        "translated_text": "Hola",
+        "source_language": "English",
+        "target_language": "Spanish",
+        "confidence": 0.95,
+        "notes": "",
+    })
+
+
+def fake_batch_translation(prompt, task=None):
+    """Echo batch items back as "<text> (es)", dropping any item whose text is "skip"."""
+    items = json.loads(prompt.split("(JSON):", 1)[1])
+    return json.dumps({"translations": [
+        {"index": item["index"], "translated_text": item["text"] + " (es)", "confidence": 0.9}
+        for item in items
+        if item["text"] != "skip"
+    ]})
+
+
+def fake_multi_translation(prompt, task=None):
+    """Translate into every listed target as "<lang>: Hello"."""
+    targets = json.loads(prompt.split("target languages: ", 1)[1].split("\n", 1)[0].rstrip("."))
+    return json.dumps({"translations": [
+        {"target_language": lang, "translated_text": f"{lang}: Hello", "confidence": 0.9}
+        for lang in targets
+    ]})
+
+
+class AITestCase(BaseTestCase):
+    """Base class that swaps the Gemini call for a local fake."""
+
+    generate = staticmethod(fake_translation)
+
+    def setUp(self):
+        super().setUp()
+        from app.services.ai_service import ai_service
+        from app.services.cache import result_cache
+        self.ai_service = ai_service
+        self.result_cache = result_cache
+        result_cache.clear()
+        patcher = mock.patch.object(ai_service, "_agenerate", side_effect=self.generate)
+        self.mock_generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, path, body):
+        return self.client.post(path, data=json.dumps(body), content_type="application/json")
+
+    def _history(self):
+        from app.services.history_writer import history_writer
+        self.assertTrue(history_writer.flush())
+        return self.client.get("/api/ai/history").get_json()
+
+
+# ── Result cache ───────────────────────────────────────────────────────
+
+class TestResultCache(AITestCase):
+
+    def _translate(self, text="Hello"):
+        return self._post("/api/ai/translate", {
+            "text": text,
+            "source_language": "English",
+            "target_language": "Spanish",
+        })
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.assertEqual(self._translate().status_code, 200)
+        res = self._translate("  Hello ")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["data"]["translated_text"], "Hola")
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+        stats = self.client.get("/api/ai/cache/stats").get_json()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_server_timing_reports_ai_parse_and_cache(self):
+        res = self._translate()
+        spans = {part.split(";")[0].strip() for part in res.headers["Server-Timing"].split(",")}
+        self.assertTrue({"ai", "parse", "cache", "serialize"} <= spans)
+
+    def test_unparseable_response_is_not_cached(self):
+        self.mock_generate.side_effect = lambda prompt, task=None: "not json"
+        self._translate()
+        self._translate()
+        self.assertEqual(self.mock_generate.call_count, 2)
+
+    def test_ttl_and_size_bound(self):
+        from app.services.cache import ResultCache
+        cache = ResultCache(path=self._cache_path, ttl=-1)
+        cache.set("expired", "translate", {"x": 1})
+        self.assertIsNone(cache.get("expired"))
+
+        cache = ResultCache(path=self._cache_path, max_entries=2)
+        for i in range(5):
+            cache.set(f"k{i}", "translate", {"i": i})
+        cache.evict()
+        self.assertEqual(cache.stats()["entries"], 2)
+
+
+# ── Request coalescing ─────────────────────────────────────────────────
+
+class TestSingleFlight(AITestCase):
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        def slow(prompt, task=None):
+            time.sleep(0.2)
+            return fake_translation(prompt)
+
+        self.mock_generate.side_effect = slow
+        results = []
+
+        def worker():
+            results.append(self.ai_service.translate("Hello", "English", "Spanish"))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.mock_generate.call_count, 1)
+        self.assertEqual([r["translated_text"] for r in results], ["Hola"] * 5)
+
+    def test_errors_are_shared_by_waiters(self):
+        from app.services.singleflight import SingleFlight
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def boom():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("upstream failed")
+
+        def worker():
+            try:
+                flight.do("k", boom)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=worker)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(errors, ["upstream failed", "upstream failed"])
+        self.assertEqual(flight.stats()["executed"], 1)
+
+
+# ── Translation memory ─────────────────────────────────────────────────
+
+class TestTranslationMemory(AITestCase):
+
+    def setUp(self):
+        super().setUp()
+        en = self._post("/api/languages", {"name": "English", "code": "en"}).get_json()
+        es = self._post("/api/languages", {"name": "Spanish", "code": "es"}).get_json()
+        res = self._post("/api/translations", {
+            "source_language_id": en["id"],
+            "target_language_id": es["id"],
+            "source_text": "Save your changes before leaving",
+            "translated_text": "Guarda tus cambios antes de salir",
+        })
+        self.tid = res.get_json()["id"]
+
+    def _translate(self, text, source="English", target="es"):
+        return self._post("/api/ai/translate", {
+            "text": text, "source_language": source, "target_language": target,
+        }).get_json()["data"]
+
+    def test_exact_match_skips_gemini(self):
+        data = self._translate("save your  changes before leaving")
+        self.assertEqual(data["translated_text"], "Guarda tus cambios antes de salir")
+        self.assertEqual(data["translation_memory"]["match"], "exact")
+        self.assertEqual(data["translation_memory"]["score"], 1.0)
+        self.mock_generate.assert_not_called()
+
+        history = self._history()["history"]
+        self.assertEqual(history[0]["ai_provider"], "translation_memory")
+
+    def test_fuzzy_match_above_threshold(self):
+        data = self._translate("Save your changes before leaving!")
+        self.assertEqual(data["translation_memory"]["match"], "fuzzy")
+        self.assertGreaterEqual(data["translation_memory"]["score"], 0.85)
+        self.mock_generate.assert_not_called()
+
+    def test_unrelated_text_falls_back_to_gemini(self):
+        data = self._translate("Hello")
+        self.assertEqual(data["translated_text"], "Hola")
+        self.assertNotIn("translation_memory", data)
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+    def test_index_follows_update_and_delete(self):
+        from app.services.translation_memory import translation_memory
+        self._translate("Save your changes before leaving")
+        loads = translation_memory.loads
+        self.client.put(
+            f"/api/translations/{self.tid}",
+            data=json.dumps({"source_text": "Discard draft"}),
+            content_type="application/json",
+        )
+        self.assertEqual(self._translate("Discard draft")["translation_memory"]["match"], "exact")
+
+        self.client.delete(f"/api/translations/{self.tid}")
+        self.assertNotIn("translation_memory", self._translate("Discard draft"))
+        # This worker's own writes are applied in place.
+        self.assertEqual(translation_memory.loads, loads)
+
+    def test_non_string_text_is_rejected(self):
+        for text in (123, ["Save your changes"]):
+            for path, extra in [
+                ("/api/ai/translate", {"target_language": "es"}),
+                ("/api/ai/translate", {"target_languages": ["es", "fr"]}),
+                ("/api/ai/translate/stream", {"target_language": "es"}),
+            ]:
+                res = self._post(path, {"text": text, "source_language": "English", **extra})
+                self.assertEqual(res.status_code, 400, (path, text))
+        self.mock_generate.assert_not_called()
+
+    def test_other_workers_writes_are_picked_up(self):
+        import sqlite3
+        import app.config as cfg
+        from app.services.change_tracker import change_tracker
+        self.assertIn("translation_memory", self._translate("Save your changes before leaving"))
+
+        # Another worker process: a separate connection, no model hooks.
+        other = sqlite3.connect(cfg.Config.DATABASE_PATH)
+        other.execute("UPDATE translations SET translated_text = 'Guarda antes de salir' WHERE id = ?", (self.tid,))
+        other.commit()
+        change_tracker.invalidate()  # as if CHANGE_CHECK_INTERVAL had passed
+        data = self._translate("Save your changes before leaving")
+        self.assertEqual(data["translated_text"], "Guarda antes de salir")
+
+        other.execute("DELETE FROM translations WHERE id = ?", (self.tid,))
+        other.commit()
+        other.close()
+        change_tracker.invalidate()
+        self.assertNotIn("translation_memory", self._translate("Save your changes before leaving"))
+
+
+
+# ── Local language detection ───────────────────────────────────────────
+
+def fake_detection(prompt, task=None):
+    return json.dumps({
+        "detected_language": "German",
+        "language_code": "de",
+        "confidence": 0.8,
+        "alternatives": [],
+    })
+
+
+ENGLISH = [
+    "The weather is nice today and we are going to the park",
+    "Please remember to save your work before you leave the office",
+    "She reads a book every evening while drinking a cup of tea",
+    "We should meet again next week to discuss the new project",
+    "The children were playing in the garden with their friends",
+    "Thank you very much for your help with the presentation",
+]
+SPANISH = [
+    "El tiempo es agradable hoy y vamos a ir al parque",
+    "Por favor recuerda guardar tu trabajo antes de salir de la oficina",
+    "Ella lee un libro cada noche mientras bebe una taza de té",
+    "Deberíamos reunirnos otra vez la próxima semana para hablar del proyecto",
+    "Los niños estaban jugando en el jardín con sus amigos",
+    "Muchas gracias por tu ayuda con la presentación",
+]
+
+
+class TestLanguageDetection(AITestCase):
+
+    generate = staticmethod(fake_detection)
+
+    def setUp(self):
+        super().setUp()
+        from app.services.language_detector import language_detector
+        self.detector = language_detector
+        en = self._post("/api/languages", {"name": "English", "code": "en"}).get_json()
+        es = self._post("/api/languages", {"name": "Spanish", "code": "es"}).get_json()
+        self._post("/api/translations/bulk", [
+            {"source_language_id": en["id"], "target_language_id": es["id"],
+             "source_text": source, "translated_text": target}
+            for source, target in zip(ENGLISH, SPANISH)
+        ])
+
+    def _detect(self, text):
+        return self._post("/api/ai/language-detect", {"text": text}).get_json()["data"]
+
+    def test_confident_local_detection_skips_gemini(self):
+        data = self._detect("Please remember to meet your friends in the garden")
+        self.assertEqual(data["engine"], "local")
+        self.assertEqual(data["language_code"], "en")
+        self.assertGreaterEqual(data["confidence"], 0.9)
+        self.assertEqual(data["alternatives"][0]["code"], "es")
+
+        data = self._detect("Mis amigos estaban en la oficina con los niños")
+        self.assertEqual(data["engine"], "local")
+        self.assertEqual(data["detected_language"], "Spanish")
+        self.mock_generate.assert_not_called()
+
+    def test_low_confidence_falls_back_to_gemini(self):
+        data = self._detect("Zwölf Boxkämpfer jagen Viktor quer über den großen Sylter Deich")
+        self.assertEqual(data["engine"], "gemini")
+        self.assertEqual(data["language_code"], "de")
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+    def test_fallback_engine_is_the_configured_provider(self):
+        from app.services.providers import LocalProvider
+        with mock.patch.object(self.ai_service, "provider", LocalProvider()):
+            data = self._detect("Zwölf Boxkämpfer jagen Viktor quer über den Deich")
+        self.assertEqual(data["engine"], "local")
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+    def test_untrained_corpus_falls_back_to_gemini(self):
+        self.client.delete("/api/languages/2")
+        self.assertEqual(self._detect("The weather is nice")["engine"], "gemini")
+
+    def test_retraining_runs_in_background_on_the_old_model(self):
+        spanish = "Mis amigos estaban en la oficina con los niños"
+        self.assertEqual(self._detect(spanish)["language_code"], "es")
+
+        release = threading.Event()
+        samples = self.detector._samples
+
+        def slow_samples():
+            release.wait(5)
+            return samples()
+
+        with mock.patch.object(self.detector, "_samples", side_effect=slow_samples) as mock_samples:
+            self.client.delete("/api/languages/2")
+            for _ in range(3):
+                data = self._detect(spanish)
+                self.assertEqual((data["engine"], data["language_code"]), ("local", "es"))
+            release.set()
+            self.assertTrue(self.detector.wait())
+        self.assertEqual(mock_samples.call_count, 1)
+        self.assertEqual(self._detect(spanish)["engine"], "gemini")
+
+    def test_single_translation_writes_trigger_retraining(self):
+        german = "Die Kinder trinken im Garten eine Tasse Tee mit ihren Freunden"
+        self.assertEqual(self._detect(german)["engine"], "gemini")
+        de = self._post("/api/languages", {"name": "German", "code": "de"}).get_json()
+        self.assertEqual(self._detect(german)["engine"], "gemini")
+        self.assertTrue(self.detector.wait())
+
+        for source, target in zip(ENGLISH, ["Das Wetter ist heute schön und wir gehen in den Park",
+                                            "Bitte denk daran, deine Arbeit zu speichern, bevor du gehst",
+                                            "Sie liest jeden Abend ein Buch und trinkt eine Tasse Tee",
+                                            "Wir sollten uns nächste Woche wieder treffen",
+                                            "Die Kinder spielten mit ihren Freunden im Garten",
+                                            "Vielen Dank für deine Hilfe mit der Präsentation"]):
+            self._post("/api/translations", {"source_language_id": 1, "target_language_id": de["id"],
+                                             "source_text": source, "translated_text": target})
+        self._detect(german)
+        self.assertTrue(self.detector.wait())
+        data = self._detect(german)
+        self.assertEqual((data["engine"], data["language_code"]), ("local", "de"))
+
+    def test_non_string_text_is_rejected(self):
+        for text in (123, ["Hello there"]):
+            res = self._post("/api/ai/language-detect", {"text": text})
+            self.assertEqual(res.status_code, 400)
+
+    def test_history_is_used_for_training(self):
+        from app.models.history import History
+        for text in ["Guten Morgen, wie geht es dir heute", "Ich möchte gerne einen Kaffee trinken",
+                     "Wir fahren morgen mit dem Zug nach Berlin", "Das Wetter ist heute sehr schön",
+                     "Kannst du mir bitte das Buch geben", "Die Kinder spielen draußen im Garten"]:
+            History.create(session_id="s", source_text=text, translated_text="-", source_language="de",
+                           target_language="en", ai_provider="gemini")
+        self._post("/api/languages", {"name": "German", "code": "de"})
+
+        data = self._detect("Wir möchten morgen im Garten einen Kaffee trinken")
+        self.assertEqual(data["engine"], "local")
+        self.assertEqual(data["language_code"], "de")
+
+    def test_mislabelled_history_is_not_learned(self):
+        from app.models.history import History
+        # English text recorded as Spanish, e.g. a caller mixing up the fields.
+        for text in ENGLISH * 4:
+            History.create(session_id="s", source_text=text, translated_text="-", source_language="es",
+                           target_language="en", ai_provider="gemini")
+        self.detector.train()
+        self.assertEqual(self.detector.stats()["discarded_samples"], 4 * len(ENGLISH))
+
+        data = self._detect("Please remember to meet your friends in the garden")
+        self.assertEqual((data["engine"], data["language_code"]), ("local", "en"))
+
+
+# ── Batch translation ──────────────────────────────────────────────────
+
+class TestBatchTranslation(AITestCase):
+
+    generate = staticmethod(fake_batch_translation)
+
+    def _batch(self, texts):
+        return self._post("/api/ai/translate/batch", {
+            "texts": texts, "source_language": "English", "target_language": "Spanish",
+        })
+
+    def test_batch_is_packed_and_demultiplexed(self):
+        import app.config as cfg
+        with mock.patch.object(cfg.Config, "AI_BATCH_MAX_ITEMS", 2):
+            res = self._batch(["one", "two", "three"])
+        self.assertEqual(res.status_code, 200)
+        body = res.get_json()
+        self.assertEqual(body["status"], "success")
+        self.assertEqual(
+            [r["translated_text"] for r in body["data"]["results"]],
+            ["one (es)", "two (es)", "three (es)"],
+        )
+        self.assertEqual(self.mock_generate.call_count, 2)
+
+        history = self._history()
+        self.assertEqual(history["count"], 3)
+
+    def test_per_item_errors_are_reported(self):
+        body = self._batch(["one", "", "skip"]).get_json()
+        self.assertEqual(body["status"], "partial")
+        results = body["data"]["results"]
+        self.assertEqual(results[0]["translated_text"], "one (es)")
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[2])
+        self.assertEqual(body["data"]["failed"], 2)
+
+    def test_batch_results_feed_single_translate_cache(self):
+        self._batch(["one"])
+        res = self._post("/api/ai/translate", {
+            "text": "one", "source_language": "English", "target_language": "Spanish",
+        })
+        self.assertEqual(res.get_json()["data"]["translated_text"], "one (es)")
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+    def test_batch_requires_list(self):
+        self.assertEqual(self._batch("one").status_code, 400)
+
+
+# ── One-to-many translation ────────────────────────────────────────────
+
+class TestMultiTargetTranslation(AITestCase):
+
+    generate = staticmethod(fake_multi_translation)
+
+    def _translate(self, targets):
+        return self._post("/api/ai/translate", {
+            "text": "Hello", "source_language": "English", "target_languages": targets,
+        })
+
+    def test_targets_share_prompts_and_are_keyed_by_language(self):
+        import app.config as cfg
+        with mock.patch.object(cfg.Config, "AI_MULTI_MAX_TARGETS", 2):
+            res = self._translate(["French", "German", "Italian"])
+        self.assertEqual(res.status_code, 200)
+        translations = res.get_json()["data"]["translations"]
+        self.assertEqual(list(translations), ["French", "German", "Italian"])
+        self.assertEqual(translations["German"]["translated_text"], "German: Hello")
+        self.assertEqual(self.mock_generate.call_count, 2)
+        self.assertEqual(self._history()["count"], 3)
+
+    def test_results_are_cached_per_target(self):
+        self._translate(["French"])
+        res = self._post("/api/ai/translate", {
+            "text": "Hello", "source_language": "English", "target_language": "French",
+        })
+        self.assertEqual(res.get_json()["data"]["translated_text"], "French: Hello")
+        self.assertEqual(self.mock_generate.call_count, 1)
+
+    def test_invalid_targets(self):
+        self.assertEqual(self._translate([]).status_code, 400)
+
+
+
+# ── Map-reduce summarization ───────────────────────────────────────────
+
+def fake_summary(prompt, task=None):
+    """Chunk prompts summarize to "S:<first 10 chars>"; the reduce joins them with " | "."""
+    if "Section to summarize:" in prompt:
+        section = prompt.split('Section to summarize:\n"""', 1)[1].rsplit('"""', 1)[0]
+        return json.dumps({"summary": "S:" + section[:10], "key_points": [section[:5]]})
+    if "Section summaries" in prompt:
+        parts = json.loads(prompt.split("(in order, JSON):\n", 1)[1])
+        return json.dumps({
+            "summary": " | ".join(p["summary"] for p in parts),
+            "language": "English", "sentence_count": 1,
+            "key_points": [k for p in parts for k in p["key_points"]],
+        })
+    return json.dumps({"summary": "single", "language": "English", "sentence_count": 1, "key_points": []})
+
+
+DOCUMENT = "\n\n".join([
+    "Alpha paragraph talks about the first topic.",
+    "Bravo paragraph covers the second topic.",
+    "Charlie paragraph ends with the third topic.",
+])
+
+
+class TestChunkedSummarization(AITestCase):
+
+    generate = staticmethod(fake_summary)
+
+    def setUp(self):
+        super().setUp()
+        import app.config as cfg
+        for name, value in [("AI_SUMMARY_CHUNK_TOKENS", 12), ("AI_SUMMARY_SINGLE_MAX_TOKENS", 20)]:
+            patcher = mock.patch.object(cfg.Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _summarize(self, text, **extra):
+        return self._post("/api/ai/summarize", {"text": text, **extra})
+
+    def test_split_keeps_paragraph_and_sentence_boundaries(self):
+        from app.services.ai_service import _split_for_summary
+        chunks = _split_for_summary(DOCUMENT, 12)
+        self.assertEqual(chunks, DOCUMENT.split("\n\n"))
+
+        long_paragraph = "One short sentence. " * 6
+        chunks = _split_for_summary(long_paragraph, 12)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 48 for c in chunks))
+        self.assertTrue(all(c.endswith(".") for c in chunks))
+        self.assertEqual(" ".join(chunks), long_paragraph.strip())
+
+    def test_long_text_is_mapped_then_reduced(self):
+        data = self._summarize(DOCUMENT).get_json()["data"]
+        self.assertEqual(data["chunks"], 3)
+        self.assertEqual(data["summary"], "S:Alpha para | S:Bravo para | S:Charlie pa")
+        self.assertEqual(data["key_points"], ["Alpha", "Bravo", "Charl"])
+        self.assertEqual(self.mock_generate.call_count, 4)
+
+    def test_edited_document_only_resummarizes_changed_chunks(self):
+        self._summarize(DOCUMENT)
+        self.mock_generate.reset_mock()
+
+        edited = DOCUMENT.replace("Bravo paragraph covers", "Bravo section explains")
+        data = self._summarize(edited).get_json()["data"]
+        self.assertEqual(data["summary"], "S:Alpha para | S:Bravo sect | S:Charlie pa")
+        # One changed chunk plus the reduce pass.
+        self.assertEqual(self.mock_generate.call_count, 2)
+
+    def test_short_text_uses_single_prompt(self):
+        data = self._summarize("Short text.").get_json()["data"]
+        self.assertEqual(data["summary"], "single")
+        self.assertNotIn("chunks", data)
+        self.assertEqual(self._summarize(DOCUMENT, mode="single").get_json()["data"]["summary"], "single")
+
+    def test_chunked_mode_can_be_forced_and_validated(self):
+        data = self._summarize("Short text.", mode="chunked").get_json()["data"]
+        self.assertEqual(data["chunks"], 1)
+        self.assertEqual(self._summarize("Short text.", mode="fast").status_code, 400)
+
+
+# ── Async fan-out ──────────────────────────────────────────────────────
+
+class TestAsyncFanOut(AITestCase):
+
+    def test_batch_chunks_run_concurrently_within_limit(self):
+        import asyncio
+        import app.config as cfg
+
+        async def slow_batch(prompt, task=None):
+            await asyncio.sleep(0.2)
+            return fake_batch_translation(prompt)
+
+        self.mock_generate.side_effect = slow_batch
+        with mock.patch.object(cfg.Config, "AI_BATCH_MAX_ITEMS", 1), \
+                mock.patch.object(cfg.Config, "AI_MAX_CONCURRENCY", 4):
+            started = time.monotonic()
+            results = self.ai_service.translate_batch(["a", "b", "c", "d"], "English", "Spanish")
+            elapsed = time.monotonic() - started
+
+        self.assertEqual([r["translated_text"] for r in results], ["a (es)", "b (es)", "c (es)", "d (es)"])
+        self.assertEqual(self.mock_generate.call_count, 4)
+        self.assertLess(elapsed, 0.6)
+
+    def test_concurrency_limit_is_enforced(self):
+        import asyncio
+        import app.config as cfg
+        from app.services.ai_service import AIService
+        from app.services.providers import AIProvider
+        state = {"active": 0, "peak": 0}
+
+        class SlowProvider(AIProvider):
+            model_name = "slow"
+
+            async def generate(self, prompt, task):
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                await asyncio.sleep(0.05)
+                state["active"] -= 1
+                return "{}"
+
+        service = AIService(SlowProvider())
+        with mock.patch.object(cfg.Config, "AI_MAX_CONCURRENCY", 2):
+            service._generate_many(["p"] * 6)
+        self.assertEqual(state["peak"], 2)
+
+
+
+# ── Adaptive rate limiting ─────────────────────────────────────────────
+
+class RateLimitedError(Exception):
+    code = 429
+
+
+class TestRateLimiter(AITestCase):
+
+    def _service(self, replies):
+        """An AIService whose provider returns/raises *replies* in order."""
+        from app.services.ai_service import AIService
+        from app.services.providers import AIProvider
+        replies = list(replies)
+
+        class FakeProvider(AIProvider):
+            model_name = "fake"
+
+            async def generate(self, prompt, task):
+                reply = replies.pop(0)
+                if isinstance(reply, Exception):
+                    raise reply
+                return reply
+
+        return AIService(FakeProvider())
+
+    def test_retry_hint_is_honoured_and_rate_halved(self):
+        service = self._service([RateLimitedError("429 Quota exceeded. Please retry in 0.2s."), "ok"])
+        started = time.monotonic()
+        self.assertEqual(service._generate("p"), "ok")
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+        stats = service.limiter.stats()
+        self.assertEqual(stats["throttle_events"], 1)
+        self.assertEqual(stats["acquired"], 2)
+        self.assertAlmostEqual(stats["rate_limit_rps"], 2.5 + 0.05)
+
+    def test_bucket_paces_requests(self):
+        import app.config as cfg
+        service = self._service(["ok"] * 4)
+        with mock.patch.object(cfg.Config, "AI_RATE_LIMIT_RPS", 20.0), \
+                mock.patch.object(cfg.Config, "AI_RATE_LIMIT_BURST", 1):
+            started = time.monotonic()
+            service._generate_many(["p"] * 4)
+            elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.14)
+        self.assertGreater(service.limiter.stats()["max_queue_wait_ms"], 100)
+
+    def test_request_fails_fast_past_its_deadline(self):
+        import app.config as cfg
+        from app.services.rate_limiter import RateLimitTimeout
+        service = self._service([RateLimitedError("429 retry_delay { seconds: 60 }")])
+        with mock.patch.object(cfg.Config, "AI_QUEUE_TIMEOUT", 5.0):
+            started = time.monotonic()
+            with self.assertRaises(RateLimitTimeout):
+                service._generate("p")
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(service.limiter.stats()["queue_timeouts"], 1)
+
+    def test_other_errors_are_not_retried(self):
+        service = self._service([ValueError("bad request"), "ok"])
+        with self.assertRaises(ValueError):
+            service._generate("p")
+        self.assertEqual(service.limiter.stats()["throttle_events"], 0)
+
+    def test_stats_are_exposed(self):
+        res = self.client.get("/api/ai/cache/stats")
+        self.assertIn("effective_rps", res.get_json()["rate_limiter"])
+
+    def test_limiter_is_exported_to_prometheus(self):
+        from app.utils.metrics import metrics
+        metrics.reset()
+        service = self._service([RateLimitedError("429 retry in 0.01s"), "ok"])
+        service._generate("p")
+        with mock.patch.object(self.ai_service, "limiter", service.limiter):
+            text = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn("speaksmart_ai_rate_limit_throttles_total 1", text)
+        self.assertIn("speaksmart_ai_rate_limit_wait_seconds_count 2", text)
+        self.assertIn("speaksmart_ai_rate_limit_queue_timeouts_total", text)
+        self.assertIn(f"speaksmart_ai_rate_limit_rps {service.limiter.stats()['rate_limit_rps']}", text)
+        self.assertIn(f"speaksmart_ai_rate_limit_effective_rps {round(2 / 60, 3)}", text)
+
+    def test_gemini_calls_are_reported_per_task(self):
+        from app.utils.metrics import metrics
+        metrics.reset()
+        service = self._service([RateLimitedError("429 retry in 0.01s"), "ok", ValueError("bad request")])
+        service._generate("p", "translate")
+        with self.assertRaises(ValueError):
+            service._generate("p", "summarize")
+
+        text = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('speaksmart_gemini_calls_total{task="translate",outcome="rate_limited"} 1', text)
+        self.assertIn('speaksmart_gemini_calls_total{task="translate",outcome="success"} 1', text)
+        self.assertIn('speaksmart_gemini_retries_total{task="translate"} 1', text)
+        self.assertIn('speaksmart_gemini_call_duration_seconds_count{task="translate"} 2', text)
+        self.assertIn('speaksmart_gemini_errors_total{task="summarize",reason="error"} 1', text)
+
+
+
+# ── Circuit breaker ────────────────────────────────────────────────────
+
+class TestCircuitBreaker(BaseTestCase):
+    """Runs the real _agenerate() against a fake provider so the breaker is exercised."""
+
+    def setUp(self):
+        super().setUp()
+        import app.config as cfg
+        from app.services.ai_service import ai_service
+        from app.services.circuit_breaker import CircuitBreaker
+        from app.services.rate_limiter import AdaptiveRateLimiter
+        self.ai_service = ai_service
+        self.breaker = CircuitBreaker("gemini")
+        self.provider = mock.Mock(model_name="fake")
+        self.provider.name = "fake"
+        self.provider.generate = mock.AsyncMock(side_effect=RuntimeError("503 Service Unavailable"))
+        for target, name, value in [
+            (ai_service, "breaker", self.breaker),
+            (ai_service, "limiter", AdaptiveRateLimiter()),
+            (ai_service, "provider", self.provider),
+            (cfg.Config, "AI_BREAKER_MIN_CALLS", 2),
+            (cfg.Config, "AI_BREAKER_OPEN_SECONDS", 0.1),
+        ]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        en = self._post("/api/languages", {"name": "English", "code": "en"}).get_json()
+        es = self._post("/api/languages", {"name": "Spanish", "code": "es"}).get_json()
+        self._post("/api/translations", {
+            "source_language_id": en["id"], "target_language_id": es["id"],
+            "source_text": "Save your changes before leaving",
+            "translated_text": "Guarda tus cambios antes de salir",
+        })
+
+    def _post(self, path, body):
+        return self.client.post(path, data=json.dumps(body), content_type="application/json")
+
+    def _translate(self, text):
+        return self._post("/api/ai/translate", {
+            "text": text, "source_language": "English", "target_language": "Spanish",
+        })
+
+    def _trip(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+
+    def test_opens_after_errors_and_fails_fast(self):
+        self.assertEqual(self._translate("Hello").status_code, 500)
+        self.assertEqual(self._translate("Hi").status_code, 500)
+        self.assertEqual(self.breaker.state, "open")
+        calls = self.provider.generate.call_count
+
+        res = self._translate("Good night")
+        self.assertEqual(res.status_code, 503)
+        self.assertIn("Retry-After", res.headers)
+        self.assertEqual(self.provider.generate.call_count, calls)
+        self.assertEqual(self.client.get("/api/ai/cache/stats").get_json()["circuit_breaker"]["rejected"], 1)
+
+    def test_local_queue_timeouts_do_not_open_circuit(self):
+        from app.services.rate_limiter import RateLimitTimeout
+        limiter = mock.Mock()
+        limiter.acquire = mock.AsyncMock(side_effect=RateLimitTimeout("queue full"))
+        with mock.patch.object(self.ai_service, "limiter", limiter):
+            for text in ("Hello", "Hi", "Good night"):
+                self.assertNotEqual(self._translate(text).status_code, 200)
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.breaker.stats()["recent_calls"], 0)
+        self.provider.generate.assert_not_called()
+
+    def test_client_errors_do_not_open_circuit(self):
+        from app.services.providers import ProviderError
+        self.provider.generate.side_effect = ProviderError("400 Request payload is invalid", code=400)
+        self._translate("Hello")
+        self._translate("Hi")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_serves_recorded_history_while_open(self):
+        from app.models.history import History
+        History.create(session_id="s", source_language="english", target_language="spanish",
+                       source_text="Good morning", translated_text="Buenos días")
+        self._trip()
+        data = self._translate("Good morning").get_json()["data"]
+        self.assertTrue(data["degraded"])
+        self.assertEqual(data["translated_text"], "Buenos días")
+        self.provider.generate.assert_not_called()
+
+    def test_serves_looser_translation_memory_match_while_open(self):
+        self._trip()
+        data = self._translate("Please save your changes before you leave").get_json()["data"]
+        self.assertTrue(data["degraded"])
+        self.assertEqual(data["translated_text"], "Guarda tus cambios antes de salir")
+
+    def test_batch_is_partially_served_while_open(self):
+        self._trip()
+        res = self._post("/api/ai/translate/batch", {
+            "texts": ["Please save your changes before you leave", "Unknown sentence"],
+            "source_language": "English", "target_language": "Spanish",
+        }).get_json()
+        self.assertEqual(res["status"], "partial")
+        self.assertTrue(res["data"]["degraded"])
+        self.assertTrue(res["data"]["results"][0]["degraded"])
+        self.assertIn("error", res["data"]["results"][1])
+
+    def test_half_open_probe_closes_circuit(self):
+        self._trip()
+        time.sleep(0.15)
+        self.provider.generate.side_effect = None
+        self.provider.generate.return_value = fake_translation("")
+        res = self._translate("Hello")
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn("degraded", res.get_json()["data"])
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failed_probe_reopens_circuit(self):
+        self._trip()
+        time.sleep(0.15)
+        self.assertEqual(self._translate("Hello").status_code, 500)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self._translate("Hello").status_code, 503)
+
+
+# ── Streaming ──────────────────────────────────────────────────────────
+
+def parse_sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestStreaming(AITestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        async def fake_stream(prompt, task=None):
+            reply = fake_translation(prompt)
+            for i in range(0, len(reply), 20):
+                yield reply[i:i + 20]
+
+        patcher = mock.patch.object(self.ai_service, "_astream", side_effect=fake_stream)
+        self.mock_stream = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _stream(self):
+        res = self._post("/api/ai/translate/stream", {
+            "text": "Hello", "source_language": "English", "target_language": "Spanish",
+        })
+        self.assertEqual(res.mimetype, "text/event-stream")
+        return parse_sse(res.get_data(as_text=True))
+
+    def test_translate_streams_deltas_then_result(self):
+        events = self._stream()
+        kinds = [kind for kind, _ in events]
+        self.assertGreater(kinds.count("delta"), 1)
+        self.assertEqual(kinds[-1], "result")
+        self.assertEqual(events[-1][1]["data"]["translated_text"], "Hola")
+        self.assertEqual("".join(d["text"] for k, d in events if k == "delta"), fake_translation(""))
+
+        history = self._history()
+        self.assertEqual(history["count"], 1)
+
+    def test_cached_result_is_sent_without_streaming(self):
+        self._stream()
+        events = self._stream()
+        self.assertEqual([kind for kind, _ in events], ["result"])
+        self.assertEqual(self.mock_stream.call_count, 1)
+
+    def test_upstream_error_becomes_error_event(self):
+        async def failing(prompt, task=None):
+            raise RuntimeError("boom")
+            yield  # pragma: no cover
+
+        self.mock_stream.side_effect = failing
+        events = self._stream()
+        self.assertEqual(events[-1][0], "error")
+
+
+# ── AI providers ───────────────────────────────────────────────────────
+
+class TestLocalProvider(BaseTestCase):
+    """The offline provider behind the real AIService pipeline."""
+
+    def setUp(self):
+        super().setUp()
+        import app.config as cfg
+        from app.services.ai_service import AIService
+        from app.services.cache import result_cache
+        from app.services.providers import LocalProvider
+        result_cache.clear()
+        for name, value in [("AI_LOCAL_LATENCY_MS", 0.0), ("AI_LOCAL_SEED", 3)]:
+            patcher = mock.patch.object(cfg.Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.provider = LocalProvider()
+        self.service = AIService(self.provider)
+
+    def test_create_provider_follows_config(self):
+        import app.config as cfg
+        from app.services.providers import LocalProvider, create_provider
+        with mock.patch.object(cfg.Config, "AI_PROVIDER", "local"):
+            self.assertIsInstance(create_provider(), LocalProvider)
+        with self.assertRaises(ValueError):
+            create_provider("nope")
+
+    def test_every_task_returns_schema_valid_json(self):
+        result = self.service.translate("Good morning", "English", "Spanish")
+        self.assertEqual(result["translated_text"], "[Spanish] Good morning")
+
+        batch = self.service.translate_batch(["one", "two"], "English", "French")
+        self.assertEqual([r["translated_text"] for r in batch], ["[French] one", "[French] two"])
+
+        multi = self.service.translate_multi("Hello", "English", ["German", "Italian"])
+        self.assertEqual(multi["Italian"]["translated_text"], "[Italian] Hello")
+
+        grammar = self.service.grammar_check("the cat sat on the the mat")
+        self.assertEqual(grammar["corrected_text"], "The cat sat on the mat.")
+        self.assertEqual(len(grammar["errors"]), 3)
+        self.assertLess(grammar["score"], 1.0)
+
+        summary = self.service.summarize("One. Two. Three. Four.", max_sentences=2)
+        self.assertEqual(summary["summary"], "One. Two.")
+        self.assertEqual(summary["sentence_count"], 2)
+
+        detected = self.service.detect_language("Привет, как дела?")
+        self.assertEqual(detected["language_code"], "ru")
+        self.assertEqual(self.service.model_name, "local-deterministic")
+
+    def test_streaming_yields_the_reply_in_chunks(self):
+        import app.config as cfg
+        with mock.patch.object(cfg.Config, "AI_LOCAL_STREAM_CHUNK_CHARS", 16):
+            events = list(self.service.translate_stream("Good morning", "English", "Spanish"))
+        deltas = [value for kind, value in events if kind == "delta"]
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual(events[-1][1]["translated_text"], "[Spanish] Good morning")
+
+    def test_simulated_failures_are_reproducible(self):
+        import app.config as cfg
+        from app.services.providers import LocalProvider
+        from app.services.rate_limiter import is_rate_limited, retry_after
+
+        def draws():
+            provider = LocalProvider()
+            return [provider._draw(f"prompt {i % 5}") for i in range(60)]
+
+        with mock.patch.object(cfg.Config, "AI_LOCAL_LATENCY_MS", 100.0), \
+                mock.patch.object(cfg.Config, "AI_LOCAL_RATE_LIMIT_RATE", 0.2), \
+                mock.patch.object(cfg.Config, "AI_LOCAL_ERROR_RATE", 0.2):
+            first, second = draws(), draws()
+        self.assertEqual([(l, str(e)) for l, e in first], [(l, str(e)) for l, e in second])
+        self.assertEqual(len({l for l, _ in first}), 60)
+        throttled = [e for _, e in first if e is not None and e.code == 429]
+        self.assertTrue(throttled)
+        self.assertTrue(is_rate_limited(throttled[0]))
+        self.assertEqual(retry_after(throttled[0]), 1.0)
+
+    def test_prompt_tracking_is_bounded(self):
+        from app.services.providers import LocalProvider
+        provider = LocalProvider()
+        with mock.patch("app.services.providers.local._MAX_TRACKED_PROMPTS", 10):
+            for i in range(50):
+                provider._draw(f"prompt {i}")
+            provider._draw("prompt 49")
+        self.assertEqual(len(provider._seen), 10)
+        self.assertEqual(list(provider._seen.values())[-1], 2)
+        self.assertEqual(provider.stats()["calls"], 51)
+
+    def test_simulated_429_is_retried(self):
+        import app.config as cfg
+        with mock.patch.object(cfg.Config, "AI_LOCAL_RATE_LIMIT_RATE", 1.0), \
+                mock.patch.object(cfg.Config, "AI_LOCAL_RETRY_AFTER", 0.0), \
+                mock.patch.object(cfg.Config, "AI_MAX_ATTEMPTS", 2):
+            with self.assertRaises(Exception) as ctx:
+                self.service.translate("Hello", "English", "Spanish")
+        self.assertIn("rate limited", str(ctx.exception))
+        self.assertEqual(self.provider.stats(), {"calls": 2, "simulated_failures": 2})
+
+
+# ── Write-behind history ───────────────────────────────────────────────
+
+class TestHistoryWriter(AITestCase):
+
+    def test_records_are_written_in_batches(self):
+        from app.services.history_writer import HistoryWriter
+        writer = HistoryWriter()
+        for i in range(5):
+            writer.record(session_id="s", source_language="English", target_language="Spanish",
+                          source_text=f"t{i}", translated_text=f"t{i}")
+        self.assertTrue(writer.flush())
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 5)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertLessEqual(stats["flushes"], 2)
+        self.assertEqual(self._history()["count"], 5)
+        writer.shutdown()
+
+    def test_full_queue_applies_back_pressure(self):
+        import app.config as cfg
+        from app.services.history_writer import HistoryWriter
+        writer = HistoryWriter()
+        gate = threading.Event()
+
+        def slow_worker_write(records, db_path=None):
+            if threading.current_thread().name == "speaksmart-history":
+                gate.wait(2)
+
+        with mock.patch.object(cfg.Config, "HISTORY_QUEUE_SIZE", 1), \
+                mock.patch.object(cfg.Config, "HISTORY_BATCH_SIZE", 1), \
+                mock.patch.object(cfg.Config, "HISTORY_ENQUEUE_TIMEOUT", 0.01), \
+                mock.patch("app.services.history_writer.History.create_many", side_effect=slow_worker_write):
+            for i in range(4):
+                writer.record(session_id="s", source_text=f"t{i}", translated_text="")
+            self.assertGreater(writer.stats()["overflow_writes"], 0)
+            gate.set()
+            self.assertTrue(writer.flush())
+            writer.shutdown()
+
+    def test_full_queue_writes_rest_of_bulk_inline_after_one_wait(self):
+        import app.config as cfg
+        from app.services.history_writer import HistoryWriter
+        writer = HistoryWriter()
+        gate = threading.Event()
+        inline = []
+
+        def blocked_worker_write(records, db_path=None):
+            if threading.current_thread().name == "speaksmart-history":
+                gate.wait(5)
+            else:
+                inline.append(len(records))
+
+        with mock.patch.object(cfg.Config, "HISTORY_QUEUE_SIZE", 1), \
+                mock.patch.object(cfg.Config, "HISTORY_BATCH_SIZE", 1), \
+                mock.patch.object(cfg.Config, "HISTORY_ENQUEUE_TIMEOUT", 0.2), \
+                mock.patch("app.services.history_writer.History.create_many", side_effect=blocked_worker_write):
+            writer.record(session_id="s", source_text="first", translated_text="")
+            started = time.monotonic()
+            writer.record_many([{"session_id": "s", "source_text": f"t{i}", "translated_text": ""} for i in range(50)])
+            elapsed = time.monotonic() - started
+            gate.set()
+            self.assertTrue(writer.flush())
+            writer.shutdown()
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(len(inline), 1)
+        self.assertEqual(inline[0] + writer.stats()["enqueued"], 51)
+
+    def test_failed_batch_is_retried(self):
+        import sqlite3
+        import app.config as cfg
+        from app.models.history import History
+        from app.services.history_writer import HistoryWriter
+        writer = HistoryWriter()
+        real_create_many = History.create_many
+        calls = []
+
+        def flaky_create_many(records, db_path=None):
+            calls.append(len(records))
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            real_create_many(records, db_path=db_path)
+
+        with mock.patch.object(cfg.Config, "HISTORY_FLUSH_INTERVAL", 0.01), \
+                mock.patch("app.services.history_writer.History.create_many", side_effect=flaky_create_many):
+            for i in range(3):
+                writer.record(session_id="s", source_language="English", target_language="Spanish",
+                              source_text=f"t{i}", translated_text=f"t{i}")
+            self.assertTrue(writer.flush())
+            writer.shutdown()
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["failed"], stats["retried"]), (3, 0, 1))
+        self.assertEqual(self._history()["count"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,12 +6,21 @@ Run with:  python -m pytest tests/test_api.py -v
 import os
 import sys
 import json
+import logging
 import unittest
 import tempfile
 
 # Ensure project root is on the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Tests log slow requests on purpose (SLOW_REQUEST_MS=0); keep them out of logs/.
+from app.utils.logger import slow_logger  # noqa: E402
+
+for _handler in list(slow_logger.handlers):
+    slow_logger.removeHandler(_handler)
+    _handler.close()
+slow_logger.addHandler(logging.NullHandler())
+
 
 class BaseTestCase(unittest.TestCase):
     """Base class that gives each test a fresh Flask test client & database."""
@@ -21,20 +30,29 @@ class BaseTestCase(unittest.TestCase):
         self._tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
         self._tmp_path = self._tmp.name
         self._tmp.close()
+        self._cache_path = self._tmp_path + ".cache"
 
         # Patch config BEFORE creating the app
         import app.config as cfg
         cfg.Config.DATABASE_PATH = self._tmp_path
+        cfg.Config.AI_CACHE_PATH = self._cache_path
 
         from app import create_app
         self.app = create_app()
         self.client = self.app.test_client()
 
     def tearDown(self):
-        try:
-            os.unlink(self._tmp_path)
-        except OSError:
-            pass
+        from app.models.database import close_pools
+        from app.services.history_writer import history_writer
+        # Write queued history while this test's database still exists.
+        history_writer.flush()
+        close_pools()
+        for path in (self._tmp_path, self._cache_path):
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.unlink(path + suffix)
+                except OSError:
+                    pass
 
 
 class TestHealthCheck(BaseTestCase):
@@ -46,6 +64,168 @@ class TestHealthCheck(BaseTestCase):
         self.assertEqual(data["service"], "SpeakSmart")
 
 
+# Budget for "import app; create_app()" in a fresh interpreter, as a multiple
+# of a bare "import flask" there, so it scales with the machine. The app needs
+# well under one flask import on top of Flask itself; importing the Gemini SDK
+# alone used to cost about four.
+STARTUP_BUDGET_FLASK_IMPORTS = 2.0
+
+_STARTUP_SCRIPT = """
+import json, os, sys, tempfile, time
+started = time.perf_counter()
+import flask
+flask_seconds = time.perf_counter() - started
+import app.config as cfg
+with tempfile.TemporaryDirectory() as directory:
+    cfg.Config.DATABASE_PATH = os.path.join(directory, "startup.db")
+    cfg.Config.AI_CACHE_PATH = os.path.join(directory, "startup.db.cache")
+    started = time.perf_counter()
+    from app import create_app
+    create_app()
+    app_seconds = time.perf_counter() - started
+    from app.models.database import close_pools
+    close_pools()
+print(json.dumps({
+    "flask_seconds": flask_seconds,
+    "app_seconds": app_seconds,
+    "sdk_imported": "google.generativeai" in sys.modules,
+}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def _start(self):
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT], cwd=root, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(out.returncode, 0, out.stderr)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def test_app_starts_within_budget_without_ai_sdk(self):
+        # Importing the Gemini SDK dominated a cold start; it must wait for the first AI call.
+        runs = [self._start() for _ in range(3)]
+        self.assertFalse(any(r["sdk_imported"] for r in runs))
+        flask_seconds = min(r["flask_seconds"] for r in runs)
+        app_seconds = min(r["app_seconds"] for r in runs)
+        self.assertLess(
+            app_seconds, STARTUP_BUDGET_FLASK_IMPORTS * flask_seconds,
+            f"app startup took {app_seconds:.3f}s on top of a {flask_seconds:.3f}s flask import",
+        )
+
+
+class TestWarmUp(BaseTestCase):
+    def test_ai_warmup_runs_in_background(self):
+        import threading
+        from unittest import mock
+        import app.config as cfg
+        from app import create_app
+        from app.services.ai_service import ai_service
+
+        provider = mock.Mock()
+        with mock.patch.object(ai_service, "provider", provider), \
+                mock.patch.object(cfg.Config, "AI_WARMUP", True):
+            create_app()
+            for thread in threading.enumerate():
+                if thread.name == "speaksmart-warmup":
+                    thread.join(10)
+        provider.warm_up.assert_called_once_with()
+
+
+class TestConnectionPool(BaseTestCase):
+    def test_connections_are_reused_with_wal(self):
+        from app.models.database import get_db, get_pool
+        conn = get_db()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+        conn.close()
+        again = get_db()
+        self.assertIs(again, conn)
+        again.close()
+
+        for _ in range(5):
+            self.client.get("/api/languages")
+        stats = get_pool().stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_uncommitted_work_is_rolled_back_on_release(self):
+        from app.models.database import get_db
+        conn = get_db()
+        conn.execute("INSERT INTO languages (name, code) VALUES ('English', 'en')")
+        conn.close()
+        self.assertEqual(self.client.get("/api/languages").get_json()["count"], 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_child_does_not_reuse_parent_connections(self):
+        from app.models.database import get_db, get_pool
+        inherited = get_db()
+        inherited.close()
+        parent_pool = get_pool()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                pool = get_pool()
+                conn = get_db()
+                fresh = pool is not parent_pool and conn is not inherited
+                count = conn.execute("SELECT COUNT(*) FROM languages").fetchone()[0]
+                conn.close()
+                code = 0 if fresh and count == 0 and pool.stats()["created"] == 1 else 1
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(get_pool().stats()["idle"], 1)
+
+    def test_failed_queries_return_their_connection(self):
+        import sqlite3
+        from app.models.database import get_pool
+        from app.models.history import History
+        from app.models.language import Language
+        from app.models.translation import Translation
+        for call in (
+            lambda: Language.get_by_id([1]),
+            lambda: Translation.search('"unterminated', 10),
+            lambda: History.find_translation({}, "en", "es"),
+        ):
+            with self.assertRaises(sqlite3.Error):
+                call()
+        self.assertEqual(get_pool().stats()["in_use"], 0)
+
+    def test_health_reports_pool_metrics(self):
+        data = self.client.get("/api/health").get_json()
+        self.assertIn("database_pools", data)
+
+
+class TestMigrations(BaseTestCase):
+    def test_schema_is_at_latest_version_with_indexes(self):
+        from app.models.database import get_db
+        from app.models.migrations import LATEST_VERSION, migrate, schema_version
+        conn = get_db()
+        try:
+            self.assertEqual(schema_version(conn), LATEST_VERSION)
+            self.assertEqual(migrate(conn), 0)
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM translation_history ORDER BY created_at DESC, id DESC LIMIT 5"
+            ).fetchall()
+            self.assertIn("idx_history_created_at", " ".join(row[3] for row in plan))
+        finally:
+            conn.close()
+
+    def test_unversioned_database_is_upgraded(self):
+        import sqlite3
+        from app.models.migrations import MIGRATIONS, LATEST_VERSION, migrate, schema_version
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(MIGRATIONS[0][2])
+        conn.execute("INSERT INTO languages (name, code) VALUES ('English', 'en')")
+        conn.commit()
+        self.assertEqual(migrate(conn), LATEST_VERSION)
+        self.assertEqual(schema_version(conn), LATEST_VERSION)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM languages").fetchone()[0], 1)
+
+
 # ── Languages CRUD ─────────────────────────────────────────────────────
 
 class TestLanguages(BaseTestCase):
@@ -261,5 +441,509 @@ class TestGrammarRules(BaseTestCase):
         self.assertEqual(res.status_code, 200)
 
 
+# ── Pagination ─────────────────────────────────────────────────────────
+
+class TestPagination(BaseTestCase):
+
+    def _seed(self):
+        for name, code in [("English", "en"), ("Spanish", "es"), ("French", "fr")]:
+            self.client.post(
+                "/api/languages",
+                data=json.dumps({"name": name, "code": code}),
+                content_type="application/json",
+            )
+
+    def test_keyset_pages(self):
+        self._seed()
+        first = self.client.get("/api/languages?limit=2&total=true").get_json()
+        self.assertEqual([l["code"] for l in first["languages"]], ["en", "es"])
+        self.assertEqual(first["total"], 3)
+        self.assertIsNotNone(first["next_cursor"])
+
+        second = self.client.get(f"/api/languages?limit=2&after={first['next_cursor']}").get_json()
+        self.assertEqual([l["code"] for l in second["languages"]], ["fr"])
+        self.assertIsNone(second["next_cursor"])
+        self.assertNotIn("total", second)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/translations?after=abc").status_code, 400)
+        self.assertEqual(self.client.get("/api/ai/history?after=!!").status_code, 400)
+
+    def test_history_cursor(self):
+        from app.models.history import History
+        for i in range(3):
+            History.create("s", "English", "Spanish", f"text {i}", f"texto {i}")
+        first = self.client.get("/api/ai/history?limit=2").get_json()
+        self.assertEqual([h["source_text"] for h in first["history"]], ["text 2", "text 1"])
+        second = self.client.get(f"/api/ai/history?limit=2&after={first['next_cursor']}").get_json()
+        self.assertEqual([h["source_text"] for h in second["history"]], ["text 0"])
+        self.assertIsNone(second["next_cursor"])
+
+
+# ── Export ─────────────────────────────────────────────────────────────
+
+class TestExport(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from app.models.language import Language
+        from app.models.translation import Translation
+        en = Language.create("English", "en")
+        es = Language.create("Spanish", "es")
+        for i in range(3):
+            Translation.create(en["id"], es["id"], f"Hello {i}", f"Hola, {i}")
+
+    def test_ndjson_export(self):
+        res = self.client.get("/api/translations/export")
+        self.assertEqual(res.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        self.assertEqual([r["source_text"] for r in rows], ["Hello 0", "Hello 1", "Hello 2"])
+        self.assertEqual(rows[0]["target_language_code"], "es")
+
+    def test_gzipped_csv_export(self):
+        import csv
+        import gzip
+        import io
+        res = self.client.get("/api/translations/export?format=csv&gzip=true")
+        self.assertEqual(res.mimetype, "application/gzip")
+        self.assertNotIn("Content-Encoding", res.headers)
+        self.assertIn('filename="translations.csv.gz"', res.headers["Content-Disposition"])
+        text = gzip.decompress(res.get_data()).decode("utf-8")
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2]["translated_text"], "Hola, 2")
+
+    def test_history_export_and_bad_format(self):
+        res = self.client.get("/api/ai/history/export?format=csv")
+        self.assertEqual(res.get_data(as_text=True).splitlines()[0].split(",")[0], "id")
+        self.assertEqual(self.client.get("/api/ai/history/export?format=xml").status_code, 400)
+
+
+# ── Bulk import ────────────────────────────────────────────────────────
+
+class TestBulkImport(BaseTestCase):
+
+    def _seed_languages(self):
+        res = self.client.post(
+            "/api/languages/bulk",
+            data=json.dumps([{"name": "English", "code": "en"}, {"name": "Spanish", "code": "es"}]),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json()["inserted"], 2)
+
+    def test_jsonl_translations_resolve_codes(self):
+        self._seed_languages()
+        body = "\n".join([
+            json.dumps({"source_language": "en", "target_language": "Spanish",
+                        "source_text": "Hello", "translated_text": "Hola"}),
+            json.dumps({"source_language": "en", "target_language": "xx",
+                        "source_text": "Bye", "translated_text": "Adiós"}),
+            "not json",
+        ])
+        res = self.client.post("/api/translations/bulk", data=body, content_type="application/x-ndjson")
+        self.assertEqual(res.status_code, 200)
+        data = res.get_json()
+        self.assertEqual((data["received"], data["inserted"], data["failed"]), (3, 1, 2))
+        self.assertEqual([e["row"] for e in data["errors"]], [2, 3])
+        self.assertEqual(self.client.get("/api/translations").get_json()["count"], 1)
+
+    def test_csv_upload_of_grammar_rules(self):
+        import io
+        self._seed_languages()
+        csv_text = (
+            "language,rule_name,description,example_correct\n"
+            "en,Articles,Use 'an' before vowel sounds,an apple\n"
+            "es,Gender,Nouns have gender,\n"
+        )
+        res = self.client.post(
+            "/api/grammar-rules/bulk",
+            data={"file": (io.BytesIO(csv_text.encode("utf-8")), "rules.csv")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json()["inserted"], 2)
+        rules = self.client.get("/api/grammar-rules").get_json()["grammar_rules"]
+        self.assertIsNone(rules[1]["example_correct"])
+
+    def test_atomic_import_rejects_everything(self):
+        res = self.client.post(
+            "/api/languages/bulk?atomic=true",
+            data=json.dumps([{"name": "English", "code": "en"}, {"name": "English", "code": "en-gb"}]),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(res.get_json()["inserted"], 0)
+        self.assertEqual(self.client.get("/api/languages").get_json()["count"], 0)
+
+
+# ── Full-text search ───────────────────────────────────────────────────
+
+class TestSearch(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from app.models.language import Language
+        from app.models.translation import Translation
+        from app.models.grammar_rule import GrammarRule
+        self.en = Language.create("English", "en")["id"]
+        self.es = Language.create("Spanish", "es")["id"]
+        self.fr = Language.create("French", "fr")["id"]
+        Translation.create(self.en, self.es, "Save the file", "Guardar el archivo")
+        Translation.create(self.en, self.fr, "Save the file", "Enregistrer le fichier")
+        self.tid = Translation.create(self.en, self.es, "Open the door", "Abre la puerta")["id"]
+        GrammarRule.create(self.en, "Articles", "Use 'an' before vowel sounds.")
+
+    def test_ranked_results_with_snippets_and_filters(self):
+        data = self.client.get("/api/translations/search?q=file").get_json()
+        self.assertEqual(data["count"], 2)
+        self.assertIn("<mark>file</mark>", data["results"][0]["source_snippet"])
+
+        data = self.client.get(f"/api/translations/search?q=save&target_language_id={self.fr}").get_json()
+        self.assertEqual([r["translated_text"] for r in data["results"]], ["Enregistrer le fichier"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client.put(
+            f"/api/translations/{self.tid}",
+            data=json.dumps({"source_text": "Close the window"}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.client.get("/api/translations/search?q=door").get_json()["count"], 0)
+        self.assertEqual(self.client.get("/api/translations/search?q=window").get_json()["count"], 1)
+        self.client.delete(f"/api/translations/{self.tid}")
+        self.assertEqual(self.client.get("/api/translations/search?q=window").get_json()["count"], 0)
+
+    def test_pagination_and_operator_safety(self):
+        page = self.client.get("/api/translations/search?q=the&limit=2").get_json()
+        self.assertEqual(page["next_offset"], 2)
+        res = self.client.get('/api/translations/search?q=save" OR (file')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.client.get("/api/translations/search").status_code, 400)
+
+    def test_grammar_rule_search(self):
+        data = self.client.get("/api/grammar-rules/search?q=vowel").get_json()
+        self.assertEqual(data["results"][0]["rule_name"], "Articles")
+        self.assertIn("<mark>vowel</mark>", data["results"][0]["description_snippet"])
+
+    def test_snippets_escape_stored_markup(self):
+        from app.models.grammar_rule import GrammarRule
+        from app.models.translation import Translation
+        Translation.create(self.en, self.es, "Run <script>alert(1)</script> now", "Ejecuta ahora")
+        GrammarRule.create(self.en, "<b>Markup</b>", "Tags like <img src=x onerror=alert(1)> are text.")
+
+        snippet = self.client.get("/api/translations/search?q=alert").get_json()["results"][0]["source_snippet"]
+        self.assertNotIn("<script>", snippet)
+        self.assertEqual(snippet, "Run &lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt; now")
+
+        rule = self.client.get("/api/grammar-rules/search?q=markup").get_json()["results"][0]
+        self.assertEqual(rule["rule_name_snippet"], "&lt;b&gt;<mark>Markup</mark>&lt;/b&gt;")
+        self.assertNotIn("<img", rule["description_snippet"])
+
+
+# ── Metrics ────────────────────────────────────────────────────────────
+
+class TestMetrics(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from app.utils.metrics import metrics
+        self.metrics = metrics
+        metrics.reset()
+
+    def _scrape(self):
+        res = self.client.get("/metrics")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content_type.startswith("text/plain"))
+        return res.get_data(as_text=True)
+
+    def test_request_latency_by_route_and_status(self):
+        self.client.get("/api/languages")
+        self.client.get("/api/languages/999")
+        text = self._scrape()
+        self.assertIn("# TYPE speaksmart_http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'speaksmart_http_request_duration_seconds_count{method="GET",route="/api/languages",status="200"} 1',
+            text,
+        )
+        self.assertIn(
+            'speaksmart_http_request_duration_seconds_bucket{method="GET",route="/api/languages/<int:language_id>",'
+            'status="404",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('speaksmart_http_requests_in_flight{route="/api/languages"} 0', text)
+        self.assertNotIn('route="/metrics"', text)
+
+    def test_db_timings_per_model_method(self):
+        self.client.post("/api/languages", data=json.dumps({"name": "English", "code": "en"}),
+                         content_type="application/json")
+        self.client.get("/api/translations/export")
+        text = self._scrape()
+        self.assertIn('speaksmart_db_query_duration_seconds_count{method="Language.create"} 1', text)
+        self.assertIn('speaksmart_db_query_duration_seconds_count{method="Translation.iter_all"} 1', text)
+
+    def test_snapshots_of_other_workers_are_merged(self):
+        import subprocess
+        import app.config as cfg
+        from unittest import mock
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(cfg.Config, "METRICS_MULTIPROC_DIR", directory):
+            with open(os.path.join(directory, f"metrics-{exited.pid}.json"), "w") as f:
+                json.dump({
+                    "speaksmart_http_requests_in_flight": {
+                        "type": "gauge", "help": "in flight", "labelnames": ["route"],
+                        "values": [[["/api/languages"], 3]],
+                    },
+                    "speaksmart_http_request_duration_seconds": {
+                        "type": "histogram", "help": "latency", "labelnames": ["method", "route", "status"],
+                        "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+                        "values": [[["GET", "/api/languages", "200"], [[2] + [0] * 12, 0.004]]],
+                    },
+                }, f)
+            self.client.get("/api/languages")
+            text = self._scrape()
+            self.assertTrue(os.path.exists(os.path.join(directory, f"metrics-{os.getpid()}.json")))
+
+        self.assertIn(
+            'speaksmart_http_request_duration_seconds_count{method="GET",route="/api/languages",status="200"} 3',
+            text,
+        )
+        # Gauges of exited workers are dropped.
+        self.assertIn('speaksmart_http_requests_in_flight{route="/api/languages"} 0', text)
+
+    def test_exited_workers_are_archived_once(self):
+        import subprocess
+        import app.config as cfg
+        from unittest import mock
+        exited = [subprocess.Popen([sys.executable, "-c", "pass"]) for _ in range(2)]
+        for process in exited:
+            process.wait()
+        snapshot = {
+            "speaksmart_http_request_duration_seconds": {
+                "type": "histogram", "help": "latency", "labelnames": ["method", "route", "status"],
+                "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+                "values": [[["GET", "/api/languages", "200"], [[2] + [0] * 12, 0.004]]],
+            },
+        }
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(cfg.Config, "METRICS_MULTIPROC_DIR", directory):
+            for process in exited:
+                with open(os.path.join(directory, f"metrics-{process.pid}.json"), "w") as f:
+                    json.dump(snapshot, f)
+            self.metrics.mark_process_dead(exited[0].pid)
+            self.assertFalse(os.path.exists(os.path.join(directory, f"metrics-{exited[0].pid}.json")))
+
+            first, second = self._scrape(), self._scrape()
+            remaining = sorted(name for name in os.listdir(directory) if name.startswith("metrics-"))
+            self.assertEqual(remaining, [f"metrics-{os.getpid()}.json"])
+
+        count = 'speaksmart_http_request_duration_seconds_count{method="GET",route="/api/languages",status="200"} 4'
+        self.assertIn(count, first)
+        self.assertIn(count, second)
+
+
+# ── Server-Timing ──────────────────────────────────────────────────────
+
+class TestServerTiming(BaseTestCase):
+
+    def _spans(self, res):
+        return {part.split(";")[0].strip() for part in res.headers["Server-Timing"].split(",")}
+
+    def test_header_breaks_down_db_and_serialize(self):
+        res = self.client.get("/api/languages")
+        self.assertEqual(self._spans(res), {"db", "serialize", "total"})
+        self.assertRegex(res.headers["Server-Timing"], r'db;dur=[\d.]+;desc="1x"')
+
+    def test_debug_timing_body_only_when_enabled_and_asked(self):
+        import app.config as cfg
+        from unittest import mock
+        self.assertNotIn("debug_timing", self.client.get("/api/languages", headers={"X-Debug-Timing": "1"}).get_json())
+        # A response-cache hit would run no queries at all.
+        with mock.patch.object(cfg.Config, "DEBUG_TIMING", True), \
+                mock.patch.object(cfg.Config, "RESPONSE_CACHE_ENABLED", False):
+            self.assertNotIn("debug_timing", self.client.get("/api/languages").get_json())
+            body = self.client.get("/api/languages", headers={"X-Debug-Timing": "1"}).get_json()
+        self.assertEqual(body["count"], 0)
+        self.assertEqual(body["debug_timing"]["spans"]["db"]["count"], 1)
+        self.assertGreater(body["debug_timing"]["total_ms"], 0)
+
+    def test_debug_timing_body_gets_its_own_etag(self):
+        import app.config as cfg
+        from unittest import mock
+        from werkzeug.http import generate_etag
+        plain = self.client.get("/api/languages")
+        with mock.patch.object(cfg.Config, "DEBUG_TIMING", True):
+            res = self.client.get("/api/languages", headers={"X-Debug-Timing": "1"})
+        self.assertIn("debug_timing", res.get_json())
+        self.assertNotEqual(res.headers["ETag"], plain.headers["ETag"])
+        self.assertEqual(res.get_etag()[0], generate_etag(res.get_data()))
+        self.assertIn("no-store", res.headers["Cache-Control"])
+
+    def test_slow_requests_are_logged_with_spans(self):
+        import app.config as cfg
+        from unittest import mock
+        with mock.patch.object(cfg.Config, "SLOW_REQUEST_MS", 0), \
+                self.assertLogs("speaksmart.slow", "WARNING") as logs:
+            self.client.get("/api/languages")
+        self.assertIn("Slow request GET /api/languages -> 200", logs.output[0])
+        self.assertIn("db=", logs.output[0])
+
+
+# ── Response cache ─────────────────────────────────────────────────────
+
+class TestResponseCache(BaseTestCase):
+
+    def _spans(self, res):
+        return {part.split(";")[0].strip() for part in res.headers["Server-Timing"].split(",")}
+
+    def test_hit_serves_same_body_without_queries(self):
+        self.client.post("/api/languages", json={"name": "English", "code": "en"})
+        first = self.client.get("/api/languages")
+        second = self.client.get("/api/languages")
+        self.assertEqual(first.get_data(), second.get_data())
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+        self.assertIn("db", self._spans(first))
+        self.assertEqual(self._spans(second), {"total"})
+        self.assertEqual(second.headers["Cache-Control"], "no-cache")
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/api/languages").headers["ETag"]
+        res = self.client.get("/api/languages", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.get_data(), b"")
+        self.assertEqual(res.headers["ETag"], etag)
+        res = self.client.get("/api/languages", headers={"If-None-Match": '"stale"'})
+        self.assertEqual(res.status_code, 200)
+
+    def test_writes_invalidate(self):
+        lang = self.client.post("/api/languages", json={"name": "English", "code": "en"}).get_json()
+        etag = self.client.get("/api/grammar-rules").headers["ETag"]
+        self.client.post("/api/grammar-rules", json={
+            "language_id": lang["id"], "rule_name": "Articles", "description": "Use a/an",
+        })
+        res = self.client.get("/api/grammar-rules", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["count"], 1)
+        # Renaming a language changes the joined language_name of the rules.
+        self.client.put(f"/api/languages/{lang['id']}", json={"name": "British English", "code": "en"})
+        rules = self.client.get("/api/grammar-rules").get_json()["grammar_rules"]
+        self.assertEqual(rules[0]["language_name"], "British English")
+
+    def test_other_workers_writes_seen_after_check_interval(self):
+        import app.config as cfg
+        from unittest import mock
+        from app.models.database import get_db
+        self.client.get("/api/languages")
+        # A write from another process only shows up in the change counters.
+        conn = get_db()
+        conn.execute("INSERT INTO languages (name, code) VALUES ('French', 'fr')")
+        conn.commit()
+        conn.close()
+        with mock.patch.object(cfg.Config, "CHANGE_CHECK_INTERVAL", 3600):
+            self.assertEqual(self.client.get("/api/languages").get_json()["count"], 0)
+        with mock.patch.object(cfg.Config, "CHANGE_CHECK_INTERVAL", 0):
+            self.assertEqual(self.client.get("/api/languages").get_json()["count"], 1)
+
+    def test_query_string_and_max_age(self):
+        import app.config as cfg
+        from unittest import mock
+        for code in ("en", "fr", "de"):
+            self.client.post("/api/languages", json={"name": code, "code": code})
+        self.assertEqual(self.client.get("/api/languages?limit=1").get_json()["count"], 1)
+        self.assertEqual(self.client.get("/api/languages?limit=2").get_json()["count"], 2)
+        with mock.patch.object(cfg.Config, "RESPONSE_CACHE_MAX_AGE", 30):
+            res = self.client.get("/api/languages?limit=1")
+        self.assertEqual(res.headers["Cache-Control"], "public, max-age=30")
+        stats = self.client.get("/api/health").get_json()["response_cache"]
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertGreaterEqual(stats["entries"], 2)
+
+
+    def test_byte_budget_and_oversized_bodies(self):
+        import app.config as cfg
+        from unittest import mock
+        from app.services.response_cache import ResponseCache
+        cache = ResponseCache()
+        with mock.patch.object(cfg.Config, "RESPONSE_CACHE_MAX_BYTES", 250), \
+                mock.patch.object(cfg.Config, "RESPONSE_CACHE_MAX_ENTRY_BYTES", 100):
+            self.assertTrue(cache.put("big", (1,), b"x" * 101).etag)
+            for i in range(5):
+                cache.put(f"page{i}", (1,), b"x" * 100)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 200))
+
+        # Oversized list bodies are still served with an ETag, just rebuilt each time.
+        with mock.patch.object(cfg.Config, "RESPONSE_CACHE_MAX_ENTRY_BYTES", 10):
+            first = self.client.get("/api/languages")
+            second = self.client.get("/api/languages", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertIn("db", self._spans(second))
+        self.assertEqual(second.status_code, 304)
+
+
+# ── Language registry ──────────────────────────────────────────────────
+
+class TestLanguageRegistry(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.en = self.client.post("/api/languages", json={"name": "English", "code": "en"}).get_json()
+        self.es = self.client.post("/api/languages", json={"name": "Spanish", "code": "es"}).get_json()
+
+    def _translate(self, source_id, target_id):
+        return self.client.post("/api/translations", json={
+            "source_language_id": source_id, "target_language_id": target_id,
+            "source_text": "Hello", "translated_text": "Hola",
+        })
+
+    def test_writes_and_lists_do_not_reload(self):
+        from app.services.language_registry import language_registry
+        self._translate(self.en["id"], self.es["id"])
+        loads = language_registry.loads
+        for _ in range(3):
+            self.assertEqual(self._translate(self.en["id"], self.es["id"]).status_code, 201)
+        rows = self.client.get("/api/translations").get_json()["translations"]
+        self.assertEqual(language_registry.loads, loads)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["source_language_name"], "English")
+        self.assertEqual(rows[0]["target_language_code"], "es")
+
+    def test_language_writes_are_seen_at_once(self):
+        tid = self._translate(self.en["id"], self.es["id"]).get_json()["id"]
+        self.client.put(f"/api/languages/{self.es['id']}", json={"name": "Castilian", "code": "es"})
+        res = self.client.get(f"/api/translations/{tid}").get_json()
+        self.assertEqual(res["target_language_name"], "Castilian")
+        self.client.delete(f"/api/languages/{self.es['id']}")
+        self.assertEqual(self._translate(self.en["id"], self.es["id"]).status_code, 404)
+
+    def test_unknown_id_checks_for_other_workers_languages(self):
+        import app.config as cfg
+        from unittest import mock
+        from app.models.database import get_db
+        conn = get_db()
+        fr_id = conn.execute("INSERT INTO languages (name, code) VALUES ('French', 'fr')").lastrowid
+        conn.commit()
+        conn.close()
+        with mock.patch.object(cfg.Config, "CHANGE_CHECK_INTERVAL", 3600):
+            res = self.client.post("/api/grammar-rules", json={
+                "language_id": fr_id, "rule_name": "Elision", "description": "le + a -> l'a",
+            })
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json()["language_name"], "French")
+
+    def test_ids_are_validated_like_the_database(self):
+        self.assertEqual(self._translate(str(self.en["id"]), self.es["id"]).status_code, 201)
+        self.assertEqual(self._translate("english", self.es["id"]).status_code, 404)
+        self.assertEqual(self._translate(self.en["id"], 999).status_code, 404)
+
+    def test_float_ids_are_rejected(self):
+        self.assertEqual(self._translate(self.en["id"] + 0.5, self.es["id"]).status_code, 404)
+        res = self.client.post("/api/grammar-rules", json={
+            "language_id": self.en["id"] + 0.5, "rule_name": "Articles", "description": "Use a/an",
+        })
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(self.client.get("/api/translations").get_json()["count"], 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for the benchmark runner.
+
+Run with:  python -m pytest tests/test_benchmarks.py -v
+"""
+
+import os
+import sys
+import unittest
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import run as bench  # noqa: E402
+
+
+class TestStatistics(unittest.TestCase):
+    def test_percentiles_and_errors(self):
+        samples = [("GET /a", float(ms), 200) for ms in range(1, 101)] + [("GET /b", 5.0, 500)]
+        results = bench.summarize(samples, elapsed=10.0)
+        a = results["routes"]["GET /a"]
+        self.assertEqual((a["p50_ms"], a["p95_ms"], a["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual(a["throughput_rps"], 10.0)
+        self.assertEqual(results["routes"]["GET /b"]["errors"], 1)
+        self.assertEqual(results["total"]["count"], 101)
+
+    def test_compare_flags_only_regressions_over_threshold(self):
+        def result(p95, rps=100.0):
+            route = {"count": 100, "p50_ms": 10.0, "p95_ms": p95, "p99_ms": 40.0}
+            return {"total": {"throughput_rps": rps}, "routes": {"GET /a": route}}
+
+        baseline = result(20.0)
+        self.assertEqual(bench.compare(result(23.0), baseline, threshold=0.2), [])
+        regressions = bench.compare(result(30.0, rps=70.0), baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("GET /a: p95_ms"))
+        # Sub-millisecond noise is ignored whatever the ratio.
+        self.assertEqual(bench.compare(result(1.2), result(0.5), threshold=0.2), [])
+
+
+class TestRunner(unittest.TestCase):
+    def test_small_run_against_local_provider(self):
+        from app.config import Config
+        database_path = Config.DATABASE_PATH
+        args = bench.build_parser().parse_args([
+            "--requests", "120", "--concurrency", "4", "--warmup", "0",
+            "--translations", "60", "--rules-per-language", "3",
+            "--ai-latency-ms", "1", "--ai-latency-dist", "fixed",
+        ])
+        results = bench.run(args)
+
+        self.assertEqual(results["total"]["count"], 120)
+        self.assertEqual(results["total"]["errors"], 0)
+        self.assertGreater(results["meta"]["ai"]["calls"], 0)
+        self.assertIn("POST /api/ai/translate", results["routes"])
+        self.assertEqual(Config.DATABASE_PATH, database_path)
+
+
+if __name__ == "__main__":
+    unittest.main()